@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from urllib.request import urlopen
+
+SOURCE = Path(__file__).resolve().parent.parent / 'source'
+sys.path.insert(0, str(SOURCE))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_server import FixtureServer
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Offline benchmark of the command path
+
+Synposis:
+    Drive RoutingCommandProcessor.process with stand-ins for
+    discord.Message against every feature, with the upstream
+    services replaced by recorded fixtures served from a local
+    http stub. Report messages per second and the p50 and p99
+    latency per feature, so that regressions show before deploy.
+
+    Run from anywhere:
+
+    <<< python benchmarks/bench_command_path.py --iterations 2000 >>>
+"""
+
+
+class Member:
+    """
+    Stand-in for discord.Member with the attributes the
+    features use.
+    """
+    def __init__(self, id: int, roles = ()):
+        self.id = id
+        self.name = f'member{id}'
+        self.mention = f'<@!{id}>'
+        self.roles = [SimpleNamespace(name = role) for role in roles]
+
+    def __eq__(self, other):
+        return isinstance(other, Member) and other.id == self.id
+
+    def __hash__(self):
+        return self.id
+
+
+class Message:
+    """
+    Stand-in for discord.Message.
+    """
+    guild = SimpleNamespace(id = 1, name = 'IoT19')
+    channel = SimpleNamespace(id = 10, name = 'allmänt')
+
+    def __init__(self, content: str, author: Member, mentions = ()):
+        self.content = content
+        self.author = author
+        self.mentions = list(mentions)
+
+
+class StubReddit:
+    """
+    Stand-in for praw.Reddit, fetching random submissions
+    from the fixture server.
+    """
+    SUBREDDITS = {'jokes': 'jokes', 'ProgrammerHumor': 'programmer_humor'}
+
+    def __init__(self, server: FixtureServer):
+        self.server = server
+
+    def subreddit(self, name: str):
+        url = self.server.url(f'/reddit/{StubReddit.SUBREDDITS[name]}/random')
+        return SimpleNamespace(
+            random = lambda: SimpleNamespace(**json.loads(urlopen(url).read())))
+
+
+SCENARIOS = {
+    'LunchMenuFeature': (
+        '!vad blir det för lunch idag',
+        '!vad är det för mat imorgon',
+        '!vad är veckans meny',
+    ),
+    'ScheduleFeature': (
+        '!vilket klassrum har vi på nästa lektion',
+        '!vad säger schemat',
+        '!vilka lektioner har vi idag',
+    ),
+    'CoronaSpreadFeature': (
+        '!hur många har smittats i sverige',
+        '!vilket land har flest döda',
+        '!hur många har dött totalt i corona',
+    ),
+    'RedditJokeFeature': (
+        '!berätta ett skämt',
+    ),
+    'RankingMembersFeature': (
+        '!rank upp {mention}',
+        '!rank alla',
+        '!rank för {mention}',
+    ),
+    'HelpQueueFeature': (
+        '!hjälp mig',
+        '!visa kö',
+        '!hjälp nästa',
+    ),
+}
+
+
+def build_processor(server: FixtureServer, workdir: str):
+    """
+    Instantiate every feature against the fixture server,
+    the same way client.py does against the real services.
+    """
+    import CommandIntegrator as ci
+    from features.LunchMenuFeature import LunchMenuFeature
+    from features.RedditJokeFeature import RedditJokeFeature
+    from features.ScheduleFeature import ScheduleFeature
+    from features.CoronaSpreadFeature import CoronaSpreadFeature
+    from features.RankingMembersFeature import RankingMembersFeature
+    from features.HelpQueueFeature import HelpQueueFeature
+    from routing import RoutingCommandProcessor
+
+    settings_file = Path('CommandIntegrator') / 'commandintegrator.settings.json'
+    with open(settings_file, 'r', encoding = 'utf-8') as f:
+        default_responses = json.loads(f.read())['default_responses']
+
+    redditjoke_ft = RedditJokeFeature(
+        client_id = 'benchmark', client_secret = 'benchmark', user_agent = 'benchmark')
+    redditjoke_ft.interface.reddit_client = StubReddit(server)
+
+    processor = RoutingCommandProcessor(
+        pronoun_lookup_table = ci.PronounLookupTable(),
+        default_responses = default_responses)
+
+    processor.features = (
+        LunchMenuFeature(url = server.url('/lunch')),
+        ScheduleFeature(url = server.url('/timeedit.ics')),
+        CoronaSpreadFeature(
+            CORONA_API_URI = server.url('/corona'),
+            CORONA_API_RAPIDAPI_HOST = 'benchmark',
+            CORONA_API_RAPIDAPI_KEY = 'benchmark',
+            translation_file_path = 'country_eng_swe_translations.json'),
+        redditjoke_ft,
+        RankingMembersFeature(database_path = os.path.join(workdir, 'ranking_data.db')),
+        HelpQueueFeature()
+    )
+    return processor
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_scenario(processor, phrases: tuple, iterations: int) -> list:
+    """
+    Process iterations messages, cycling through phrases and
+    authors, and return the latency of every message in seconds.
+    """
+    latencies = []
+    teacher = Member(1, roles = ('teacher',))
+
+    for i in range(iterations):
+        phrase = phrases[i % len(phrases)]
+        author = teacher if 'nästa' in phrase else Member(1000 + i % 500)
+        target = Member(2 + i % 50)
+        message = Message(phrase.format(mention = target.mention), author, mentions = (target,))
+
+        started = perf_counter()
+        processor.process(message).response()
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the command path offline')
+    parser.add_argument('--iterations', type = int, default = 1000)
+    parser.add_argument('--upstream-latency', type = float, default = 0.0,
+                        help = 'seconds the stub waits before answering')
+    args = parser.parse_args()
+
+    os.chdir(SOURCE)
+    with FixtureServer(latency = args.upstream_latency) as server, \
+         tempfile.TemporaryDirectory() as workdir:
+        processor = build_processor(server, workdir)
+
+        print(f'{"feature":<24}{"msgs/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for feature, phrases in SCENARIOS.items():
+            run_scenario(processor, phrases, len(phrases))
+            latencies = sorted(run_scenario(processor, phrases, args.iterations))
+            print(f'{feature:<24}'
+                  f'{len(latencies) / sum(latencies):>10.0f}'
+                  f'{percentile(latencies, 0.50) * 1000:>10.3f}'
+                  f'{percentile(latencies, 0.99) * 1000:>10.3f}')
+        print(f'upstream requests: {server.requests}')
+
+
+if __name__ == '__main__':
+    main()
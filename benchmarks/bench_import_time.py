@@ -0,0 +1,88 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parent.parent / 'source'
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Import time benchmark of the bot startup
+
+Synposis:
+    Measure with python -X importtime how long importing the
+    client takes, compared with importing the client and every
+    feature module up front, which is what startup cost before
+    features were loaded lazily. Each statement is imported in
+    a fresh interpreter, several times, and the fastest run is
+    reported along with the heaviest top level packages.
+
+    Run from anywhere:
+
+    <<< python benchmarks/bench_import_time.py --runs 5 >>>
+"""
+
+FEATURES = (
+    'features.LunchMenuFeature',
+    'features.ScheduleFeature',
+    'features.CoronaSpreadFeature',
+    'features.RedditJokeFeature',
+    'features.RankingMembersFeature',
+    'features.HelpQueueFeature',
+)
+
+STATEMENTS = {
+    'client': 'import client',
+    'client + features': '; '.join(['import client', *(f'import {i}' for i in FEATURES)]),
+}
+
+
+def import_times(statement: str) -> dict:
+    """
+    Run statement in a fresh interpreter with -X importtime and
+    return the cumulative import time in microseconds of every
+    top level package imported.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd = SOURCE, capture_output = True, text = True)
+
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):
+            packages[name.strip()] = packages.get(name.strip(), 0) + int(cumulative)
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the import time of the client')
+    parser.add_argument('--runs', type = int, default = 5)
+    parser.add_argument('--top', type = int, default = 10,
+                        help = 'number of the heaviest packages to list')
+    args = parser.parse_args()
+
+    totals = {}
+    for label, statement in STATEMENTS.items():
+        runs = [import_times(statement) for _ in range(args.runs)]
+        fastest = min(runs, key = lambda i: sum(i.values()))
+        totals[label] = sum(fastest.values())
+
+        print(f'{label}: {totals[label] / 1000:.1f} ms')
+        for name, cumulative in sorted(fastest.items(), key = lambda i: -i[1])[:args.top]:
+            print(f'    {name:<32}{cumulative / 1000:>10.1f} ms')
+
+    deferred = totals['client + features'] - totals['client']
+    print(f'deferred to the feature loader: {deferred / 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
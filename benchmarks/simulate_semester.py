@@ -0,0 +1,182 @@
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+
+SOURCE = Path(__file__).resolve().parent.parent / 'source'
+sys.path.insert(0, str(SOURCE))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_command_path import Member, Message
+from stub_server import FixtureServer
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Simulation of a semester of scheduled jobs and queries
+
+Synposis:
+    Replay the scheduled jobs of client.py and the questions
+    members ask during school days over a whole semester, on
+    a virtual clock, against the fixture server. The clock is
+    moved to each job or question in turn instead of waiting
+    for it, so that weeks of day rollovers, weekly purges of
+    the lunch menu and quiet hours at night run in seconds.
+    The jobs are replayed here, at the times client.py
+    schedules them, since the schedule library reads the
+    system clock on its own.
+
+    Run from anywhere:
+
+    <<< python benchmarks/simulate_semester.py --weeks 20 --queries-per-day 200 >>>
+"""
+
+QUESTIONS = (
+    '!vad blir det för lunch idag',
+    '!vad är det för mat imorgon',
+    '!vad är veckans meny',
+    '!vilka lektioner har vi idag',
+    '!vilket klassrum har vi på nästa lektion',
+    '!vad säger schemat',
+    '!hur många har smittats i sverige',
+)
+
+
+def build_features(server: FixtureServer, clock) -> dict:
+    """
+    Instantiate the time dependent features against the
+    fixture server, reading the time from clock.
+    """
+    from features.LunchMenuFeature import LunchMenuFeature
+    from features.ScheduleFeature import ScheduleFeature
+    from features.CoronaSpreadFeature import CoronaSpreadFeature
+
+    return {
+        'lunchmenu': LunchMenuFeature(url = server.url('/lunch'), clock = clock),
+        'schedule': ScheduleFeature(url = server.url('/timeedit.ics'), clock = clock),
+        'corona': CoronaSpreadFeature(
+            CORONA_API_URI = server.url('/corona'),
+            CORONA_API_RAPIDAPI_HOST = 'simulation',
+            CORONA_API_RAPIDAPI_KEY = 'simulation',
+            translation_file_path = 'country_eng_swe_translations.json',
+            watched_countries = {'sverige': ('cases', 'total_recovered', 'deaths')},
+            clock = clock)
+    }
+
+
+def build_processor(features: dict, clock):
+    import CommandIntegrator as ci
+    from routing import RoutingCommandProcessor
+
+    settings_file = Path('CommandIntegrator') / 'commandintegrator.settings.json'
+    with open(settings_file, 'r', encoding = 'utf-8') as f:
+        default_responses = json.loads(f.read())['default_responses']
+
+    processor = RoutingCommandProcessor(
+        pronoun_lookup_table = ci.PronounLookupTable(),
+        default_responses = default_responses,
+        clock = clock)
+    processor.features = tuple(features.values())
+    return processor
+
+
+def timeline(start: datetime, weeks: int, features: dict, processor, queries_per_day: int,
+             corona_interval: int, seed: int):
+    """
+    Yield the moment, kind and callable of every job and
+    question in the semester, in order of time.
+    """
+    rng = random.Random(seed)
+    sequence = itertools.count()
+    events = []
+    end = start + timedelta(weeks = weeks)
+
+    def add(moment: datetime, kind: str, call: callable):
+        heapq.heappush(events, (moment, next(sequence), kind, call))
+
+    schedule, corona = features['schedule'], features['corona']
+
+    for day in range(weeks * 7):
+        date = start + timedelta(days = day)
+        add(date.replace(hour = 8, minute = 30), 'todays lessons',
+            lambda: schedule.get_todays_lessons(return_if_none = False, channel = None))
+        if date.weekday() == 6:
+            add(date.replace(hour = 15), 'curriculum',
+                lambda: schedule.get_curriculum(return_if_none = False, channel = None))
+        if date.weekday() > 4:
+            continue
+        for n in range(queries_per_day):
+            moment = date.replace(hour = 7) + timedelta(seconds = rng.randrange(11 * 60 * 60))
+            phrase = QUESTIONS[rng.randrange(len(QUESTIONS))]
+            message = Message(phrase, Member(1000 + n % 100))
+            add(moment, 'question', lambda message = message: processor.process(message).response())
+
+    moment = start
+    while moment < end:
+        add(moment, 'corona watch', lambda: corona.get_watch_update(channel = None))
+        moment += timedelta(minutes = corona_interval)
+
+    while events:
+        moment, _, kind, call = heapq.heappop(events)
+        yield moment, kind, call
+
+
+def main():
+    from clock import VirtualClock, is_quiet
+
+    parser = argparse.ArgumentParser(description = 'Simulate a semester on a virtual clock')
+    parser.add_argument('--start', type = lambda i: datetime.strptime(i, '%Y-%m-%d'),
+                        default = datetime(2026, 8, 24), help = 'first day, YYYY-MM-DD')
+    parser.add_argument('--weeks', type = int, default = 20)
+    parser.add_argument('--queries-per-day', type = int, default = 200)
+    parser.add_argument('--corona-interval', type = int, default = 1,
+                        help = 'minutes between the corona watch job runs')
+    parser.add_argument('--seed', type = int, default = 1)
+    args = parser.parse_args()
+
+    os.chdir(SOURCE)
+    clock = VirtualClock(args.start)
+    sent, replies, quiet = {}, 0, 0
+
+    with FixtureServer(calendar_days = args.weeks * 7 + 7, calendar_start = args.start) as server:
+        features = build_features(server, clock)
+        processor = build_processor(features, clock)
+
+        started = perf_counter()
+        for moment, kind, call in timeline(
+                args.start, args.weeks, features, processor,
+                args.queries_per_day, args.corona_interval, args.seed):
+            clock.set(moment)
+            result = call()
+            if isinstance(result, dict):
+                result = result['result']
+
+            if kind == 'question':
+                replies += 1
+            elif result and is_quiet(moment):
+                quiet += 1
+            elif result:
+                sent[kind] = sent.get(kind, 0) + 1
+        elapsed = perf_counter() - started
+
+    print(f'simulated {args.start:%Y-%m-%d} to {clock.now():%Y-%m-%d} in {elapsed:.1f}s')
+    print(f'replies: {replies}')
+    for kind, count in sorted(sent.items()):
+        print(f'scheduled {kind}: {count}')
+    print(f'held back during quiet hours: {quiet}')
+    print(f'lunch menu versions: {features["lunchmenu"].interface.data_version}')
+    print(f'calendar downloads: {features["schedule"].interface.data_version}')
+    print(f'corona api calls: {features["corona"].interface.data_version}')
+    print(f'upstream requests: {server.requests}')
+
+
+if __name__ == '__main__':
+    main()
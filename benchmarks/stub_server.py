@@ -0,0 +1,124 @@
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Local http stub for the upstream services
+
+Synposis:
+    Serve recorded fixtures in place of the lunch menu site,
+    the TimeEdit calendar feed, the corona api and reddit, so
+    that the command path can be benchmarked offline and with
+    repeatable upstream latency. The calendar is generated upon
+    start so that it always covers the coming week, or the weeks
+    from the start of a simulation.
+"""
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+def build_calendar(days = 14, start = None) -> str:
+    """
+    Return an .ics calendar with two lessons every weekday,
+    starting today or at start.
+    """
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//RobBot//benchmark//SV']
+    today = (start or datetime.utcnow()).replace(hour = 0, minute = 0, second = 0, microsecond = 0)
+
+    for day in range(days):
+        date = today + timedelta(days = day)
+        if date.weekday() > 4:
+            continue
+        for n, (hour, course, room) in enumerate(((7, 'Python', 'Sal 301'), (12, 'Elektronik', 'Sal 204'))):
+            begin = date + timedelta(hours = hour)
+            end = begin + timedelta(hours = 3)
+            lines.extend([
+                'BEGIN:VEVENT',
+                f'UID:{date:%Y%m%d}-{n}@robbot',
+                f'DTSTAMP:{today:%Y%m%dT%H%M%SZ}',
+                f'DTSTART:{begin:%Y%m%dT%H%M%SZ}',
+                f'DTEND:{end:%Y%m%dT%H%M%SZ}',
+                f'SUMMARY:IoT19, Lärare Larsson, {course}',
+                f'LOCATION:{room}',
+                'END:VEVENT'
+            ])
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines)
+
+
+class FixtureServer:
+    """
+    Serve the fixtures on a free port on the loopback interface
+    from a background thread. Use as a context manager.
+
+    :latency:
+        float, seconds to wait before answering each request,
+        to simulate a remote server
+    :calendar_days:
+        int, the number of days the calendar covers
+    :calendar_start:
+        datetime, the first day of the calendar, today by default
+    """
+
+    def __init__(self, latency = 0.0, calendar_days = 14, calendar_start = None):
+        self.latency = latency
+        self.requests = 0
+        self._calendar = build_calendar(calendar_days, calendar_start).encode()
+        self._reddit = json.loads((FIXTURES / 'reddit_jokes.json').read_text(encoding = 'utf-8'))
+        self._routes = {
+            '/lunch': ('text/html; charset=utf-8', (FIXTURES / 'lunch_menu.html').read_bytes()),
+            '/timeedit.ics': ('text/calendar; charset=utf-8', self._calendar),
+            '/corona': ('application/json', (FIXTURES / 'corona.json').read_bytes()),
+        }
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+
+    def _handler(self):
+        fixture_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                fixture_server.requests += 1
+                if fixture_server.latency:
+                    threading.Event().wait(fixture_server.latency)
+
+                if self.path.startswith('/reddit/'):
+                    subreddit = self.path.split('/')[2]
+                    body = json.dumps(random.choice(fixture_server._reddit[subreddit])).encode()
+                    content_type = 'application/json'
+                elif self.path in fixture_server._routes:
+                    content_type, body = fixture_server._routes[self.path]
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}{path}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,54 @@
+import os
+import time
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Cached text file with hot reload
+
+Synposis:
+    Keep the contents of a text file in memory, such as the
+    greeting phrase sent to new members, and only read it
+    from disk again when the file has been modified. The
+    modification time is checked at most once per interval
+    to keep bursts of reads from hitting the disk.
+"""
+
+class CachedFile:
+    """
+    Return the contents of a file from memory, reloading
+    it when its modification time changes.
+
+    :path:
+        path to the file
+
+    :check_interval:
+        float, seconds between checks of the modification time
+    """
+
+    def __init__(self, path: str, encoding = 'utf-8', check_interval = 5.0):
+        self.path = path
+        self.encoding = encoding
+        self.check_interval = check_interval
+        self._contents = None
+        self._mtime = None
+        self._checked_at = None
+
+    def read(self) -> str:
+        """
+        Return the contents of the file, loaded from disk the
+        first time and whenever the file has changed since.
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._contents
+
+        self._checked_at = now
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding = self.encoding) as f:
+                self._contents = f.read()
+            self._mtime = mtime
+        return self._contents
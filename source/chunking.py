@@ -0,0 +1,57 @@
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Splitting of long messages
+
+Synposis:
+    Discord does not accept messages longer than 2000
+    characters. Split longer responses into several messages,
+    preferably between sections, otherwise between lines and
+    as a last resort between words, so that each part still
+    reads well on its own.
+"""
+
+MESSAGE_LIMIT = 2000
+SEPARATORS = ('\n\n', '\n', ' ')
+
+
+def split_message(text: str, limit = MESSAGE_LIMIT, separators = SEPARATORS) -> list:
+    """
+    Return text split into parts no longer than limit. The
+    parts are cut at the first separator that makes them fit,
+    and text without any of the separators is cut at limit.
+
+    :param text:
+        str, the message
+    :param limit:
+        int, the longest part allowed
+    :param separators:
+        tuple of str, tried in order
+    :returns:
+        list of str
+    """
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+    separator, finer = separators[0], separators[1:]
+    parts = []
+    current = None
+
+    for piece in text.split(separator):
+        if current is not None and len(current) + len(separator) + len(piece) <= limit:
+            current = f'{current}{separator}{piece}'
+            continue
+        if current is not None:
+            parts.append(current)
+        if len(piece) <= limit:
+            current = piece
+        else:
+            *head, current = split_message(piece, limit, finer)
+            parts.extend(head)
+
+    parts.append(current)
+    return [i.strip('\n') for i in parts if i.strip()]
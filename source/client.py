@@ -1,25 +1,29 @@
 import os
 import json
+import logging
 import asyncio
 import discord
+import metrics
+import parsing
+import sharedcache
 
+from concurrent.futures import ThreadPoolExecutor
 from schedule import Scheduler
-from dataclasses import dataclass
 from datetime import datetime, time, timedelta
 from dotenv import load_dotenv
 from pathlib import Path
+from cachedfile import CachedFile
+from clock import SYSTEM_CLOCK, is_quiet
+from dispatcher import Dispatcher, BROADCAST, REPLY
 from custom_errs import *
 from event import Event
+from reminders import Reminders
 from weekdays import Weekdays
 
-from features.LunchMenuFeature import LunchMenuFeature
-from features.RedditJokeFeature import RedditJokeFeature
-from features.ScheduleFeature import ScheduleFeature
-from features.CoronaSpreadFeature import CoronaSpreadFeature
-from features.RankingMembersFeature import RankingMembersFeature
-from features.HelpQueueFeature import HelpQueueFeature
+from routing import RoutingCommandProcessor
+from startup import FeatureLoader, lazy_factory
 from CommandIntegrator.logger import logger
-from CommandIntegrator import CommandProcessor, PronounLookupTable, PollCache
+from CommandIntegrator import PronounLookupTable
 
 """
 Details:
@@ -32,97 +36,248 @@ Synposis:
     Initialize the bot with api reference to Discords
     services. Instantiate bot intelligence from separate
     modules. 
+
+    The bot serves every guild it is a member of, or the
+    guilds named in DISCORD_GUILD, separated by commas. It
+    connects through the shards given by SHARD_COUNT and
+    SHARD_IDS; run launcher.py to spread the shards over
+    several processes.
 """
 
+log = logging.getLogger(__name__)
+
+
+class RobBotClient(discord.AutoShardedClient):
 
-class RobBotClient(discord.Client):
+    GREETING_WORKERS = 2
+    GREETING_INTERVAL = 1.0
+    PROCESS_WORKERS = 8
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+        self._clock = kwargs.get('clock', SYSTEM_CLOCK)
         self._scheduler = Scheduler()
-        self._pollcache = PollCache(silent_first_call = True)
+        self._greeting = CachedFile('greeting.dat')
+        self._greeting_queue = asyncio.Queue()
+        self._process_suffix = f".shard-{kwargs['SHARD_IDS'].replace(',', '-')}" if kwargs.get('SHARD_IDS') else ''
+        self._reminders = Reminders(f'reminders{self._process_suffix}.json', clock = self._clock)
+        self._dispatcher = Dispatcher()
+        self._executor = ThreadPoolExecutor(
+            max_workers = RobBotClient.PROCESS_WORKERS, thread_name_prefix = 'process')
                         
+        self.loop.create_task(self._dispatcher.run())
         self.loop.create_task(self.run_scheduler())
-        self.loop.create_task(
-            self.send_to_role(
-                method = helpqueue_ft.get_notification_if_helpqueue_changed, 
-                role = 'teacher'))
+        self.loop.create_task(self.send_reminders())
+        for _ in range(RobBotClient.GREETING_WORKERS):
+            self.loop.create_task(self.send_greetings())
+
+        self.loop.create_task(metrics.monitor_event_loop_lag())
+        self.loop.create_task(metrics.export_periodically(f'metrics{self._process_suffix}.prom'))
+        if kwargs.get('METRICS_PORT'):
+            self.loop.create_task(metrics.serve(port = int(kwargs['METRICS_PORT'])))
         
-        self._guild = kwargs['DISCORD_GUILD']
+        self._guilds = {i.strip() for i in (kwargs.get('DISCORD_GUILD') or '').split(',') if i.strip()}
+        self._autochannels = {}
     
     @property
     def scheduler(self):
         return self._scheduler
 
+    @property
+    def reminders(self):
+        return self._reminders
+
+    @property
+    def dispatcher(self):
+        return self._dispatcher
+
+    @property
+    def clock(self):
+        return self._clock
+
+    def serves(self, guild: discord.Guild) -> bool:
+        """
+        Return whether the bot answers in the guild. Private
+        messages, without a guild, are always answered.
+        """
+        return guild is None or not self._guilds or guild.name in self._guilds
+
+    def autochannel(self, guild: discord.Guild):
+        """
+        Return the channel that scheduled messages are sent
+        to in the guild; the one set in autochannels, the
+        default autochannel if it is in the guild, or else
+        the system channel of the guild.
+        """
+        channel = self.get_channel(self.autochannels.get(guild.id))
+        if channel is None:
+            channel = guild.get_channel(self.default_autochannel)
+        return channel or guild.system_channel
+
+    @property
+    def broadcast_channels(self) -> list:
+        """
+        The autochannel in each guild served by the shards
+        of this process.
+        """
+        channels = (self.autochannel(i) for i in self.guilds if self.serves(i))
+        return [i for i in channels if i is not None]
+
     @logger
     async def on_ready(self) -> None:
         """
         This method is called as soon as the bot is online.
         """
-        for guild_name in client.guilds:
-            if guild_name == self._guild:
-                break
+        served = [i.name for i in self.guilds if self.serves(i)]
+        log.info(f'Serving {len(served)} guilds on shards {self.shard_ids or "all"}: {", ".join(served)}')
+
+    async def close(self) -> None:
+        """
+        Close the sessions that features keep open to
+        upstream services, such as the aiohttp session
+        of the reddit jokes, and log out.
+        """
+        for feature in processor.features:
+            close = getattr(getattr(feature, 'interface', None), 'close', None)
+            if asyncio.iscoroutinefunction(close):
+                await close()
+        await super().close()
+
     @logger
     async def on_member_join(self, member: discord.Member) -> None:
         """
         If a new member just joined our server, greet them warmly!
+        The greeting is sent by the send_greetings workers, which 
+        keeps a burst of joining members from flooding the api.
+        """
+        self._greeting_queue.put_nowait(member)
+
+    @logger
+    async def send_greetings(self) -> None:
+        """
+        Send the greeting phrase to members waiting in the
+        greeting queue, one at a time with a pause in between. 
+        A few of these run concurrently, which bounds the rate 
+        of private messages sent when many members join at once.
+        The greetings are sent through the dispatcher.
         """
-        with open('greeting.dat', 'r', encoding = 'utf-8') as f:
-            greeting_phrase = f.read()
-            await member.create_dm()
-            await member.dm_channel.send(greeting_phrase)
+        await self.wait_until_ready()
+
+        while not self.is_closed():
+            member = await self._greeting_queue.get()
+            try:
+                await member.create_dm()
+                self.dispatcher.send(member.dm_channel, self._greeting.read(), lane = BROADCAST)
+            except discord.Forbidden:
+                pass
+            except (discord.HTTPException, OSError) as e:
+                log.warning(f'Could not greet {member}: {e}')
+            finally:
+                self._greeting_queue.task_done()
+            await asyncio.sleep(RobBotClient.GREETING_INTERVAL)
     
     @logger    
     async def on_message(self, message: discord.Message) -> None: 
         """
         Respond to a message in the channel if someone
         calls on the bot by name, asking for commands.
+        The message is processed in a worker thread, so
+        that the event loop is free while the features
+        wait for upstream services.
         """
 
-        if message.content.lower().startswith('!') and message.author != client.user:
-            response = processor.process(message).response()
-            if response: await message.channel.send(response)
+        if not self.serves(message.guild):
+            return
+
+        if message.content.lower().startswith('!') and message.author != self.user:
+            response = await self.loop.run_in_executor(
+                self._executor, lambda: processor.process(message).response())
+            response = await self.resolve(response)
+            self.dispatcher.send(message.channel, response, lane = REPLY)
+
+    async def resolve(self, response):
+        """
+        Return the response, awaited if it is a coroutine, as
+        returned by features fetching from upstream services
+        in the event loop. If the service is unavailable, the
+        response says so.
+        """
+        if not asyncio.iscoroutine(response):
+            return response
+        try:
+            return await response
+        except UpstreamUnavailable as e:
+            return str(e)
 
     @logger
-    async def send_to_role(self, method: callable, role: str) -> None:
+    async def send_to_roles(self, method: callable) -> None:
         """
-        Send string message to users in the guild with 
-        the @teacher role only, as a private message.
+        Send string messages to users in a guild with 
+        a given role only, as a private message.
         :param method:
-            method to call with pollcache instance
-            looping over infinitely, only sending 
-            deviating results (updates)
-        :param role:
-            string, the name of the role on the server
-            to send messages to.
+            method to call, looping over infinitely. It
+            returns a dict with guild ids as keys, and dicts
+            with role names as keys and the message for 
+            members with said role in the guild as values, 
+            or None when there is nothing to send.
         """
         while not self.is_closed():
-            res = self._pollcache(method)
+            res = method()
             if not res:
                 await asyncio.sleep(0.01)
                 continue
-            for user in self.get_all_members():
-                if len([i for i in user.roles if i.name == role]):
-                    await user.create_dm()
-                    await user.dm_channel.send(res)
+            for guild_id, roles in res.items():
+                guild = self.get_guild(guild_id)
+                if guild is None:
+                    continue
+                for user in guild.members:
+                    for role in {i.name for i in user.roles if i.name in roles}:
+                        await user.create_dm()
+                        self.dispatcher.send(user.dm_channel, roles[role])
             await asyncio.sleep(0.01)
 
+    @logger
+    async def send_reminders(self) -> None:
+        """
+        Send the alarm of every reminder to its channel as 
+        it becomes due. Add reminders with:
+
+        <<< client.reminders.add(event, channel = channel_id) >>>
+        """
+        await self.wait_until_ready()
+        await self.reminders.run(self.send_reminder)
+
+    async def send_reminder(self, event: Event, channel: int) -> None:
+        channel = self.get_channel(channel or self.default_autochannel)
+        if channel is not None:
+            self.dispatcher.send(channel, f'Påminnelse: {event}')
+
     @logger            
     async def run_scheduler(self) -> None:
         """
         Loop indefinitely and send messages that are pre-
         defined on a certain day and a certain time. 
+        Messages without a channel are sent to the 
+        autochannel of every guild served.
         """
 
-        await client.wait_until_ready()
+        await self.wait_until_ready()
 
         while not self.is_closed(): 
-            result = self.scheduler.run_pending(passthrough = True)
+            try:
+                result = await self.loop.run_in_executor(
+                    self._executor, lambda: self.scheduler.run_pending(passthrough = True))
+            except UpstreamUnavailable:
+                result = None
 
-            if not result or datetime.now().hour >= 22 or datetime.now().hour < 8:
+            if result and is_quiet(self.clock.now()):
+                RobBotClient.discard(result)
+                result = None
+
+            if not result:
                 await asyncio.sleep(0.1)
                 continue
             
@@ -132,14 +287,33 @@ class RobBotClient(discord.Client):
                 if isinstance(method_return, dict):
                     channel = method_return['channel']
                     message = method_return['result']
-                    channel = self.get_channel(channel)
-                    if message:
-                        await channel.send(message)
+                    if channel is None:
+                        channels = self.broadcast_channels
+                    else:
+                        channels = [i for i in (self.get_channel(channel),) if i is not None]
                 else:
-                    channel = self.get_channel(self.default_autochannel)
-                    await channel.send(method_return)
+                    channels = self.broadcast_channels
+                    message = method_return
+                message = await self.resolve(message)
+                if message:
+                    for channel in channels:
+                        self.dispatcher.send(channel, message)
             await asyncio.sleep(0.1)
 
+    @staticmethod
+    def discard(result: dict) -> None:
+        """
+        Close the coroutines among the returns of scheduled
+        methods that are not sent, as returned by features
+        fetching from upstream services in the event loop,
+        so that they are not left unawaited.
+        """
+        for method_return in result.values():
+            if isinstance(method_return, dict):
+                method_return = method_return['result']
+            if asyncio.iscoroutine(method_return):
+                method_return.close()
+
     @property
     def default_autochannel(self):
         return self._default_autochannel
@@ -147,6 +321,14 @@ class RobBotClient(discord.Client):
     @default_autochannel.setter
     def default_autochannel(self, value):
         self._default_autochannel = value
+
+    @property
+    def autochannels(self) -> dict:
+        """
+        The channel id for scheduled messages, by the id
+        of the guild.
+        """
+        return self._autochannels
    
 
 def load_environment(env_var_strings: list) -> dict:
@@ -168,6 +350,26 @@ def load_environment(env_var_strings: list) -> dict:
 
     return var_dict
 
+
+def shard_options(shard_count: str, shard_ids: str) -> dict:
+    """
+    Return the keyword arguments for the shards to connect
+    through. Without a shard count, Discord recommends one.
+
+    :param shard_count:
+        str, the total number of shards, or None
+    :param shard_ids:
+        str, the shards of this process separated by commas,
+        or None for all of them
+    """
+    if not shard_count:
+        return {}
+
+    options = {'shard_count': int(shard_count)}
+    if shard_ids:
+        options['shard_ids'] = [int(i) for i in shard_ids.split(',')]
+    return options
+
 if __name__ == '__main__':
 
     enviromnent_strings = [
@@ -182,7 +384,12 @@ if __name__ == '__main__':
         'DISCORD_TOKEN',
         'CORONA_API_URI',
         'CORONA_API_RAPIDAPI_HOST',
-        'CORONA_API_RAPIDAPI_KEY'
+        'CORONA_API_RAPIDAPI_KEY',
+        'METRICS_PORT',
+        'PARSER_PROCESSES',
+        'SHARD_COUNT',
+        'SHARD_IDS',
+        'SHARED_CACHE_PATH'
     ]
 
     CommandIntegrator_settings_file = Path('CommandIntegrator') / 'commandintegrator.settings.json'
@@ -193,89 +400,115 @@ if __name__ == '__main__':
 
     environment_vars = load_environment(enviromnent_strings)
     
-    
+    #  Parse the calendar and the lunch menu in worker processes, if set
+    if environment_vars['PARSER_PROCESSES']:
+        parsing.use_process_pool(int(environment_vars['PARSER_PROCESSES']))
 
-    #  --- Instantiate the key backend objects used and the discord client ---
+    #  Share the data downloaded from upstream with the other bot processes, if set
+    if environment_vars['SHARED_CACHE_PATH']:
+        sharedcache.use_shared_cache(environment_vars['SHARED_CACHE_PATH'])
 
-    helpqueue_ft = HelpQueueFeature()
-    ranking_ft = RankingMembersFeature()
-    lunchmenu_ft = LunchMenuFeature(url = environment_vars['LUNCH_MENU_URL'])
-    schedule_ft = ScheduleFeature(url = environment_vars['TIMEEDIT_URL'])
-    corona_ft = CoronaSpreadFeature(
-                    CORONA_API_URI = environment_vars['CORONA_API_URI'],
-                    CORONA_API_RAPIDAPI_HOST = environment_vars['CORONA_API_RAPIDAPI_HOST'],
-                    CORONA_API_RAPIDAPI_KEY = environment_vars['CORONA_API_RAPIDAPI_KEY'],
-                    translation_file_path = corona_translation_file)
 
-    redditjoke_ft = RedditJokeFeature(
-                        client_id = environment_vars['REDDIT_CLIENT_ID'], 
-                        client_secret = environment_vars['REDDIT_CLIENT_SECRET'],
-                        user_agent = environment_vars['REDDIT_USER_AGENT'])
+    #  --- Instantiate the key backend objects used and the discord client ---
 
-    processor = CommandProcessor(
+    processor = RoutingCommandProcessor(
         pronoun_lookup_table = PronounLookupTable(), 
         default_responses = default_responses)
-    
-    processor.features = (
-        lunchmenu_ft, 
-        schedule_ft, 
-        corona_ft, 
-        redditjoke_ft, 
-        ranking_ft,
-        helpqueue_ft
-    )
-    
-    client = RobBotClient(**environment_vars)
+
+    client = RobBotClient(
+        **shard_options(environment_vars['SHARD_COUNT'], environment_vars['SHARD_IDS']),
+        **environment_vars)
     client.default_autochannel = 'DISCORD_CHANNEL_HERE'
-    
 
-    """
-    Add scheduled methods here. If your method needs parameters, 
-    simply add them after the name of the method. here's an example:
+    #  Scheduled messages go to the autochannel of each guild, which is the
+    #  system channel of the guild unless set with
+    #  client.autochannels[guild_id] = channel_id
     
-    <<< client.scheduler.every(1).minute.do(add_integers, a = 10, b = 5) >>>
     """
-    @dataclass
-    class message_mock:
-        content: list
-
-    pollcache = PollCache(silent_first_call = True)
-
-    client.scheduler.every().day.at('08:30').do(
-        schedule_ft.get_todays_lessons, return_if_none = False, channel = client.default_autochannel
-    )
-
-    client.scheduler.every().sunday.at('15:00').do(
-        schedule_ft.get_curriculum, return_if_none = False, channel = client.default_autochannel
-    )
+    The features are constructed concurrently while the bot connects.
+    Each feature gets a deadline in seconds; the features ready within
+    their deadline are registered together, and features that miss it,
+    for instance when an upstream service is slow, are registered once 
+    they are ready while the bot is already answering with the others.
+    A feature failing to construct is logged and left out. A feature 
+    and its dependencies are imported by the pool when it is constructed.
+
+    Help queues are kept per channel. Map the guild id and channel
+    id of a channel to the role teaching the course in it, if it is
+    not 'teacher':
     
-    client.scheduler.every(20).to(24).hours.do(
-        redditjoke_ft.get_random_joke, channel = client.default_autochannel
-    ) 
-
-    swe_cases_request = message_mock
-    swe_cases_request.content = 'hur många har smittats i sverige'.split(' ')
-
-    swe_recoveries_request = message_mock
-    swe_recoveries_request.content = 'hur många har tillfrisknat i sverige'.split(' ')
+    <<< lazy_factory('features.HelpQueueFeature:HelpQueueFeature', teacher_roles = {(GUILD_ID, CHANNEL_ID): 'python-teacher'}) >>>
+    """
+    factories = {
+        'lunchmenu': (lazy_factory(
+                        'features.LunchMenuFeature:LunchMenuFeature',
+                        url = environment_vars['LUNCH_MENU_URL']), 5),
+        'schedule': (lazy_factory(
+                        'features.ScheduleFeature:ScheduleFeature',
+                        url = environment_vars['TIMEEDIT_URL']), 5),
+        'corona': (lazy_factory(
+                    'features.CoronaSpreadFeature:CoronaSpreadFeature',
+                    CORONA_API_URI = environment_vars['CORONA_API_URI'],
+                    CORONA_API_RAPIDAPI_HOST = environment_vars['CORONA_API_RAPIDAPI_HOST'],
+                    CORONA_API_RAPIDAPI_KEY = environment_vars['CORONA_API_RAPIDAPI_KEY'],
+                    translation_file_path = corona_translation_file,
+                    watched_countries = {'sverige': ('cases', 'total_recovered', 'deaths')}), 5),
+        'redditjoke': (lazy_factory(
+                        'features.RedditJokeFeature:RedditJokeFeature',
+                        client_id = environment_vars['REDDIT_CLIENT_ID'], 
+                        client_secret = environment_vars['REDDIT_CLIENT_SECRET'],
+                        user_agent = environment_vars['REDDIT_USER_AGENT'],
+                        backend = 'aiohttp'), 10),
+        'ranking': (lazy_factory(
+                        'features.RankingMembersFeature:RankingMembersFeature',
+                        legacy_guild = (environment_vars['DISCORD_GUILD'] or '').split(',')[0].strip()), 5),
+        'helpqueue': (lazy_factory('features.HelpQueueFeature:HelpQueueFeature'), 2)
+    }
 
-    swe_deaths_request = message_mock
-    swe_deaths_request.content = 'hur många har omkommit i sverige'.split(' ')
+    """
+    Add scheduled methods here, under the name of the feature they
+    belong to. They are scheduled when the feature is registered. 
+    If your method needs parameters, simply add them after the name 
+    of the method. here's an example:
     
-    client.scheduler.every(1).minutes.do(
-        pollcache, func = corona_ft.get_cases_by_country, message = swe_cases_request,
-        channel = 'DISCORD_CHANNEL_HERE'
-    )
-
-    client.scheduler.every(1).minutes.do(
-        pollcache, func = corona_ft.get_recoveries_by_country, message = swe_recoveries_request,
-        channel = 'DISCORD_CHANNEL_HERE'
-    )
-
-    client.scheduler.every(1).minutes.do(
-        pollcache, func = corona_ft.get_deaths_by_country, message = swe_deaths_request,
-        channel = 'DISCORD_CHANNEL_HERE'
-    )
+    <<< client.scheduler.every(1).minute.do(add_integers, a = 10, b = 5) >>>
+    """
+    jobs = {
+        'schedule': lambda feature: (
+            client.scheduler.every().day.at('08:30').do(
+                feature.get_todays_lessons, return_if_none = False, channel = None),
+            client.scheduler.every().sunday.at('15:00').do(
+                feature.get_curriculum, return_if_none = False, channel = None)
+        ),
+        'redditjoke': lambda feature: (
+            client.scheduler.every(20).to(24).hours.do(
+                feature.get_random_joke, channel = None),
+        ),
+        'corona': lambda feature: (
+            client.scheduler.every(1).minutes.do(
+                feature.get_watch_update, channel = 'DISCORD_CHANNEL_HERE'),
+        ),
+        'helpqueue': lambda feature: (
+            client.loop.create_task(
+                client.send_to_roles(method = feature.get_notifications_if_helpqueue_changed)),
+        )
+    }
+
+    loader = FeatureLoader()
+    registered = {}
+    processor.features = ()
+
+    def register(name: str, feature) -> None:
+        registered[name] = feature
+        processor.features = tuple(registered.values())
+        jobs.get(name, lambda feature: None)(feature)
+        loader.warm_up(name, feature)
+
+    #  The features are loaded in the background so that the bot connects at once
+    loader.start(
+        factories,
+        on_ready = lambda name, feature: client.loop.call_soon_threadsafe(register, name, feature))
 
     # --- Turn the key and start the bot ---
     client.run(environment_vars['DISCORD_TOKEN'])
+    loader.close()
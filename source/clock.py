@@ -0,0 +1,91 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Clocks for time dependent parts of the bot
+
+Synposis:
+    The schedule, the lunch menu, the corona statistics and
+    the scheduled messages all depend on the time of day and
+    the date. They read the time from a clock given to them,
+    the system clock by default, so that a virtual clock can
+    be given instead in tests and simulations. A virtual clock
+    only moves when it is told to, which lets a day rollover,
+    the weekly purge of the lunch menu or the quiet hours at
+    night be run through in an instant.
+"""
+
+QUIET_HOURS = (22, 8)
+
+
+def is_quiet(moment: datetime) -> bool:
+    """
+    Return whether moment is within the quiet hours, when
+    no scheduled messages are sent.
+    """
+    start, end = QUIET_HOURS
+    return moment.hour >= start or moment.hour < end
+
+
+class SystemClock:
+    """
+    The local time of the system.
+    """
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def today(self) -> date:
+        return self.now().date()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock(SystemClock):
+    """
+    A clock standing still at start until it is advanced.
+    Its monotonic time counts the seconds it has been
+    advanced by.
+
+    :start:
+        datetime, the local time to start at
+    """
+
+    def __init__(self, start: datetime):
+        self._start = start
+        self._now = start
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def monotonic(self) -> float:
+        return (self._now - self._start).total_seconds()
+
+    def advance(self, delta) -> datetime:
+        """
+        Move the clock forward by delta, a timedelta or
+        seconds, and return the new time.
+        """
+        if not isinstance(delta, timedelta):
+            delta = timedelta(seconds = delta)
+        if delta < timedelta():
+            raise ValueError('A clock can not be moved backwards')
+        with self._lock:
+            self._now += delta
+            return self._now
+
+    def set(self, moment: datetime) -> None:
+        """
+        Move the clock forward to moment.
+        """
+        self.advance(moment - self._now)
+
+
+SYSTEM_CLOCK = SystemClock()
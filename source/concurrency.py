@@ -0,0 +1,114 @@
+import functools
+import threading
+from metrics import registry
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Running feature callbacks in worker threads
+
+Synposis:
+    Messages are processed in a thread pool, so that one
+    slow upstream request does not hold up the event loop
+    and every other message with it. When many members ask
+    the same thing at once while a cache is cold, single
+    flight lets the first caller do the refresh while the
+    others wait for it and share its result, so that a burst
+    of questions costs one upstream request. Features with
+    state of their own serialise access to it with
+    synchronized.
+"""
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'thread')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.thread = threading.get_ident()
+
+
+class SingleFlight:
+    """
+    Share the result of a call among concurrent callers
+    with the same key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, function: callable, *args, **kwargs):
+        """
+        Call function, unless a call with the same key is
+        already in flight, in which case wait for it and
+        return its result or raise its exception. A call
+        made from within the flight itself, by the same
+        thread, is not shared.
+
+        :returns:
+            tuple with the result and whether it was shared
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            reentrant = flight is not None and flight.thread == threading.get_ident()
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if reentrant:
+            return function(*args, **kwargs), False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = function(*args, **kwargs)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+def single_flight(method):
+    """
+    Decorate a method so that concurrent calls on the same
+    instance with the same arguments share one call. The
+    method should check again whether its work is still
+    needed, since a caller arriving just after a flight
+    landed starts a new one.
+    """
+    flights = SingleFlight()
+    shared = registry.counter('singleflight_shared_total', operation = method.__qualname__)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (id(self), args, tuple(sorted(kwargs.items())))
+        result, was_shared = flights.do(key, method, self, *args, **kwargs)
+        if was_shared:
+            shared.inc()
+        return result
+    return wrapper
+
+
+def synchronized(method):
+    """
+    Decorate a method so that it holds the _lock of its
+    instance while it runs.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -1,8 +1,16 @@
 import json
+import logging
 import os
-import requests
+import sharedcache
+import time
+from clock import SYSTEM_CLOCK
+from concurrency import single_flight
+from custom_errs import UpstreamUnavailable
 from datetime import datetime, timedelta
+from metrics import registry
 from pathlib import Path
+from upstream import breaker
+from urllib.parse import urlparse
 
 """
 This module contains the interface class used by the 
@@ -14,6 +22,8 @@ https://rapidapi.com/astsiatsko/api/coronavirus-monitor/
 """
 
 
+log = logging.getLogger(__name__)
+
 class ApiHandle:
 	"""
 	Call api and parse output to JSON. Returns cache 
@@ -39,15 +49,23 @@ class ApiHandle:
 		dictionary which can be added to with the add_header method.
 		Contains headers which will be used upon a request with the 
 		fetch() call.
+
+	:clock:
+		the clock to read the time from, the system clock by default
 	"""
 
-	def __init__(self, uri: str, standby_hours = 2):
+	def __init__(self, uri: str, standby_hours = 2, clock = SYSTEM_CLOCK):
 		self.uri: str = uri
+		self.clock = clock
 		self.last_api_call: datetime = None
 		self._wait_time = (60 * 60) * standby_hours
-		self._cached_response = None
 		self._cached_response: dict = None
+		self._data_version = 0
+		self._upstream = breaker(uri, 'Coronastatistiken')
 		self._headers = {}
+		self._cache_hits = registry.counter('cache_hits_total', cache = 'apihandle')
+		self._cache_misses = registry.counter('cache_misses_total', cache = 'apihandle')
+		self._latency = registry.histogram('upstream_request_seconds', upstream = 'corona')
 
 	@property
 	def uri(self) -> str:
@@ -55,7 +73,7 @@ class ApiHandle:
 	
 	@uri.setter
 	def uri(self, uri: str) -> None:
-		if uri.startswith('https'):
+		if uri.startswith('https') or urlparse(uri).hostname in ('127.0.0.1', 'localhost'):
 			self._uri = uri
 		else:
 			raise AttributeError('Got "http", expected "https"')
@@ -89,28 +107,134 @@ class ApiHandle:
 		"""
 		self._headers[key] = value
 
+	@single_flight
 	def fetch(self) -> dict:
 		"""
 		Call the api and mutate the instance variable _cached_response
 		at the same time, if either none prior were made or the time 
-		expired and it needs to be refreshed. 
+		expired and it needs to be refreshed. Concurrent callers share
+		one call, and so do the bot processes if the shared cache is
+		used. The previous response is returned if the api can not
+		be reached.
 
 		:returns:
 			dict
+		:raises:
+			UpstreamUnavailable if the api can not be reached and
+			there is no previous response
 		"""
 		if self._cached_response:
-			seconds_since_last_call = (datetime.now() - self._last_api_call).seconds
+			seconds_since_last_call = (self.clock.now() - self._last_api_call).total_seconds()
 			if seconds_since_last_call < self._wait_time: 
+				self._cache_hits.inc()
 				return self._cached_response
+
+		self._cache_misses.inc()
 		try:
-			response = requests.get(self.uri, headers = self._headers).json()
-		except Exception:
-			raise
+			response = json.loads(sharedcache.fetch(f'corona:{self.uri}', self._wait_time, self._download))
+		except Exception as e:
+			if self._cached_response:
+				if not isinstance(e, UpstreamUnavailable):
+					log.warning(f'Returning the response from {self.last_api_call}: {e}')
+				return self._cached_response
+			if isinstance(e, UpstreamUnavailable):
+				raise
+			raise self._upstream.unavailable() from e
 		
 		self._cached_response = response
-		self.last_api_call = datetime.now()
+		self._data_version += 1
+		self.last_api_call = self.clock.now()
 		return response
 
+	def _download(self) -> bytes:
+		started = time.perf_counter()
+		try:
+			return json.dumps(self._upstream.call(self._request)).encode()
+		finally:
+			self._latency.observe(time.perf_counter() - started)
+
+	def _request(self) -> dict:
+		import requests
+
+		response = requests.get(self.uri, headers = self._headers, timeout = self._upstream.timeout)
+		response.raise_for_status()
+		return response.json()
+
+	@property
+	def data_version(self) -> int:
+		"""
+		Increased every time a new response is fetched.
+		"""
+		return self._data_version
+
+
+class CountryIndex:
+	"""
+	Resolve country names written in chat to the names used
+	by the api. The index is built once from the translation
+	file and holds every Swedish and English name, lower case
+	and stripped of punctuation, along with the genitive form
+	of the Swedish names ("sveriges") and names written as one
+	word ("nyazeeland"). Names of up to MAX_WORDS words are
+	looked up directly, so a message is resolved in a single
+	pass over its words.
+
+	:translation_file_path:
+		path to the json file with the keys 'swe_to_eng'
+		and 'eng_to_swe'
+	"""
+
+	MAX_WORDS = 3
+	STRIPPED_CHARS = '?!.,:;"\'()'
+
+	def __init__(self, translation_file_path: str):
+		try:
+			with open(translation_file_path, 'r', encoding = 'utf-8') as f:
+				translation = json.loads(f.read())
+		except Exception as e:
+			raise Exception(f'Could not load translation file. {e}')
+
+		self.swe_to_eng = translation['swe_to_eng']
+		self.eng_to_swe = translation['eng_to_swe']
+		self._aliases = {}
+
+		for swedish, english in self.swe_to_eng.items():
+			self._add(swedish, english, swedish)
+			self._add(swedish + 's' if not swedish.endswith('s') else swedish, english, swedish)
+			self._add(english, english, swedish)
+		for english, swedish in self.eng_to_swe.items():
+			self._add(english, english, swedish)
+
+	def _add(self, alias: str, english: str, swedish: str) -> None:
+		words = tuple(CountryIndex.normalise(i) for i in alias.split())
+		self._aliases.setdefault(words, (english, swedish))
+		if len(words) > 1:
+			self._aliases.setdefault((''.join(words),), (english, swedish))
+
+	@staticmethod
+	def normalise(word: str) -> str:
+		return word.lower().strip(CountryIndex.STRIPPED_CHARS)
+
+	def resolve(self, words: list) -> tuple:
+		"""
+		Return the country mentioned in a message. The last
+		mention wins, and longer names win over shorter ones
+		so that "nya zeeland" is not read as something else.
+
+		:param words:
+			list of words in the message
+		:returns:
+			tuple with the english and swedish name, or None
+		"""
+		words = [CountryIndex.normalise(i) for i in words]
+
+		for start in range(len(words) - 1, -1, -1):
+			for length in range(min(CountryIndex.MAX_WORDS, len(words) - start), 0, -1):
+				country = self._aliases.get(tuple(words[start:start + length]))
+				if country:
+					return country
+		return None
+
 
 class Client:
 	"""
@@ -124,6 +248,8 @@ class Client:
 	def __init__(self, api_handle: ApiHandle, translation_file_path: str):
 		self.api_handle = api_handle
 		self.translation_file_path = translation_file_path
+		self.country_index = CountryIndex(translation_file_path)
+		self._countries = (None, {})
 
 	def _translate(self, country: str, from_language: str) -> str:
 		"""
@@ -138,15 +264,32 @@ class Client:
 			string
 		"""
 		country = country.lower()
-		try:
-			with open(self.translation_file_path, 'r', encoding = 'utf-8') as f:
-				translation = json.loads(f.read())
-		except Exception as e:
-			raise Exception(f'Could not load translation file. {e}')
-		
 		if from_language == 'swedish':
-			return translation['swe_to_eng'][country]
-		return translation['eng_to_swe'][country]
+			return self.country_index.swe_to_eng[country]
+		return self.country_index.eng_to_swe[country]
+
+	@property
+	def data_version(self) -> int:
+		return self.api_handle.data_version
+
+	def countries_by_name(self) -> dict:
+		"""
+		Return the countries in the latest api response by
+		their lower case name. The lookup is rebuilt only when
+		the api handle returns a new response.
+		"""
+		response = self.api_handle.fetch()
+		if response is not self._countries[0]:
+			by_name = {i['country_name'].lower(): i for i in response['countries_stat']}
+			self._countries = (response, by_name)
+		return self._countries[1]
+
+	def resolve_country(self, words: list) -> tuple:
+		"""
+		Return the english and swedish name of the country
+		mentioned in the words of a message, or None.
+		"""
+		return self.country_index.resolve(words)
 
 	def get_raw_data(self):
 		"""
@@ -170,23 +313,23 @@ class Client:
 	def get_recoveries(self, sort_by_highest = True) -> str:
 		sorter = lambda i: int(i['total_recovered'].replace(',',''))
 		data = self.api_handle.fetch()['countries_stat']
-		data.sort(key = sorter, reverse = sort_by_highest)
-		translated_country = self._translate(data[0]['country_name'], 'english')
-		return f"{translated_country}: {data[0]['total_recovered']}"
+		country = max(data, key = sorter) if sort_by_highest else min(data, key = sorter)
+		translated_country = self._translate(country['country_name'], 'english')
+		return f"{translated_country}: {country['total_recovered']}"
 
 	def get_infections(self, sort_by_highest = True) -> str:
 		sorter = lambda i: int(i['cases'].replace(',',''))
 		data = self.api_handle.fetch()['countries_stat']
-		data.sort(key = sorter, reverse = sort_by_highest)
-		translated_country = self._translate(data[0]['country_name'], 'english')
-		return f"{translated_country}: {data[0]['cases']}"
+		country = max(data, key = sorter) if sort_by_highest else min(data, key = sorter)
+		translated_country = self._translate(country['country_name'], 'english')
+		return f"{translated_country}: {country['cases']}"
 
 	def get_deaths(self, sort_by_highest = True) -> str:
 		sorter = lambda i: int(i['deaths'].replace(',',''))
 		data = self.api_handle.fetch()['countries_stat']
-		data.sort(key = sorter, reverse = sort_by_highest)
-		translated_country = self._translate(data[0]['country_name'], 'english')
-		return f"{translated_country}: {data[0]['deaths']}"	
+		country = max(data, key = sorter) if sort_by_highest else min(data, key = sorter)
+		translated_country = self._translate(country['country_name'], 'english')
+		return f"{translated_country}: {country['deaths']}"	
 
 	def get_by_query(self, query: str, country_name: str) -> str:
 		"""
@@ -197,16 +340,31 @@ class Client:
 			- 'recovered'
 			- 'deaths'
 		:param country: 
-			string represenging country for lookup.
+			string represenging country for lookup, in Swedish
+			or English.
 		:returns:
 			string
 		"""
+		country = self.resolve_country(country_name.split())
+		if country is None:
+			raise KeyError(f'No such key: {country_name}')
+		return self.get_by_country(query, country[0])
 
-		data = self.api_handle.fetch()['countries_stat']
-		for country in data:
-			if country['country_name'].lower() == self._translate(country_name, 'swedish'):
-				return country[query]
-		raise KeyError(f'No such key: {country_name}')
+	def get_by_country(self, query: str, country: str) -> str:
+		"""
+		Get details on a country depending on query.
+		:param query:
+			string, the key in the api response, such as 'cases'
+		:param country:
+			string, the english name of the country as returned
+			by resolve_country
+		:returns:
+			string
+		"""
+		try:
+			return self.countries_by_name()[country][query]
+		except KeyError:
+			raise KeyError(f'No such key: {country}')
 
 	def get_data_timestamp(self) -> str:
 		"""
@@ -216,4 +374,72 @@ class Client:
 		:returns:
 			string, datetime
 		"""
-		return self.api_handle.fetch()['statistic_taken_at']
\ No newline at end of file
+		return self.api_handle.fetch()['statistic_taken_at']
+
+
+class CoronaWatch:
+	"""
+	Watch any number of metrics for any number of countries
+	and report when they change. Every poll evaluates all
+	watches against the same api response, and does nothing
+	at all while the api handle keeps returning its cache.
+	Values are compared as numbers. The first poll is silent,
+	since there is nothing to compare with yet.
+
+	:client:
+		Client instance to get the data from
+
+	:watches:
+		dict, country names in Swedish or English as keys and
+		tuples with the metrics to watch as values, such as
+		{'sverige': ('cases', 'deaths')}
+	"""
+
+	METRICS = {
+		'cases': 'smittade',
+		'new_cases': 'nya fall',
+		'total_recovered': 'tillfrisknade',
+		'deaths': 'döda'
+	}
+
+	def __init__(self, client: Client, watches: dict):
+		self.client = client
+		self.watches = {}
+		self._values = {}
+		self._last_response = None
+
+		for name, metrics in watches.items():
+			country = client.resolve_country(name.split())
+			if country is None:
+				raise KeyError(f'No such country: {name}')
+			self.watches[country] = tuple(metrics)
+
+	def poll(self) -> str:
+		"""
+		Return one message with every watched value that
+		changed since the last poll, or None.
+		"""
+		response = self.client.api_handle.fetch()
+		if response is self._last_response:
+			return None
+		self._last_response = response
+
+		countries = self.client.countries_by_name()
+		output = []
+
+		for (english, swedish), metrics in self.watches.items():
+			if english not in countries:
+				continue
+			changes = []
+			for metric in metrics:
+				value = int(countries[english][metric].replace(',', '') or 0)
+				previous = self._values.get((english, metric))
+				self._values[english, metric] = value
+				if previous is not None and value != previous:
+					changes.append(f'{CoronaWatch.METRICS[metric]} {value:,} ({value - previous:+,})')
+			if changes:
+				output.append(f'Corona i {swedish.title()}: {", ".join(changes)}')
+
+		if output:
+			return os.linesep.join(output)
+		return None
@@ -34,4 +34,7 @@ class AccessViolation(Exception):
     pass
 
 class ScrapingError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class UpstreamUnavailable(Exception):
+    pass
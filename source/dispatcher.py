@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+import logging
+import time
+from chunking import MESSAGE_LIMIT, split_message
+from collections import deque
+from metrics import registry
+from ratelimit import RateLimiter, TokenBucket
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Outbound message dispatcher
+
+Synposis:
+    Send every message from the bot through one queue, which
+    keeps within the rate limits of Discord instead of running
+    into them. Each channel has a token bucket of its own and
+    all channels share a global one. Replies to members are
+    sent before broadcasts from scheduled jobs, and consecutive
+    messages waiting for the same channel are coalesced into
+    one, as long as they fit within the length limit. Messages
+    longer than the limit are split before they are queued.
+"""
+
+REPLY = 0
+BROADCAST = 1
+
+log = logging.getLogger(__name__)
+
+
+class Dispatcher:
+    """
+    Queue messages per channel and send them as the rate
+    limits allow. Call run() once in the event loop.
+
+    :channel_rate:
+        float, messages per second sent to a channel
+    :channel_burst:
+        int, messages sent to a channel at once
+    :global_rate:
+        float, messages per second sent in total
+    :global_burst:
+        int, messages sent in total at once
+    """
+
+    MESSAGE_LIMIT = MESSAGE_LIMIT
+    LANES = {REPLY: 'reply', BROADCAST: 'broadcast'}
+
+    def __init__(self, channel_rate = 1.0, channel_burst = 5, global_rate = 40.0,
+                 global_burst = 40, clock = time.monotonic):
+        self._channel_limiter = RateLimiter(channel_rate, channel_burst, clock)
+        self._global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self._pending = {}
+        self._sending = set()
+        self._sequence = itertools.count()
+        self._wakeup = None
+
+        self._coalesced = registry.counter('outbound_coalesced_total')
+        self._errors = registry.counter('outbound_errors_total')
+        self._sent = {lane: registry.counter('outbound_messages_total', lane = name)
+                      for lane, name in Dispatcher.LANES.items()}
+        self._waited = {lane: registry.histogram('outbound_queue_seconds', lane = name)
+                        for lane, name in Dispatcher.LANES.items()}
+
+    def __len__(self):
+        return sum(len(queue) for lanes in self._pending.values() for queue in lanes)
+
+    def send(self, channel, content: str, lane = BROADCAST) -> None:
+        """
+        Queue a message for the channel. It is appended to the
+        last message waiting for the channel in the same lane,
+        if the two fit in one message together. A message too
+        long to send is queued in parts, using the parts of a
+        cached Response if it is one. Content that is not a str
+        is sent as its string representation.
+
+        :param channel:
+            discord.abc.Messageable
+        :param content:
+            str, the message
+        :param lane:
+            REPLY or BROADCAST
+        """
+        if not content:
+            return
+        if not isinstance(content, str):
+            content = str(content)
+
+        queue = self._pending.setdefault(channel, (deque(), deque()))[lane]
+        parts = getattr(content, 'chunks', None) or split_message(content, Dispatcher.MESSAGE_LIMIT)
+        for part in parts:
+            if queue and len(queue[-1][1]) + len(part) < Dispatcher.MESSAGE_LIMIT:
+                queue[-1][1] = f'{queue[-1][1]}\n{part}'
+                self._coalesced.inc()
+            else:
+                queue.append([next(self._sequence), part, time.monotonic()])
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """
+        Send the queued messages, forever. The message sent
+        next is the oldest reply, or the oldest broadcast if no
+        reply is waiting, for a channel that is not rate limited
+        and not already being sent to.
+        """
+        self._wakeup = asyncio.Event()
+
+        while True:
+            channel, wait = self._next_channel()
+
+            if channel is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout = wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            global_wait = self._global_bucket.delay()
+            if global_wait:
+                await asyncio.sleep(global_wait)
+                continue
+
+            self._global_bucket.consume()
+            self._channel_limiter.consume(channel)
+            lane, content = self._pop(channel)
+            self._sending.add(channel)
+            asyncio.ensure_future(self._send(channel, lane, content))
+
+    def _next_channel(self) -> tuple:
+        """
+        Return the channel to send to next, or None and the
+        seconds until a channel is allowed to be sent to.
+        """
+        best, best_key, wait = None, None, None
+
+        for channel, lanes in self._pending.items():
+            if channel in self._sending:
+                continue
+
+            lane = REPLY if lanes[REPLY] else BROADCAST
+            delay = self._channel_limiter.delay(channel)
+            if delay:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+
+            key = (lane, lanes[lane][0][0])
+            if best is None or key < best_key:
+                best, best_key = channel, key
+        return best, wait
+
+    def _pop(self, channel) -> tuple:
+        lanes = self._pending[channel]
+        lane = REPLY if lanes[REPLY] else BROADCAST
+        _, content, queued_at = lanes[lane].popleft()
+
+        if not lanes[REPLY] and not lanes[BROADCAST]:
+            del self._pending[channel]
+
+        self._waited[lane].observe(time.monotonic() - queued_at)
+        return lane, content
+
+    async def _send(self, channel, lane: int, content: str) -> None:
+        try:
+            await channel.send(content)
+            self._sent[lane].inc()
+        except Exception:
+            self._errors.inc()
+            log.exception(f'Could not send message to {channel}')
+        finally:
+            self._sending.discard(channel)
+            self._wakeup.set()
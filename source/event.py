@@ -1,7 +1,7 @@
-import ics
 import json
 from datetime import date, datetime, timedelta, time
 from custom_errs import *
+from weekdays import Weekdays
 
 """
 Details:
@@ -20,18 +20,53 @@ Synposis:
     with a chatbot. 
 """
 
+_date, _time = date, time
+
 class Event:
-    def __init__(self, *args, **kwargs):
-        self.body = None
-        self.location = None
-        self.date = None
-        self.curriculum_event = False
-        self.weekdays = []
-        self.time = time()
-        self.alarm = timedelta()
-
-        for key in kwargs:
-            setattr(self, key, kwargs[key])
+    """
+    An event at a time of day, either on a date or on
+    the given weekdays, with an alarm a while before it.
+    The values are validated when the event is constructed,
+    and the time and the alarm again whenever they are set.
+
+    :body:
+        str, what the event is about
+    :location:
+        str, where it takes place
+    :date:
+        datetime.date or None
+    :curriculum_event:
+        bool, whether it is a lesson in the curriculum
+    :weekdays:
+        list of Weekdays the event recurs on
+    :time:
+        datetime.time the event begins
+    :alarm:
+        datetime.timedelta, how long before the event
+        the alarm goes off. Read back as the datetime.time
+        the alarm goes off at.
+    """
+    __slots__ = ('_body', '_location', 'date', 'curriculum_event', 
+                 'weekdays', '_time', '_alarm', '_alarm_seconds')
+
+    def __init__(self, body = None, location = None, date = None, curriculum_event = False,
+                 weekdays = None, time = time(), alarm = timedelta()):
+        
+        weekdays = [] if weekdays is None else weekdays
+
+        if not isinstance(weekdays, list):
+            raise AttributeError(f'Expected {list}, got {type(weekdays)}')
+        if not isinstance(date, (_date, type(None))):
+            raise AttributeError(f'Expected {_date} or {None}, got {type(date)}')
+
+        self._body = body
+        self._location = location
+        self.date = date
+        self.curriculum_event = curriculum_event
+        self.weekdays = weekdays
+        self._alarm_seconds = 0
+        self.time = time
+        self.alarm = alarm
 
     def __repr__(self):
         if self.curriculum_event:
@@ -43,86 +78,116 @@ class Event:
             return f'{self.body}\nNär: {when}\nVar: {self.location}\n'
         return self.body
 
-    @property
-    def curriculum_event(self):
-        return self._curriculum_event
-
-    @curriculum_event.setter
-    def curriculum_event(self, value):
-        self._curriculum_event = value    
-
     @property
     def body(self):
         if self._body:
             return self._body
         return '-'
 
-    @body.setter
-    def body(self, value):
-        self._body = value
-
     @property
     def location(self):
         if self._location:
             return self._location
         return '-'
 
-    @location.setter
-    def location(self, value):
-        self._location = value
-
     @property
-    def weekdays(self):
-        if self._weekdays:
-            return self._weekdays
-        return []
-    
-    @weekdays.setter
-    def weekdays(self, value):
-        if isinstance(value, list):
-            self._weekdays = value
-        else:
-            raise AttributeError(f'Expected {list}, got {type(value)}')
-
-    @property
-    def time(self):
+    def time(self) -> _time:
         return self._time
-        
-    @time.setter
-    def time(self, value):
-        if isinstance(value, time):
-            self._time = value
-        else:
-            raise AttributeError(f'Expected {time}, got {type(value)}')
 
-    @property
-    def date(self):
-        return self._date
-
-    @date.setter
-    def date(self, value):
-        if isinstance(value, date) or isinstance(value, type(None)):
-            self._date = value
-        else:
-            raise AttributeError(f'Expected {date} or {None}, got {type(value)}')
+    @time.setter
+    def time(self, value: _time):
+        if not isinstance(value, _time):
+            raise AttributeError(f'Expected {_time}, got {type(value)}')
+        self._time = value
+        self._adjust_alarm()
 
     @property
-    def alarm(self):
+    def alarm(self) -> _time:
         return self._alarm
 
     @alarm.setter
-    def alarm(self, value):
-        if isinstance(value, timedelta):
-            try:
-                combined = datetime.combine(datetime.today(), self.time)
-                self._alarm = (combined - value).time()
-            except Exception as e:
-                raise EventReminderTimeAdjustError(e)
-        else:
+    def alarm(self, value: timedelta):
+        if not isinstance(value, timedelta):
             raise AttributeError(f'Expected {timedelta}, got {type(value)}')
+        self._alarm_seconds = int(value.total_seconds())
+        self._adjust_alarm()
+
+    def _adjust_alarm(self) -> None:
+        try:
+            combined = datetime.combine(datetime.today(), self._time)
+            self._alarm = (combined - timedelta(seconds = self._alarm_seconds)).time()
+        except Exception as e:
+            raise EventReminderTimeAdjustError(e)
+
+    def to_dict(self) -> dict:
+        return {
+            'body': self._body,
+            'location': self._location,
+            'date': self.date.isoformat() if self.date else None,
+            'curriculum_event': self.curriculum_event,
+            'weekdays': [i.name for i in self.weekdays],
+            'time': self.time.isoformat(),
+            'alarm': self.alarm.isoformat()
+        }
 
     def to_json(self):
         return json.dumps(
-            self, default = lambda: self.__dict__,
-            sort_keys = True, ensure_ascii = False, 
-            indent = 4)
\ No newline at end of file
+            self.to_dict(), sort_keys = True, 
+            ensure_ascii = False, indent = 4)
+
+    def to_row(self) -> list:
+        """
+        Return the event as a compact list of plain values;
+        the date as an ordinal, the weekdays as a bit mask and
+        the time and alarm in seconds.
+        """
+        return [
+            self._body,
+            self._location,
+            self.date.toordinal() if self.date else 0,
+            int(self.curriculum_event),
+            sum(1 << i.value for i in self.weekdays),
+            self.time.hour * 3600 + self.time.minute * 60 + self.time.second,
+            self._alarm_seconds
+        ]
+
+    @classmethod
+    def from_row(cls, row: list):
+        """
+        Return an Event from a list made by to_row. The row
+        is trusted, so the validation in __init__ is skipped.
+        """
+        body, location, ordinal, curriculum_event, weekdays, seconds, alarm_seconds = row
+        event = cls.__new__(cls)
+        event._body = body
+        event._location = location
+        event.date = _date.fromordinal(ordinal) if ordinal else None
+        event.curriculum_event = bool(curriculum_event)
+        event.weekdays = list(_WEEKDAY_MASKS[weekdays])
+        event._time = _time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+        event._alarm_seconds = alarm_seconds
+        alarm = (seconds - alarm_seconds) % 86400
+        event._alarm = _time(alarm // 3600, alarm // 60 % 60, alarm % 60)
+        return event
+
+
+_WEEKDAY_MASKS = {
+    mask: [day for day in Weekdays if mask & 1 << day.value]
+    for mask in range(0, 1 << 8, 2)
+}
+
+
+def dumps(events: list) -> str:
+    """
+    Serialise a list of events to a compact json string,
+    one row of plain values per event.
+    """
+    return json.dumps([event.to_row() for event in events], 
+                      ensure_ascii = False, separators = (',', ':'))
+
+
+def loads(text: str) -> list:
+    """
+    Return the list of events serialised with dumps.
+    """
+    return [Event.from_row(row) for row in json.loads(text)]
@@ -1,12 +1,13 @@
 import discord
 import CommandIntegrator as ci
-import fake_useragent
 import coronafeatureclient as coronafeatureclient
+from clock import SYSTEM_CLOCK
 from CommandIntegrator.enumerators import CommandPronoun
-from CommandIntegrator.logger import logger
+from metrics import timed
+from triggers import Trigger, TriggerCommandParser
 
 
-class CoronaSpreadFeatureCommandParser(ci.FeatureCommandParserBase):
+class CoronaSpreadFeatureCommandParser(TriggerCommandParser):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -23,29 +24,29 @@ class CoronaSpreadFeature(ci.FeatureBase):
 
     def __init__(self, *args, **kwargs):
         
-        data_timestamp_1 = {'när': ('uppdaterad', 'uppdaterades', 'statistik', 'statistiken')}
-        data_timestamp_2 = {'hur': ('gammal', 'data', 'datan')}
+        data_timestamp_1 = Trigger('när', 'uppdaterad', 'uppdaterades', 'statistik', 'statistiken')
+        data_timestamp_2 = Trigger('hur', 'gammal', 'data', 'datan')
 
-        total_deaths = {'totalt': ('dött', 'omkommit', 'döda')}
-        total_recoveries = {'totalt': ('friska', 'tillfrisknat', 'återhämtat')}
-        total_cases = {'totalt': ('smittade', 'smittats', 'sjuka')}
+        total_deaths = Trigger('totalt', 'dött', 'omkommit', 'döda')
+        total_recoveries = Trigger('totalt', 'friska', 'tillfrisknat', 'återhämtat')
+        total_cases = Trigger('totalt', 'smittade', 'smittats', 'sjuka')
 
-        most_deaths = {'flest': ('döda', 'dödsfall', 'omkommit', 'omkomna', 'dött')}
-        most_recoveries = {'flest': ('friska', 'tillfrisknat')}
-        most_cases = {'flest': ('smittade', 'sjuka')}
+        most_deaths = Trigger('flest', 'döda', 'dödsfall', 'omkommit', 'omkomna', 'dött')
+        most_recoveries = Trigger('flest', 'friska', 'tillfrisknat')
+        most_cases = Trigger('flest', 'smittade', 'sjuka')
 
-        least_deaths = {'minst': ('döda', 'dödsfall', 'omkomna', 'omkommit', 'dött')}
-        least_recoveries = {'minst': ('friska', 'tillfrisknat', 'återhämtat')}
-        least_cases = {'minst': ('smittade', 'smittats', 'sjuka')}
+        least_deaths = Trigger('minst', 'döda', 'dödsfall', 'omkomna', 'omkommit', 'dött')
+        least_recoveries = Trigger('minst', 'friska', 'tillfrisknat', 'återhämtat')
+        least_cases = Trigger('minst', 'smittade', 'smittats', 'sjuka')
 
-        infections_by_query_1 = {'har': ('smittats', 'sjuka')}
-        infections_by_query_2 = {'är': ('smittade', 'sjuka')}
+        infections_by_query_1 = Trigger('har', 'smittats', 'sjuka')
+        infections_by_query_2 = Trigger('är', 'smittade', 'sjuka')
         
-        deaths_by_query_1 = {'hur': ('dött', 'omkommit', 'döda')}
-        deaths_by_query_2 = {'har': ('dött', 'omkommit', 'döda')}
+        deaths_by_query_1 = Trigger('hur', 'dött', 'omkommit', 'döda')
+        deaths_by_query_2 = Trigger('har', 'dött', 'omkommit', 'döda')
         
-        recoveries_by_query = {'har': ('friska', 'tillfrisknat')}
-        new_cases_by_query = {'hur': ('nya', 'nytt', 'fall')}    
+        recoveries_by_query = Trigger('har', 'friska', 'tillfrisknat')
+        new_cases_by_query = Trigger('hur', 'nya', 'nytt', 'fall')
 
         self.command_parser = CoronaSpreadFeatureCommandParser()
         self.command_parser.keywords = CoronaSpreadFeature.FEATURE_KEYWORDS
@@ -57,23 +58,23 @@ class CoronaSpreadFeature(ci.FeatureBase):
         )
         
         self.command_parser.callbacks = {
-            str(data_timestamp_1): lambda: self.interface.get_data_timestamp(),
-            str(data_timestamp_2): lambda: self.interface.get_data_timestamp(),
-            str(total_deaths): lambda: self.get_total_deaths(),
-            str(total_recoveries): lambda: self.get_total_recoveries(),
-            str(total_cases): lambda: self.get_total_infections(),
-            str(most_deaths): lambda: self.get_most_deaths(),
-            str(most_recoveries): lambda: self.get_most_recoveries(),
-            str(most_cases): lambda: self.get_most_infections(),
-            str(least_cases): lambda: self.get_least_infections(),
-            str(least_deaths): lambda: self.get_least_deaths(),
-            str(least_recoveries): lambda: self.get_least_recoveries(),
-            str(infections_by_query_1): self.get_cases_by_country,
-            str(infections_by_query_2): self.get_cases_by_country,
-            str(deaths_by_query_1): self.get_deaths_by_country,
-            str(deaths_by_query_2): self.get_deaths_by_country,
-            str(recoveries_by_query): self.get_recoveries_by_country,
-            str(new_cases_by_query): self.get_new_cases_by_country,
+            data_timestamp_1: lambda: self.interface.get_data_timestamp(),
+            data_timestamp_2: lambda: self.interface.get_data_timestamp(),
+            total_deaths: lambda: self.get_total_deaths(),
+            total_recoveries: lambda: self.get_total_recoveries(),
+            total_cases: lambda: self.get_total_infections(),
+            most_deaths: lambda: self.get_most_deaths(),
+            most_recoveries: lambda: self.get_most_recoveries(),
+            most_cases: lambda: self.get_most_infections(),
+            least_cases: lambda: self.get_least_infections(),
+            least_deaths: lambda: self.get_least_deaths(),
+            least_recoveries: lambda: self.get_least_recoveries(),
+            infections_by_query_1: self.get_cases_by_country,
+            infections_by_query_2: self.get_cases_by_country,
+            deaths_by_query_1: self.get_deaths_by_country,
+            deaths_by_query_2: self.get_deaths_by_country,
+            recoveries_by_query: self.get_recoveries_by_country,
+            new_cases_by_query: self.get_new_cases_by_country,
             'smittade': self.get_cases_by_country,
             'sjuka': self.get_cases_by_country,
             'dött': self.get_deaths_by_country,
@@ -82,11 +83,13 @@ class CoronaSpreadFeature(ci.FeatureBase):
             'tillfrisknat': self.get_recoveries_by_country,
             'tillfrisknade': self.get_recoveries_by_country
         }
+        self.command_parser.cached_methods = tuple(self.command_parser.callbacks.values())
 
         self.translation_file_path = kwargs['translation_file_path']
         self.mapped_pronouns = (CommandPronoun.INTERROGATIVE,)
 
-        api_handle = coronafeatureclient.ApiHandle(uri = kwargs['CORONA_API_URI'], standby_hours = 1)
+        api_handle = coronafeatureclient.ApiHandle(
+            uri = kwargs['CORONA_API_URI'], standby_hours = 1, clock = kwargs.get('clock', SYSTEM_CLOCK))
         api_handle.add_header('x-rapidapi-host', kwargs['CORONA_API_RAPIDAPI_HOST'])
         api_handle.add_header('x-rapidapi-key', kwargs['CORONA_API_RAPIDAPI_KEY'])
 
@@ -95,56 +98,69 @@ class CoronaSpreadFeature(ci.FeatureBase):
             interface = coronafeatureclient.Client(api_handle, self.translation_file_path)
         )
 
-    @logger
+        self.watch = coronafeatureclient.CoronaWatch(
+            self.interface, kwargs.get('watched_countries', {}))
+
+    @ci.scheduledmethod
+    @timed
+    def get_watch_update(self) -> str:
+        """
+        Return one message with the changes in the watched
+        countries since the last call, or None if nothing
+        changed. Meant to be scheduled.
+        """
+        return self.watch.poll()
+
     @ci.scheduledmethod
+    @timed
     def get_total_deaths(self):
         response = self.interface.get_total_deaths()
         return f'Totalt har {response} omkommit globalt'
     
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_total_recoveries(self):
         response = self.interface.get_total_recoveries()
         return f'Totalt har {response} tillfrisknat globalt'
     
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_total_infections(self):
         response = self.interface.get_total_infections()
         return f'Totalt har {response} insjuknat globalt'
     
-    @logger
+    @timed
     def get_most_deaths(self):
         response = self.interface.get_deaths()
         return f'Flest har omkommit i {response}'
     
-    @logger
+    @timed
     def get_most_recoveries(self):
         response = self.interface.get_recoveries()
         return f'Flest har tillfrisknat i {response}'
     
-    @logger
+    @timed
     def get_most_infections(self):
         response = self.interface.get_infections()
         return f'Flest har smittats i {response}'
     
-    @logger
+    @timed
     def get_least_infections(self):
         response = self.interface.get_infections(sort_by_highest = False)
         return f'Minst antal insjuknade har {response}'
     
-    @logger
+    @timed
     def get_least_deaths(self):
         response = self.interface.get_deaths(sort_by_highest = False)
         return f'Minst antal dödsfall har {response}'
    
-    @logger
+    @timed
     def get_least_recoveries(self):
         response = self.interface.get_recoveries(sort_by_highest = False)
         return f'Minst tillfrisknade: {response}'
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_new_cases_by_country(self, message: discord.Message) -> str:
         """
         Get new cases by country. New cases are defined by API.
@@ -154,20 +170,20 @@ class CoronaSpreadFeature(ci.FeatureBase):
             str
         """
         try:
-            country = message.content[-1].strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-            response = self.interface.get_by_query(query = 'new_cases', country_name = country)
+            english, swedish = self.interface.resolve_country(message.content)
+            response = self.interface.get_by_country(query = 'new_cases', country = english)
             
             if int(response.replace(',','').strip()) > 1: 
                 new = 'nya'
             else:
                 new = 'nytt'
 
-            return f' {response} {new} fall av corona i {country.capitalize()}'
-        except Exception as e:
+            return f' {response} {new} fall av corona i {swedish.title()}'
+        except (KeyError, TypeError, IndexError, ValueError):
             pass
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_cases_by_country(self, message: discord.Message) -> str:
         """
         Get cases by country.
@@ -177,19 +193,15 @@ class CoronaSpreadFeature(ci.FeatureBase):
             str
         """
         try:
-            country = message.content[-1].strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-            response = self.interface.get_by_query(query = 'cases', country_name = country)
-        except:
-            try:
-                country = str().join(message.content).strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-                response = self.interface.get_by_query(query = 'cases', country_name = country)
-            except:
-                return
+            english, swedish = self.interface.resolve_country(message.content)
+            response = self.interface.get_by_country(query = 'cases', country = english)
+        except (KeyError, TypeError, IndexError):
+            return
         else:
-            return f'Totalt {response} har smittats av corona i {country.capitalize()}'
+            return f'Totalt {response} har smittats av corona i {swedish.title()}'
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_recoveries_by_country(self, message: discord.Message) -> str:
         """
         Get recoveries by country.
@@ -199,19 +211,15 @@ class CoronaSpreadFeature(ci.FeatureBase):
             str
         """
         try:
-            country = message.content[-1].strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-            response = self.interface.get_by_query(query = 'total_recovered', country_name = country)
-        except:
-            try:
-                country = str().join(message.content).strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-                response = self.interface.get_by_query(query = 'total_recovered', country_name = country)
-            except:
-                return
+            english, swedish = self.interface.resolve_country(message.content)
+            response = self.interface.get_by_country(query = 'total_recovered', country = english)
+        except (KeyError, TypeError, IndexError):
+            return
         else:
-            return f'Totalt {response} har tillfrisknat i corona i {country.capitalize()}'
+            return f'Totalt {response} har tillfrisknat i corona i {swedish.title()}'
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_deaths_by_country(self, message: discord.Message) -> str:
         """
         Get deaths by country.
@@ -221,13 +229,9 @@ class CoronaSpreadFeature(ci.FeatureBase):
             str
         """
         try:
-            country = message.content[-1].strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-            response = self.interface.get_by_query(query = 'deaths', country_name = country)
-        except:
-            try:
-                country = str().join(message.content).strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
-                response = self.interface.get_by_query(query = 'deaths', country_name = country)
-            except:
-                return
+            english, swedish = self.interface.resolve_country(message.content)
+            response = self.interface.get_by_country(query = 'deaths', country = english)
+        except (KeyError, TypeError, IndexError):
+            return
         else:
-            return f'Totalt {response} har omkommit i corona i {country.capitalize()}'
\ No newline at end of file
+            return f'Totalt {response} har omkommit i corona i {swedish.title()}'
\ No newline at end of file
@@ -1,15 +1,37 @@
 import discord
 import CommandIntegrator as ci
 import os
+import threading
 from CommandIntegrator.enumerators import CommandPronoun
-from CommandIntegrator.logger import logger
+from concurrency import synchronized
+from metrics import timed
+from triggers import Trigger, TriggerCommandParser
 from queue import Queue
 
-class HelpQueueFeatureCommandParser(ci.FeatureCommandParserBase):
+class HelpQueueFeatureCommandParser(TriggerCommandParser):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+
+class HelpQueue:
+    """
+    Represent one help queue, bound to a single channel
+    in the guild. Every queue carries its own teacher role,
+    which is the role allowed to dequeue members from it
+    and the role that is notified when it goes active.
+    """
+
+    def __init__(self, channel_name: str, teacher_role: str, guild_id = None):
+        self.channel_name = channel_name
+        self.guild_id = guild_id
+        self.teacher_role = teacher_role
+        self.members = Queue()
+
+    def __len__(self):
+        return self.members.qsize()
+
+
 class HelpQueueFeature(ci.FeatureBase):
 
     FEATURE_KEYWORDS = (
@@ -20,23 +42,34 @@ class HelpQueueFeature(ci.FeatureBase):
         'redovisa'
     )
 
-    QUEUE_STATES = {}
+    DEFAULT_TEACHER_ROLE = 'teacher'
 
     def __init__(self, *args, **kwargs):
-        self.help_queue = Queue()
+        """
+        :param teacher_roles:
+            dict, optional. Maps tuples of guild id and channel
+            id to the name of the role that teaches the course in
+            that channel. Channel names are not unique across
+            guilds, or even within one, so they are not used.
+            Channels not present here use DEFAULT_TEACHER_ROLE.
+        """
+        self.help_queues = {}
+        self.teacher_roles = kwargs.get('teacher_roles', {})
+        self._activated_queues = {}
+        self._lock = threading.Lock()
         self.command_parser = HelpQueueFeatureCommandParser()
         self.command_parser.keywords = HelpQueueFeature.FEATURE_KEYWORDS
-        
+
         self.mapped_pronouns = (
             CommandPronoun.INTERROGATIVE,
             CommandPronoun.UNIDENTIFIED
         )
-        
+
         self.command_parser.callbacks = {
-            str({'visa': ('kö', 'kön', 'hjälp')}): lambda: self.list_help_queue(),
-            str({'hjälp': ('mig',)}): self.enqueue,
-            str({'help': ('mig', 'me')}): self.enqueue,
-            str({'hjälp': ('nästa', 'next')}): self.dequeue,
+            Trigger('visa', 'kö', 'kön', 'hjälp'): self.list_help_queue,
+            Trigger('hjälp', 'mig'): self.enqueue,
+            Trigger('help', 'mig', 'me'): self.enqueue,
+            Trigger('hjälp', 'nästa', 'next'): self.dequeue,
             'hjälp': self.enqueue,
             'redovisa': self.enqueue
         }
@@ -44,16 +77,39 @@ class HelpQueueFeature(ci.FeatureBase):
         self.command_parser.interactive_methods = (
             self.enqueue,
             self.dequeue,
+            self.list_help_queue
         )
 
         super().__init__(
             command_parser = self.command_parser
         )
 
-    @logger
+    def get_queue(self, channel) -> HelpQueue:
+        """
+        Return the help queue for the given channel. Queues
+        are created the first time a channel is used, with
+        the teacher role configured for that channel.
+
+        :param channel:
+            discord.TextChannel, the channel the queue is bound to
+        :returns:
+            HelpQueue
+        """
+        try:
+            return self.help_queues[channel.id]
+        except KeyError:
+            teacher_role = self.teacher_roles.get(
+                (channel.guild.id, channel.id), HelpQueueFeature.DEFAULT_TEACHER_ROLE)
+            help_queue = HelpQueue(channel.name, teacher_role, channel.guild.id)
+            self.help_queues[channel.id] = help_queue
+            return help_queue
+
+    @timed
+    @synchronized
     def enqueue(self, message: discord.Message) -> str:
         """
-        This method enqueues a user in the help queue.
+        This method enqueues a user in the help queue
+        for the channel the message was written in.
         It will also respond with the position in the
         queue for the newly enqueued user.
 
@@ -63,74 +119,88 @@ class HelpQueueFeature(ci.FeatureBase):
         :returns:
             str, message with queue position
         """
-        for n, i in enumerate(self.help_queue.queue):
-            if i == message.author: 
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+
+        help_queue = self.get_queue(message.channel)
+        for n, i in enumerate(help_queue.members.queue):
+            if i == message.author:
                 return f'{message.author.mention} du står redan i kön på plats {n + 1}'
-        self.help_queue.put(message.author)
-        return f'{message.author.mention} skrevs upp. Du har plats {self.help_queue.qsize()}'
-        
-    @logger
+
+        help_queue.members.put(message.author)
+        if len(help_queue) == 1:
+            self._activated_queues[message.channel.id] = help_queue
+        return f'{message.author.mention} skrevs upp. Du har plats {len(help_queue)}'
+
+    @timed
+    @synchronized
     def dequeue(self, message: discord.Message) -> str:
         """
         This method dequeues the next user in line
-        for recieving help from the teacher. 
-        Dequeing is limited to members with the 
-        "teacher" role only, this is checked first before
-        dequeueing.
+        for recieving help from the teacher.
+        Dequeing is limited to members with the
+        teacher role of the queue in the channel,
+        this is checked first before dequeueing.
         :param message:
             discord.Message, the whole message object
             from the chat application
         """
-        if not self.help_queue.qsize():
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+
+        help_queue = self.get_queue(message.channel)
+        if not len(help_queue):
             return 'Hjälplistan är tom'
 
-        try:
-            if len([i for i in message.author.roles if i.name == 'teacher']):
-                return f'Näst på kö är {self.help_queue.get().mention}'
-        except AttributeError:
-            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+        if len([i for i in message.author.roles if i.name == help_queue.teacher_role]):
+            return f'Näst på kö är {help_queue.members.get().mention}'
         return f'{message.author.mention}, du saknar behörighet för detta'
 
-    @logger
-    def list_help_queue(self) -> str:
+    @timed
+    @synchronized
+    def list_help_queue(self, message: discord.Message) -> str:
         """
-        Returns a concatenated string with all the members in 
-        help queue, with their place in the queue as leading digit.
+        Returns a concatenated string with all the members in
+        the help queue for the channel, with their place in
+        the queue as leading digit.
         """
         output = []
-        if not self.help_queue.queue:
+        if message.guild is None or message.channel.id not in self.help_queues:
+            return 'Hjälplistan är tom'
+
+        help_queue = self.help_queues[message.channel.id]
+        if not help_queue.members.queue:
             return 'Hjälplistan är tom'
-        for place, member in enumerate(self.help_queue.queue):
+        for place, member in enumerate(help_queue.members.queue):
             output.append(f"‧ {place + 1}: `{member.name.strip('@')}`")
         return f'{os.linesep.join(output)}'
 
-    @staticmethod
-    def queue_went_active(queue) -> bool:
-        """
-        This method works as help_queue_went_active but for
-        the demonstration queue.
+    @synchronized
+    def get_notifications_if_helpqueue_changed(self) -> dict:
         """
-        if not queue in HelpQueueFeature.QUEUE_STATES:
-            HelpQueueFeature.QUEUE_STATES[queue] = queue.qsize()
-            changed = False
-        elif HelpQueueFeature.QUEUE_STATES[queue] == 0 and queue.qsize() > 0:
-            changed = True
-        else:
-            changed = False
-
-        HelpQueueFeature.QUEUE_STATES[queue] = queue.qsize()
-        return changed
-
-    def get_notification_if_helpqueue_changed(self):
-        """
-        This method returns a phrase if the queue size went
+        This method returns phrases for the queues that went
         from 0 to 1 in size since last call. It can be
-        used to call it continuously and get the phrase back
-        only when the queue has been emptied but then reactivated 
-        by someone signing up for help.
+        used to call it continuously and get the phrases back
+        only when a queue has been emptied but then reactivated
+        by someone signing up for help. The phrases are grouped
+        by guild, so that teachers are only notified of the
+        queues in their own guild.
         :returns:
-            str
+            dict, the guild id as key and a dict with the
+            teacher role to notify as key and the phrase to
+            send as value. None if nothing changed.
         """
-        if HelpQueueFeature.queue_went_active(self.help_queue):
-            return ':warning: Hjälplistan är aktiv'
-        return None
\ No newline at end of file
+        if not self._activated_queues:
+            return None
+
+        notifications = {}
+        activated, self._activated_queues = self._activated_queues, {}
+
+        for help_queue in activated.values():
+            phrase = f':warning: Hjälplistan i #{help_queue.channel_name} är aktiv'
+            roles = notifications.setdefault(help_queue.guild_id, {})
+            if help_queue.teacher_role in roles:
+                roles[help_queue.teacher_role] += f'{os.linesep}{phrase}'
+            else:
+                roles[help_queue.teacher_role] = phrase
+        return notifications
@@ -2,12 +2,15 @@ import os
 import discord
 import CommandIntegrator as ci
 from CommandIntegrator.enumerators import CommandPronoun
-from CommandIntegrator.logger import logger
+from metrics import timed
+from triggers import TriggerCommandParser
 from scraper import Scraper
+from clock import SYSTEM_CLOCK
+from custom_errs import UpstreamUnavailable
 from datetime import datetime, timedelta
 
 
-class LunchMenuFeatureCommandParser(ci.FeatureCommandParserBase):
+class LunchMenuFeatureCommandParser(TriggerCommandParser):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -22,34 +25,41 @@ class LunchMenuFeature(ci.FeatureBase):
     )
 
     def __init__(self, **kwargs):
-        
+        """
+        :param url:
+            str, the website of the lunch restaurant
+        :param clock:
+            optional, the clock to read the date from
+        """
+        self.clock = kwargs.get('clock', SYSTEM_CLOCK)
         self.command_parser = LunchMenuFeatureCommandParser()
         self.command_parser.keywords = LunchMenuFeature.FEATURE_KEYWORDS
         self.command_parser.callbacks = {
-            'igår': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() - timedelta(days = 1), when = 'igår'),
-            'idag': lambda: self.menu_for_weekday_phrase(weekday = datetime.now(), when = 'idag'),
-            'imorn': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 1), when = 'imorgon'),
-            'imorgon': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 1), when = 'imorgon'),
-            'imorron': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 1), when = 'imorgon'),
-            'imorrn': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 1), when = 'imorgon'),
-            'övermorgon': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 2), when = 'i övermorgon'),
-            'övermorn': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 2), when = 'i övermorgon'),
-            'övermorrn': lambda: self.menu_for_weekday_phrase(weekday = datetime.now() + timedelta(days = 2), when = 'i övermorgon'),
+            'igår': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() - timedelta(days = 1), when = 'igår'),
+            'idag': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now(), when = 'idag'),
+            'imorn': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 1), when = 'imorgon'),
+            'imorgon': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 1), when = 'imorgon'),
+            'imorron': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 1), when = 'imorgon'),
+            'imorrn': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 1), when = 'imorgon'),
+            'övermorgon': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 2), when = 'i övermorgon'),
+            'övermorn': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 2), when = 'i övermorgon'),
+            'övermorrn': lambda: self.menu_for_weekday_phrase(weekday = self.clock.now() + timedelta(days = 2), when = 'i övermorgon'),
             'vecka': lambda: self.menu_for_week(),
             'veckan': lambda: self.menu_for_week(),
             'veckans': lambda: self.menu_for_week()
         }
+        self.command_parser.cached_methods = tuple(self.command_parser.callbacks.values())
 
         self.mapped_pronouns = (
             CommandPronoun.INTERROGATIVE,
         )        
 
         super().__init__(
-            interface = Scraper(url = kwargs['url']),
+            interface = Scraper(url = kwargs['url'], clock = self.clock),
             command_parser = self.command_parser
         )
 
-    @logger
+    @timed
     def menu_for_week(self) -> str:
         """
         Return the entire week's menu with one empty line
@@ -57,22 +67,20 @@ class LunchMenuFeature(ci.FeatureBase):
         """
         days = ('**Måndag**', '**Tisdag**', '**Onsdag**', '**Torsdag**', '**Fredag**')
         menu_for_week = self.interface.get_menu_for_week()
+        if isinstance(menu_for_week, UpstreamUnavailable):
+            return str(menu_for_week)
         if isinstance(menu_for_week, Exception):
             return f'Jag set inget på menyn för denna vecka'
         output = str()
         
         for index, day in enumerate(menu_for_week):
-            day.insert(0, days[index])
             if not len(day):
-                day.append('Meny inte tillgänglig.')
-            day.append(os.linesep)
-        
-        for day in menu_for_week:
-            output += os.linesep.join(day)
+                day = ['Meny inte tillgänglig.']
+            output += os.linesep.join([days[index], *day, os.linesep])
 
         return f'Här är veckans meny :slight_smile:{os.linesep}{os.linesep}{output}'
     
-    @logger
+    @timed
     def menu_for_weekday_phrase(self, weekday: datetime, when: str) -> str:
         """
         Return a user-friendly variant of the content
@@ -88,7 +96,7 @@ class LunchMenuFeature(ci.FeatureBase):
         :returns:
             string
         """
-        if self.interface.cache and (datetime.now().date() - self.interface.cache.creation_date).days >= 5:
+        if self.interface.cache and (self.clock.today() - self.interface.cache.creation_date).days >= 5:
             self.interface.purge_cache()
 
         if when == 'igår':
@@ -97,6 +105,8 @@ class LunchMenuFeature(ci.FeatureBase):
             tense = 'as'
 
         menu = self.interface.get_menu_for_weekday(weekday.weekday())
+        if isinstance(menu, UpstreamUnavailable):
+            return str(menu)
         if isinstance(menu, Exception):
             return f'Jag ser inget på menyn för {when}'
         return f'Detta server{tense} {when}!{os.linesep}{os.linesep}{os.linesep.join(menu)}'
\ No newline at end of file
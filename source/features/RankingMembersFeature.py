@@ -1,15 +1,33 @@
 import discord
 import os
-import json
+import threading
 import CommandIntegrator as ci
 from CommandIntegrator.enumerators import CommandPronoun
-from CommandIntegrator.logger import logger
+from concurrency import synchronized
+from metrics import timed
+from triggers import Trigger, TriggerCommandParser
+from leaderboard import Leaderboard
+from math import ceil
+from rankstore import RankStore
+from ratelimit import RateLimiter
 
-class RankingMembersFeatureCommandParser(ci.FeatureCommandParserBase):
+class RankingMembersFeatureCommandParser(TriggerCommandParser):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+class GuildRanks:
+    """
+    The ranks of the members in one guild, with the
+    leaderboard ordering them.
+    """
+
+    def __init__(self, guild: str, rank_data: dict):
+        self.guild = guild
+        self.rank_data = rank_data
+        self.leaderboard = Leaderboard(rank_data['userid_rank'])
+
+
 class RankingMembersFeature(ci.FeatureBase):
 
     FEATURE_KEYWORDS = (
@@ -17,22 +35,32 @@ class RankingMembersFeature(ci.FeatureBase):
         'ranks'
     )
 
+    PAGE_SIZE = 20
+    RANK_CHANGE_RATE = 0.2
+    RANK_CHANGE_BURST = 5
+
     def __init__(self, *args, **kwargs):
-    
-        rank_for_all = {'rank': ('alla', 'all')}
-        rank_up = {'rank': ('upp', 'up')}
-        rank_down = {'rank': ('ner', 'ned', 'down')}
-        rank_opt_out = {'hoppa': ('ur', 'ut', 'out')}
-        rank_opt_in = {'hoppa': ('in',)}
+        """
+        :param database_path:
+            str, optional. The SQLite database of ranks
+        :param legacy_guild:
+            str, optional. The name of the guild that owns the
+            ranks stored before ranks were kept per guild
+        """
+        rank_for_all = Trigger('rank', 'alla', 'all')
+        rank_up = Trigger('rank', 'upp', 'up')
+        rank_down = Trigger('rank', 'ner', 'ned', 'down')
+        rank_opt_out = Trigger('hoppa', 'ur', 'ut', 'out')
+        rank_opt_in = Trigger('hoppa', 'in')
         
         self.command_parser = RankingMembersFeatureCommandParser()
         self.command_parser.keywords = RankingMembersFeature.FEATURE_KEYWORDS
         self.command_parser.callbacks  = {
-            str(rank_up): self.rank_up,
-            str(rank_down): self.rank_down,
-            str(rank_for_all): lambda: self.rank_for_all(),
-            str(rank_opt_out): self.opt_out,
-            str(rank_opt_in): self.opt_in,
+            rank_up: self.rank_up,
+            rank_down: self.rank_down,
+            rank_for_all: self.rank_for_all,
+            rank_opt_out: self.opt_out,
+            rank_opt_in: self.opt_in,
             'för': self.rank_for_member,
             'for': self.rank_for_member
         }
@@ -41,157 +69,204 @@ class RankingMembersFeature(ci.FeatureBase):
             self.rank_up,
             self.rank_down,
             self.rank_for_member,
+            self.rank_for_all,
             self.opt_in,
             self.opt_out
         )
 
-        self.rank_data = dict()
-        self.rank_data['userid_rank'] = dict()
-        self.rank_data['opted_out_members'] = list()
+        self._lock = threading.Lock()
+        self.store = RankStore(kwargs.get('database_path', 'ranking_data.db'))
+        self.legacy_guild = kwargs.get('legacy_guild')
+        self.guilds = {}
+        self.rate_limiter = RateLimiter(
+            rate = RankingMembersFeature.RANK_CHANGE_RATE,
+            capacity = RankingMembersFeature.RANK_CHANGE_BURST)
         self.mapped_pronouns = (CommandPronoun.UNIDENTIFIED,)
         super().__init__(command_parser = self.command_parser)
-        self._read_from_file()
-
 
-    @logger
-    def _read_from_file(self) -> None:
+    def get_ranks(self, guild) -> GuildRanks:
         """
-        Read ranks from file. If not present, an 
-        empty file will be created. If file is 
-        empty, the empty structure is written.
+        Return the ranks for the given guild. They are loaded
+        from the store the first time the guild is used.
+
+        :param guild:
+            discord.Guild
+        :returns:
+            GuildRanks
         """
         try:
-            with open('ranking_data.json', 'r') as f:
-                self.rank_data = json.loads(f.read())
-        except Exception:
-            pass
-            
-    @logger
-    def _write_to_file(self, obj) -> None:
+            return self.guilds[guild.id]
+        except KeyError:
+            if self.legacy_guild and guild.name == self.legacy_guild:
+                self.store.claim(str(guild.id))
+            ranks = GuildRanks(str(guild.id), self.store.load(str(guild.id)))
+            self.guilds[guild.id] = ranks
+            return ranks
+
+    def rankable_members(self, message: discord.Message, ranks: GuildRanks) -> tuple:
         """
-        Write structure in parameter to file.
-        :param obj:
-            structure to serialize and write to file
+        Return the members mentioned in the message whose rank
+        a rank command changes, up to the first member who has
+        opted out, and whether there was one. Members can not
+        change their own rank.
+
         :returns:
-            None
+            tuple with a list of discord.Member and a bool
         """
-        with open('ranking_data.json', 'w') as f:
-            json.dump(obj, f)
+        members = []
+        for member in message.mentions:
+            if message.author == member:
+                continue
+            if member.mention in ranks.rank_data['opted_out_members']:
+                return members, True
+            members.append(member)
+        return members, False
 
-    @logger
-    def rank_up(self, message: discord.Message) -> str:
+    def change_ranks(self, message: discord.Message, change: int, symbol: str, verb: str) -> str:
         """
-        Rank up a user upon command
+        Change the rank of the members mentioned in the message.
+        A token of the author is consumed only when a rank is 
+        about to change, so commands mentioning no one, only the 
+        author or only members who opted out are free.
         """
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+        ranks = self.get_ranks(message.guild)
+        members, opted_out = self.rankable_members(message, ranks)
+        if members and not self.rate_limiter.consume(message.author.id):
+            return f'{message.author.mention}, vänta en stund innan du rankar igen'
+
         output = []
-        for member in message.mentions:
+        for member in members:
+            mention_id = member.mention
             try:
-                mention_id = member.mention
-                if message.author == member:
-                    continue
-                elif mention_id in self.rank_data['opted_out_members']:
-                    return 'Denna medlem har valt att gå ur ranking funktionen'
-                self.rank_data['userid_rank'][member.mention] += 1
+                ranks.rank_data['userid_rank'][mention_id] += change
             except KeyError:
-                self.rank_data['userid_rank'][member.mention] = 1
-            _new_rank = self.rank_data['userid_rank'][mention_id]
-            _out_str = f':small_red_triangle: {member.mention} ökade till {_new_rank}'
-            output.append(_out_str)
+                ranks.rank_data['userid_rank'][mention_id] = change
+            _new_rank = ranks.rank_data['userid_rank'][mention_id]
+            self.store.set_rank(mention_id, _new_rank, guild = ranks.guild)
+            ranks.leaderboard.update(mention_id, _new_rank)
+            output.append(f'{symbol} {member.mention} {verb} {_new_rank}')
+
+        if opted_out:
+            return 'Denna medlem har valt att gå ur ranking funktionen'
         if len(output):
             return f'{os.linesep.join(output)}'
 
-    @logger
+    @timed
+    @synchronized
+    def rank_up(self, message: discord.Message) -> str:
+        """
+        Rank up a user upon command. Members can only change
+        ranks a few times in a row before they have to wait.
+        """
+        return self.change_ranks(message, 1, ':small_red_triangle:', 'ökade till')
+
+    @timed
+    @synchronized
     def rank_down(self, message: discord.Message) -> str:
         """
-        Rank down a user upon command
+        Rank down a user upon command. Members can only change
+        ranks a few times in a row before they have to wait.
         """
-        output = []
-        for member in message.mentions:
-            mention_id = member.mention
-            try:
-                if message.author == member:
-                    continue
-                elif mention_id in self.rank_data['opted_out_members']:
-                    return 'Denna medlem har valt att gå ur ranking funktionen'
-                self.rank_data['userid_rank'][mention_id] -= 1
-            except KeyError:
-                self.rank_data['userid_rank'][mention_id] = -1
-            _new_rank = self.rank_data['userid_rank'][mention_id]
-            _out_str = f':small_red_triangle_down: {member.mention} minskade till {_new_rank}'
-            output.append(_out_str)
-        if len(output):
-            return f'{os.linesep.join(output)}'
+        return self.change_ranks(message, -1, ':small_red_triangle_down:', 'minskade till')
 
-    @logger
+    @timed
+    @synchronized
     def rank_for_member(self, message: discord.Message) -> str:
         """
         Return the current rank for a member
         """
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+        ranks = self.get_ranks(message.guild)
         output = []
         for member in message.mentions:
             mention_id = member.mention
             try:
-                rank = self.rank_data['userid_rank'][mention_id]
-                output.append(f'{mention_id} rankar {rank}')
+                rank = ranks.rank_data['userid_rank'][mention_id]
+                place = ranks.leaderboard.position(mention_id)
+                output.append(f'{mention_id} rankar {rank}, plats {place} av {len(ranks.leaderboard)}')
             except KeyError:
                 output.append(f'{mention_id} har inte rankats')
         return f'{os.linesep.join(output)}'
 
-    @logger
-    def rank_for_all(self) -> str:
+    @timed
+    @synchronized
+    def rank_for_all(self, message: discord.Message) -> str:
         """
-        Return ranks for all members in a list. The highscore
-        are the top three, and they are displayed with different
-        emojis from the others, as well as surrounded in a pattern
-        of diamonds.
+        Return ranks for members in a list, one page at a time.
+        The page is given as a number at the end of the message, 
+        as in 'rank alla 2', and defaults to the first page. 
+        The highscore are the top three, and they are displayed 
+        with different emojis from the others, as well as 
+        surrounded in a pattern of diamonds.
         """
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+        ranks = self.get_ranks(message.guild)
         output = []
-        inserted_separator = False
+        page = 1
         emojis = {1: ':first_place:', 2: ':second_place:', 3: ':third_place:'}
-        ranks = self.rank_data['userid_rank']
-        sorted_by_rank = sorted(ranks, key = lambda i: ranks[i], reverse = True)
-        
-        if len(ranks) < 4:
-            for place, member in enumerate(sorted_by_rank):
-                output.append(f':star: **{member}**:    **{ranks[member]}**')
-        else:
-            for place, member in enumerate(sorted_by_rank):
-                if place == 0:
-                    output.append('** H  I  G  H          S  C  O  R  E **')  
-                    output.append(':small_orange_diamond:' * 8)
-                if (place + 1) < 4:
-                    place_emoji = emojis[place + 1]
-                else:
-                    if not inserted_separator:
-                        output.append(':small_orange_diamond:' * 8)
-                        output.append(os.linesep)
-                        inserted_separator = True
-                    place_emoji = ':star:'
-                output.append(f'{place_emoji} **{member}**:    **{ranks[member]}**')
-
-        self._write_to_file(self.rank_data)
+        highscore = len(ranks.leaderboard) >= 4
+        pages = max(1, ceil(len(ranks.leaderboard) / RankingMembersFeature.PAGE_SIZE))
+
+        for word in reversed(message.content):
+            word = word.strip(ci.FeatureCommandParserBase.IGNORED_CHARS)
+            if word.isdigit():
+                page = min(max(int(word), 1), pages)
+                break
+
+        start = (page - 1) * RankingMembersFeature.PAGE_SIZE
+        ranked = ranks.leaderboard.top(RankingMembersFeature.PAGE_SIZE, start)
+
+        for place, (member, rank) in enumerate(ranked, start + 1):
+            if highscore and place == 1:
+                output.append('** H  I  G  H          S  C  O  R  E **')  
+                output.append(':small_orange_diamond:' * 8)
+            elif highscore and place == 4:
+                output.append(':small_orange_diamond:' * 8)
+                output.append(os.linesep)
+
+            if highscore and place < 4:
+                place_emoji = emojis[place]
+            else:
+                place_emoji = ':star:'
+            output.append(f'{place_emoji} **{member}**:    **{rank}**')
+
+        if pages > 1:
+            output.append(f'Sida {page} av {pages}')
         return f'{os.linesep.join(output)}'
 
-    @logger
+    @timed
+    @synchronized
     def opt_out(self, message: discord.Message) -> str:
         """
         Disable the ranking feature for whoever wrote the
         opt out command (message author)
         """
-        self.rank_data['opted_out_members'].append(message.author.mention)
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+        ranks = self.get_ranks(message.guild)
+        ranks.rank_data['opted_out_members'].add(message.author.mention)
         try:
-            self.rank_data['userid_rank'].pop(message.author.mention)
+            ranks.rank_data['userid_rank'].pop(message.author.mention)
         except:
             pass
-        self._write_to_file(self.rank_data)
+        ranks.leaderboard.remove(message.author.mention)
+        self.store.opt_out(message.author.mention, guild = ranks.guild)
         return f'Ranking för {message.author.mention} har spärrats'
 
-    @logger
+    @timed
+    @synchronized
     def opt_in(self, message: discord.Message) -> str:
         """
         Re-enable the ranking feature for whoever wrote the
         opt out command (message author)
         """
-        self.rank_data['opted_out_members'].remove(message.author.mention)
-        self._write_to_file(self.rank_data)
+        if message.guild is None:
+            return f'Du kan bara använda detta kommando i en av kanalerna, inte i PM'
+        ranks = self.get_ranks(message.guild)
+        ranks.rank_data['opted_out_members'].discard(message.author.mention)
+        self.store.opt_in(message.author.mention, guild = ranks.guild)
         return f'Ranking för {message.author.mention} har återaktiverats'
\ No newline at end of file
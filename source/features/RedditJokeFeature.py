@@ -1,12 +1,12 @@
 import discord
-import praw
 import CommandIntegrator as ci
 from CommandIntegrator.enumerators import CommandPronoun
-from CommandIntegrator.logger import logger
-from redditjoke import RedditJoke
+from metrics import timed
+from triggers import TriggerCommandParser
+from redditjoke import AsyncRedditJoke, RedditJoke
 
 
-class RedditJokeFeatureCommandParser(ci.FeatureCommandParserBase):
+class RedditJokeFeatureCommandParser(TriggerCommandParser):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -22,6 +22,15 @@ class RedditJokeFeature(ci.FeatureBase):
     )
 
     def __init__(self, *args, **kwargs):
+        """
+        :param backend:
+            str, optional. 'praw' to fetch jokes with praw in
+            the worker threads, or 'aiohttp' to fetch them in
+            the event loop, in which case get_random_joke 
+            returns a coroutine for the client to await.
+            The other kwargs are the reddit credentials.
+        """
+        backend = kwargs.pop('backend', 'praw')
         self.command_parser = RedditJokeFeatureCommandParser()
         self.command_parser.keywords = RedditJokeFeature.FEATURE_KEYWORDS
         self.command_parser.callbacks = {
@@ -38,12 +47,18 @@ class RedditJokeFeature(ci.FeatureBase):
             CommandPronoun.INTERROGATIVE,
         )
 
+        if backend == 'aiohttp':
+            interface = AsyncRedditJoke(**kwargs)
+        else:
+            import praw
+            interface = RedditJoke(reddit_client = praw.Reddit(**kwargs))
+
         super().__init__(
             command_parser = self.command_parser,
-            interface = RedditJoke(reddit_client = praw.Reddit(**kwargs))
+            interface = interface
         )
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_random_joke(self) -> str:
         return self.interface.get()
\ No newline at end of file
@@ -2,10 +2,10 @@ import discord
 import CommandIntegrator as ci
 from CommandIntegrator.enumerators import CommandPronoun
 from timeeditschedule import Schedule
-from CommandIntegrator.logger import logger
-from datetime import datetime
+from metrics import timed
+from triggers import TriggerCommandParser
 
-class ScheduleFeatureCommandParser(ci.FeatureCommandParserBase):
+class ScheduleFeatureCommandParser(TriggerCommandParser):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -23,16 +23,21 @@ class ScheduleFeature(ci.FeatureBase):
     def __init__(self, *args, **kwargs):
         self.command_parser = ScheduleFeatureCommandParser()
         self.command_parser.keywords = ScheduleFeature.FEATURE_KEYWORDS
+        next_lesson = lambda: self.get_next_lesson()
+        todays_lessons = lambda: self.get_todays_lessons()
+        curriculum = lambda: self.get_curriculum()
+
         self.command_parser.callbacks = {
-            'nästa': lambda: self.get_next_lesson(),
-            'klassrum': lambda: self.get_next_lesson(),
-            'idag': lambda: self.get_todays_lessons(),
-            'imorgon': lambda: self.get_curriculum(),
-            'imorn': lambda: self.get_curriculum(),
-            'imorrn': lambda: self.get_curriculum(),
-            'schema': lambda: self.get_curriculum(),
-            'schemat': lambda: self.get_curriculum() 
+            'nästa': next_lesson,
+            'klassrum': next_lesson,
+            'idag': todays_lessons,
+            'imorgon': curriculum,
+            'imorn': curriculum,
+            'imorrn': curriculum,
+            'schema': curriculum,
+            'schemat': curriculum 
         }
+        self.command_parser.cached_methods = (todays_lessons, curriculum)
 
         self.mapped_pronouns = (
             CommandPronoun.INTERROGATIVE,
@@ -43,15 +48,13 @@ class ScheduleFeature(ci.FeatureBase):
             interface = Schedule(**kwargs)
         )
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_curriculum(self, return_if_none = True) -> str:
         """
         Return string with the schedule for as long as forseeable
-        with Schedule object. Take in to acount the 2000 character
-        message limit in Discord. Append only until the length
-        of the total string length of all elements combined are within
-        0 - 2000 in length.
+        with Schedule object, 7 days ahead. Responses longer than 
+        the message limit in Discord are split when they are sent.
         
         :param return_if_none:
             boolean for declaring interest in getting output from the
@@ -61,14 +64,13 @@ class ScheduleFeature(ci.FeatureBase):
         """
         curriculum = []
         last_date = self.interface.curriculum[0].begin.date()
-        allowed_length = 2000
-        today = datetime.now().date()
+        today = self.interface.today
         weekdays = {0: 'Måndag', 1: 'Tisdag', 2: 'Onsdag', 3: 'Torsdag', 4: 'Fredag'}
         
         for event in (self.interface.curriculum):
             if event.begin.date() >= self.interface.today:
-                begin = event.begin.adjusted_time.strftime('%H:%M')
-                end = event.end.adjusted_time.strftime('%H:%M')
+                begin = event.begin_time.strftime('%H:%M')
+                end = event.end_time.strftime('%H:%M')
                 location = event.location
                 name = event.name
                 date = event.begin.date()
@@ -80,9 +82,8 @@ class ScheduleFeature(ci.FeatureBase):
                 else:
                     phrase = f'{class_header}'
                 
-                if (allowed_length - len(phrase)) > 10 and (date - today).days <= 7:
+                if (date - today).days <= 7:
                     curriculum.append(phrase)
-                    allowed_length -= len(phrase)
                     last_date = event.begin.date()
                 else:
                     break
@@ -95,8 +96,8 @@ class ScheduleFeature(ci.FeatureBase):
         elif not curriculum and not return_if_none:
             return 'Just nu ser det tomt ut på schemat...'
 
-    @logger
     @ci.scheduledmethod
+    @timed
     def get_todays_lessons(self, return_if_none = True) -> str:
         """
         Return concatenated response phrase with all lessons for 
@@ -116,7 +117,7 @@ class ScheduleFeature(ci.FeatureBase):
         if return_if_none:
             return 'Det finns inga lektioner på schemat idag :sunglasses:'
 
-    @logger
+    @timed
     def get_next_lesson(self) -> str:
         """
         Return string with concatenated variable values to tell the
@@ -126,6 +127,6 @@ class ScheduleFeature(ci.FeatureBase):
             date = self.interface.next_lesson_date
             hour = self.interface.next_lesson_time
             classroom = self.interface.next_lesson_classroom
-        except Exception as e:
-            return e
+        except (AttributeError, IndexError, TypeError):
+            return 'Jag hittar ingen nästa lektion på schemat'
         return f'Nästa lektion är i {classroom}, {date}, kl {hour} :slight_smile:'
\ No newline at end of file
@@ -0,0 +1,92 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+from dotenv import load_dotenv
+from pathlib import Path
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Launcher for running the bot in several processes
+
+Synposis:
+    One process handles the messages of every guild on a
+    single core. Start the bot in SHARD_PROCESSES processes
+    instead, each connecting through its share of the
+    SHARD_COUNT shards, and start a process again if it
+    exits. Each process serves the guilds on its own shards.
+    The metrics of each process are served on METRICS_PORT
+    plus the number of the process, and the processes share
+    the data downloaded from upstream services through the
+    database at SHARED_CACHE_PATH, shared_cache.db by default.
+
+    <<< SHARD_COUNT=4 SHARD_PROCESSES=2 python launcher.py >>>
+"""
+
+RESTART_PAUSE = 5.0
+
+log = logging.getLogger(__name__)
+
+
+def partition(shard_count: int, processes: int) -> list:
+    """
+    Return the shard ids for each process. Discord places
+    guilds on shards by their id, so the guilds are spread
+    evenly over the processes.
+
+    :param shard_count:
+        int, the total number of shards
+    :param processes:
+        int, the number of processes
+    :returns:
+        list with a list of shard ids per process
+    """
+    return [list(range(i, shard_count, processes)) for i in range(processes)]
+
+
+def start(shard_count: int, shard_ids: list, number: int) -> subprocess.Popen:
+    """
+    Start the bot in a process connecting through shard_ids.
+    """
+    env = dict(os.environ,
+        SHARD_COUNT = str(shard_count),
+        SHARD_IDS = ','.join(str(i) for i in shard_ids),
+        SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH') or 'shared_cache.db')
+    if os.getenv('METRICS_PORT'):
+        env['METRICS_PORT'] = str(int(os.getenv('METRICS_PORT')) + number)
+
+    directory = Path(__file__).parent
+    return subprocess.Popen([sys.executable, str(directory / 'client.py')], cwd = directory, env = env)
+
+
+def main() -> None:
+    logging.basicConfig(level = logging.INFO)
+    load_dotenv()
+
+    shard_count = int(os.getenv('SHARD_COUNT') or 1)
+    processes = min(int(os.getenv('SHARD_PROCESSES') or os.cpu_count()), shard_count)
+    shards = partition(shard_count, processes)
+    running = [start(shard_count, shard_ids, number) for number, shard_ids in enumerate(shards)]
+
+    try:
+        while True:
+            for number, process in enumerate(running):
+                if process.poll() is None:
+                    continue
+                log.warning(f'Shards {shards[number]} exited with {process.returncode}, restarting')
+                time.sleep(RESTART_PAUSE)
+                running[number] = start(shard_count, shards[number], number)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for process in running:
+            process.terminate()
+        for process in running:
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
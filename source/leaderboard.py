@@ -0,0 +1,179 @@
+from random import random
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Order statistics index for member ranks
+
+Synposis:
+    Keep members sorted by rank as ranks change, so that
+    the leaderboard, a page of it or the placement of a
+    single member can be returned without sorting every
+    rank on each request. The members are kept in a treap
+    where every node knows the size of its subtree, which
+    gives O(log n) updates and lookups by position.
+"""
+
+class _Node:
+    __slots__ = ('key', 'priority', 'left', 'right', 'size')
+
+    def __init__(self, key):
+        self.key = key
+        self.priority = random()
+        self.left = None
+        self.right = None
+        self.size = 1
+
+
+def _size(node) -> int:
+    return node.size if node else 0
+
+
+def _split(node, key) -> tuple:
+    """
+    Split the tree in two; one with all keys less than key
+    and one with the remaining keys.
+    """
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        node.size = _size(node.left) + _size(node.right) + 1
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    node.size = _size(node.left) + _size(node.right) + 1
+    return left, node
+
+
+def _merge(left, right):
+    """
+    Merge two trees, where all keys in left are less than
+    all keys in right.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.size = _size(left.left) + _size(left.right) + 1
+        return left
+    right.left = _merge(left, right.left)
+    right.size = _size(right.left) + _size(right.right) + 1
+    return right
+
+
+def _remove(node, key):
+    if node.key == key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    node.size -= 1
+    return node
+
+
+class Leaderboard:
+    """
+    Members ordered by rank, highest rank first. Members
+    with the same rank are ordered by their mention string
+    so that the order is stable between calls.
+
+    :ranks:
+        dict, optional. Member mention strings as keys and
+        their ranks as values, to populate the index with.
+    """
+
+    def __init__(self, ranks = None):
+        self._root = None
+        self._ranks = {}
+        for member, rank in (ranks or {}).items():
+            self.update(member, rank)
+
+    def __len__(self):
+        return len(self._ranks)
+
+    def __contains__(self, member):
+        return member in self._ranks
+
+    def update(self, member: str, rank: int) -> None:
+        """
+        Insert a member or move it to its new rank.
+        """
+        if member in self._ranks:
+            self._root = _remove(self._root, (-self._ranks[member], member))
+        self._ranks[member] = rank
+        left, right = _split(self._root, (-rank, member))
+        self._root = _merge(_merge(left, _Node((-rank, member))), right)
+
+    def remove(self, member: str) -> None:
+        """
+        Remove a member from the index, if present.
+        """
+        if member in self._ranks:
+            rank = self._ranks.pop(member)
+            self._root = _remove(self._root, (-rank, member))
+
+    def position(self, member: str) -> int:
+        """
+        Return the placement of a member on the leaderboard,
+        where 1 is the highest rank. None if not ranked.
+        """
+        if member not in self._ranks:
+            return None
+
+        key = (-self._ranks[member], member)
+        position = 0
+        node = self._root
+
+        while node:
+            if node.key < key:
+                position += _size(node.left) + 1
+                node = node.right
+            elif node.key == key:
+                return position + _size(node.left) + 1
+            else:
+                node = node.left
+
+    def top(self, count: int, start: int = 0) -> list:
+        """
+        Return members with their rank from the given
+        placement and onwards, highest rank first.
+
+        :param count:
+            int, the number of members to return
+        :param start:
+            int, zero based placement to start from
+        :returns:
+            list of tuples with member and rank
+        """
+        output = []
+        stack = []
+        node = self._root
+
+        while node:
+            left_size = _size(node.left)
+            if start < left_size:
+                stack.append(node)
+                node = node.left
+            elif start == left_size:
+                stack.append(node)
+                break
+            else:
+                start -= left_size + 1
+                node = node.right
+
+        while stack and len(output) < count:
+            node = stack.pop()
+            rank, member = node.key
+            output.append((member, -rank))
+            node = node.right
+            while node:
+                stack.append(node)
+                node = node.left
+        return output
@@ -1,4 +1,4 @@
-from datetime import datetime
+from clock import SYSTEM_CLOCK
 from weekdays import Weekdays
 """
 Details:
@@ -22,10 +22,13 @@ class Menu:
 	restaurant is closed. This will return None when 
 	queried. Each value under said keys are lists
 	which will contain strings that are the menu 
-	items for the given day.
+	items for the given day. The menu is read from the
+	text of the bold tags on the website, as returned
+	by parsing.parse_menu. The creation date is read
+	from clock, the system clock by default.
 	"""
-	def __init__(self, soup = []):
-		self.soup = soup
+	def __init__(self, texts = (), clock = SYSTEM_CLOCK):
+		self.texts = texts
 		self._weekly_menu = {
 			'måndag': [], 
 			'tisdag': [], 
@@ -44,7 +47,7 @@ class Menu:
 			6: None
 		}
 
-		self.creation_date = datetime.today().date()
+		self.creation_date = clock.today()
 		self._serialize()
 
 	def __getitem__(self, index):
@@ -59,19 +62,19 @@ class Menu:
 
 	def _serialize(self):
 		"""
-		Iterate over the HTML content found in the 
-		soup object received. Look for the weekday
-		markers, denoted by the keys in the 
+		Iterate over the texts from the HTML content
+		received. Look for the weekday markers, denoted
+		by the keys in the 
 		"""
 		selected_weekday = None
 
-		for html in self.soup:			
-			if html.text.lower() in self._weekly_menu:
-				selected_weekday = html.text.lower()
+		for text in self.texts:			
+			if text.lower() in self._weekly_menu:
+				selected_weekday = text.lower()
 				continue
 			
 			if selected_weekday:
-				self._weekly_menu[selected_weekday].append(html.text.lower())
+				self._weekly_menu[selected_weekday].append(text.lower())
 
 	@property
 	def creation_date(self):
@@ -82,12 +85,12 @@ class Menu:
 		self._creation_date = value
 	
 	@property
-	def soup(self):
-		return self._soup
+	def texts(self):
+		return self._texts
 
-	@soup.setter
-	def soup(self, value):
-		self._soup = value
+	@texts.setter
+	def texts(self, value):
+		self._texts = value
 
 	@property
 	def weekly_menu(self):
@@ -0,0 +1,241 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Metrics for features, caches and the event loop
+
+Synposis:
+    Record how long feature callbacks and upstream requests
+    take, how often the caches in the interfaces are hit,
+    and how far behind the event loop is running. Metrics are
+    kept in memory as plain counters and fixed bucket histograms
+    so that recording them costs next to nothing on the message
+    path. They are exported in the Prometheus text format, to a
+    file on disk and optionally over a local http endpoint.
+"""
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+log = logging.getLogger(__name__)
+
+
+class Counter:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: str) -> list:
+        return [f'{name}{{{labels}}} {self.value}']
+
+
+class Gauge:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value) -> None:
+        self.value = value
+
+    def samples(self, name: str, labels: str) -> list:
+        return [f'{name}{{{labels}}} {self.value}']
+
+
+class Histogram:
+    """
+    Count observations in buckets with fixed upper bounds.
+    Observing a value is a binary search over the bounds
+    and two additions.
+    """
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def samples(self, name: str, labels: str) -> list:
+        output = []
+        cumulative = 0
+        separator = ',' if labels else ''
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            cumulative += count
+            output.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+        output.append(f'{name}_sum{{{labels}}} {self.sum}')
+        output.append(f'{name}_count{{{labels}}} {cumulative}')
+        return output
+
+
+class Registry:
+    """
+    Hold all metrics by name and labels. Metrics are created
+    the first time they are asked for; callers on hot paths
+    keep a reference to the metric instead of asking again.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name: str, labels: dict):
+        key = (name, tuple(sorted(labels.items())))
+        try:
+            return self._metrics[key]
+        except KeyError:
+            with self._lock:
+                return self._metrics.setdefault(key, kind())
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get(Histogram, name, labels)
+
+    def render(self) -> str:
+        """
+        Return all metrics in the Prometheus text format.
+        """
+        output = []
+        types = {Counter: 'counter', Gauge: 'gauge', Histogram: 'histogram'}
+        declared = set()
+
+        for (name, labels), metric in sorted(self._metrics.items(), key = lambda i: i[0]):
+            if name not in declared:
+                output.append(f'# TYPE {name} {types[type(metric)]}')
+                declared.add(name)
+            labels = ','.join(f'{k}="{v}"' for k, v in labels)
+            output.extend(metric.samples(name, labels))
+        return '\n'.join(output) + '\n'
+
+    def export(self, path: str) -> None:
+        """
+        Write all metrics to a file. The file is replaced in one
+        operation so that readers never see a partial write.
+        """
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding = 'utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+registry = Registry()
+
+
+def timed(func):
+    """
+    Decorator for feature methods. Record the time spent in
+    every call in a histogram labeled with the feature and
+    the method name, and count calls that raise. Methods
+    returning a coroutine are timed until it is done.
+    """
+    feature, _, callback = func.__qualname__.rpartition('.')
+    latency = registry.histogram('feature_callback_seconds', feature = feature, callback = callback)
+    errors = registry.counter('feature_callback_errors_total', feature = feature, callback = callback)
+
+    async def timed_coroutine(coroutine, started: float):
+        try:
+            return await coroutine
+        except Exception:
+            errors.inc()
+            log.exception(f'{func.__qualname__} raised')
+            raise
+        finally:
+            latency.observe(time.perf_counter() - started)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            log.exception(f'{func.__qualname__} raised')
+            latency.observe(time.perf_counter() - started)
+            raise
+
+        if asyncio.iscoroutine(result):
+            return timed_coroutine(result, started)
+        latency.observe(time.perf_counter() - started)
+        return result
+    return wrapper
+
+
+async def monitor_event_loop_lag(interval = 1.0) -> None:
+    """
+    Sleep for interval seconds at a time and record how
+    much later than requested the loop woke up.
+    """
+    loop = asyncio.get_event_loop()
+    gauge = registry.gauge('event_loop_lag_seconds')
+    histogram = registry.histogram('event_loop_lag_seconds_distribution')
+
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        gauge.set(lag)
+        histogram.observe(lag)
+
+
+async def export_periodically(path: str, interval = 15.0) -> None:
+    """
+    Write the metrics to path every interval seconds.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            registry.export(path)
+        except OSError:
+            log.exception(f'Could not export metrics to {path}')
+
+
+async def serve(host = '127.0.0.1', port = 9100):
+    """
+    Serve the metrics in text format over http on a local
+    port, for scraping or for a quick look with curl.
+    """
+    async def respond(reader, writer):
+        try:
+            await reader.readline()
+            body = registry.render().encode()
+            writer.write(
+                b'HTTP/1.0 200 OK\r\n'
+                b'Content-Type: text/plain; version=0.0.4\r\n' +
+                f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(respond, host, port)
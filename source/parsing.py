@@ -0,0 +1,105 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from custom_errs import ScrapingError
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Parsing of downloaded calendars and menus
+
+Synposis:
+    Parsing the TimeEdit calendar with ics and the lunch
+    menu website with BeautifulSoup is CPU bound, and holds
+    the GIL for as long as it takes even in a worker thread,
+    which stalls the event loop. The parsers here take the
+    downloaded text and return plain tuples, which are cheap
+    to pickle, so that they can run in a process pool on
+    another core. The pool is optional; without it, the
+    parsers run in the calling thread as before.
+
+    <<< parsing.use_process_pool(max_workers = 2) >>>
+"""
+
+_pool = None
+
+
+def use_process_pool(max_workers = 1) -> None:
+    """
+    Run the parsers in a pool of max_workers processes from
+    now on. The pool is shut down when the interpreter exits.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers = max_workers)
+        atexit.register(_pool.shutdown)
+
+
+def run(parser: callable, *args):
+    """
+    Return the result of parser called with args, from the
+    process pool if one is used. Exceptions raised by the
+    parser are raised again here.
+    """
+    if _pool is None:
+        return parser(*args)
+    return _pool.submit(parser, *args).result()
+
+
+def parse_calendar(text: str) -> tuple:
+    """
+    Return the lessons in an .ics calendar, sorted by when
+    they begin. The teacher is left out of the lesson name,
+    which TimeEdit writes as 'class, teacher, course'.
+
+    :param text:
+        str, the calendar
+    :returns:
+        tuple of (begin, end, name, location) tuples, with
+        begin and end as naive datetimes in UTC
+    :raises:
+        ValueError if the calendar can not be parsed
+    """
+    import ics
+
+    lessons = []
+    for event in ics.Calendar(text).events:
+        name = event.name or ''
+        lessons.append((
+            event.begin.datetime.replace(tzinfo = None),
+            event.end.datetime.replace(tzinfo = None),
+            f"{name.split(',')[0]},{name.split(',')[-1]}",
+            event.location
+        ))
+    lessons.sort(key = lambda i: i[0])
+    return tuple(lessons)
+
+
+def parse_menu(html: bytes) -> tuple:
+    """
+    Return the text of the bold tags making up the menu of
+    the week on the lunch restaurant website, from the first
+    weekday up to the contact details.
+
+    :param html:
+        bytes, the website
+    :returns:
+        tuple of str
+    :raises:
+        ScrapingError if the menu is not found
+    """
+    from bs4 import BeautifulSoup
+
+    tags = BeautifulSoup(html, 'html.parser').find_all('strong')
+    startsat, endsat = None, None
+
+    for index, tag in enumerate(tags):
+        if 'måndag' in tag.text.lower():
+            startsat = index
+        elif 'kontakta' in tag.text.lower():
+            endsat = index
+
+    if startsat is None or endsat is None:
+        raise ScrapingError("No data found from the source")
+    return tuple(tag.text for tag in tags[startsat:endsat])
@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+import threading
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Persistence for the ranking feature
+
+Synposis:
+    Store member ranks and opted out members in a small
+    embedded SQLite database running in WAL mode. Every
+    rank change is written as a single row upsert instead
+    of rewriting all ranks to a json file, which makes
+    each change cheap and safe against a crash mid-write.
+    Ranks are kept per guild, and bot processes serving
+    different guilds can share the database.
+"""
+
+class RankStore:
+    """
+    Persist ranks and opt outs for the RankingMembersFeature.
+    The database is created upon instantiation if it does not
+    exist. Ranks stored in the json file used by earlier versions
+    are imported once, the first time an empty database is opened.
+    The connection is shared by the worker threads processing 
+    messages, one statement at a time.
+
+    Ranks and opt outs belong to a guild. Those stored before
+    ranks were kept per guild, and those imported from the json
+    file, belong to no guild until they are claimed by one.
+
+    :path:
+        path to the SQLite database file
+
+    :legacy_path:
+        path to the json file written by earlier versions
+    """
+
+    def __init__(self, path = 'ranking_data.db', legacy_path = 'ranking_data.json'):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, isolation_level = None, check_same_thread = False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        if self._columns('ranks') and 'guild' not in self._columns('ranks'):
+            self._add_guild_columns()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS ranks (guild TEXT NOT NULL DEFAULT '', "
+            'member TEXT NOT NULL, rank INTEGER NOT NULL, PRIMARY KEY (guild, member))')
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS opted_out_members (guild TEXT NOT NULL DEFAULT '', "
+            'member TEXT NOT NULL, PRIMARY KEY (guild, member))')
+
+        if legacy_path and os.path.isfile(legacy_path) and self._is_empty():
+            self._import_legacy_file(legacy_path)
+
+    def _columns(self, table: str) -> set:
+        return {row[1] for row in self._connection.execute(f'PRAGMA table_info({table})')}
+
+    def _add_guild_columns(self) -> None:
+        """
+        Move the tables written before ranks were kept per
+        guild into tables with a guild column, in one
+        transaction. The rows are moved without a guild.
+        """
+        with self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.execute('ALTER TABLE ranks RENAME TO ranks_without_guild')
+            self._connection.execute(
+                'ALTER TABLE opted_out_members RENAME TO opted_out_members_without_guild')
+            self._connection.execute(
+                "CREATE TABLE ranks (guild TEXT NOT NULL DEFAULT '', "
+                'member TEXT NOT NULL, rank INTEGER NOT NULL, PRIMARY KEY (guild, member))')
+            self._connection.execute(
+                "CREATE TABLE opted_out_members (guild TEXT NOT NULL DEFAULT '', "
+                'member TEXT NOT NULL, PRIMARY KEY (guild, member))')
+            self._connection.execute(
+                'INSERT INTO ranks (member, rank) SELECT member, rank FROM ranks_without_guild')
+            self._connection.execute(
+                'INSERT INTO opted_out_members (member) SELECT member FROM opted_out_members_without_guild')
+            self._connection.execute('DROP TABLE ranks_without_guild')
+            self._connection.execute('DROP TABLE opted_out_members_without_guild')
+
+    def _is_empty(self) -> bool:
+        for table in ('ranks', 'opted_out_members'):
+            if self._connection.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone():
+                return False
+        return True
+
+    def _import_legacy_file(self, legacy_path: str) -> None:
+        """
+        Import the structure written to json by earlier versions
+        of the ranking feature, in one transaction.
+        """
+        try:
+            with open(legacy_path, 'r') as f:
+                rank_data = json.loads(f.read())
+        except Exception:
+            return
+
+        with self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO ranks (member, rank) VALUES (?, ?)',
+                rank_data.get('userid_rank', {}).items())
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO opted_out_members (member) VALUES (?)',
+                ((i,) for i in rank_data.get('opted_out_members', [])))
+
+    def load(self, guild = '') -> dict:
+        """
+        Return all data stored for a guild in the structure
+        used by the ranking feature.
+        :param guild:
+            str, the guild id
+        :returns:
+            dict with the 'userid_rank' dict and the
+            'opted_out_members' set
+        """
+        with self._lock:
+            ranks = self._connection.execute(
+                'SELECT member, rank FROM ranks WHERE guild = ?', (guild,)).fetchall()
+            opted_out = self._connection.execute(
+                'SELECT member FROM opted_out_members WHERE guild = ?', (guild,)).fetchall()
+        return {
+            'userid_rank': {member: rank for member, rank in ranks},
+            'opted_out_members': {member for (member,) in opted_out}
+        }
+
+    def set_rank(self, member: str, rank: int, guild = '') -> None:
+        """
+        Store the rank for a member.
+        :param member:
+            str, the mention string for the member
+        :param rank:
+            int, the new rank
+        :param guild:
+            str, the guild id
+        """
+        with self._lock:
+            self._connection.execute(
+                'INSERT INTO ranks (guild, member, rank) VALUES (?, ?, ?) '
+                'ON CONFLICT (guild, member) DO UPDATE SET rank = excluded.rank',
+                (guild, member, rank))
+
+    def opt_out(self, member: str, guild = '') -> None:
+        """
+        Mark a member as opted out and remove their rank.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.execute(
+                'DELETE FROM ranks WHERE guild = ? AND member = ?', (guild, member))
+            self._connection.execute(
+                'INSERT OR IGNORE INTO opted_out_members (guild, member) VALUES (?, ?)', (guild, member))
+
+    def opt_in(self, member: str, guild = '') -> None:
+        """
+        Remove the opt out mark for a member.
+        """
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM opted_out_members WHERE guild = ? AND member = ?', (guild, member))
+
+    def claim(self, guild: str) -> None:
+        """
+        Move the ranks and opt outs that belong to no guild
+        to the given guild. Stored ranks are only claimed once,
+        by the guild the bot served before it served several.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('BEGIN')
+            for table in ('ranks', 'opted_out_members'):
+                self._connection.execute(
+                    f"UPDATE OR IGNORE {table} SET guild = ? WHERE guild = ''", (guild,))
+                self._connection.execute(f"DELETE FROM {table} WHERE guild = ''")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
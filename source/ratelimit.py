@@ -0,0 +1,127 @@
+import time
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Token bucket rate limiting
+
+Synposis:
+    Limit how often something may happen, for instance how
+    often a member may change ranks. A bucket holds a number
+    of tokens which refill at a fixed rate. Every action
+    consumes a token, and actions are denied while the
+    bucket is empty.
+"""
+
+class TokenBucket:
+    """
+    A single token bucket.
+
+    :rate:
+        float, tokens added per second
+
+    :capacity:
+        float, the most tokens the bucket holds, which is
+        also the largest burst of actions allowed at once
+
+    :clock:
+        callable returning seconds as a float, monotonic
+    """
+
+    def __init__(self, rate: float, capacity: float, clock = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def consume(self, tokens: float = 1) -> bool:
+        """
+        Consume tokens if there are enough of them.
+        :returns:
+            bool, True if the action is allowed
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens: float = 1) -> float:
+        """
+        Return the number of seconds until the given
+        number of tokens are available, 0 if they are.
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Keep one token bucket per key, for instance per member.
+    Buckets are created upon the first action for a key.
+    When more than max_keys buckets exist, the ones that
+    have refilled completely are dropped, since they are
+    no different from a new bucket.
+
+    :rate:
+        float, tokens added per second for each key
+
+    :capacity:
+        float, the largest burst allowed for each key
+
+    :max_keys:
+        int, number of buckets kept before pruning
+    """
+
+    def __init__(self, rate: float, capacity: float, clock = time.monotonic, max_keys = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _prune(self) -> None:
+        self._buckets = {k: v for k, v in self._buckets.items() if not v.full}
+
+    def _bucket(self, key) -> TokenBucket:
+        try:
+            return self._buckets[key]
+        except KeyError:
+            if len(self._buckets) >= self.max_keys:
+                self._prune()
+            bucket = TokenBucket(self.rate, self.capacity, self._clock)
+            self._buckets[key] = bucket
+            return bucket
+
+    def consume(self, key, tokens: float = 1) -> bool:
+        """
+        Consume tokens from the bucket for key.
+        :returns:
+            bool, True if the action is allowed
+        """
+        return self._bucket(key).consume(tokens)
+
+    def delay(self, key, tokens: float = 1) -> float:
+        """
+        Return the number of seconds until the bucket for
+        key holds the given number of tokens, 0 if it does.
+        """
+        return self._bucket(key).delay(tokens)
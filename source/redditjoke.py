@@ -1,10 +1,44 @@
-import praw
+import time
+from custom_errs import UpstreamUnavailable
 from random import randint
+from typing import TYPE_CHECKING
+from upstream import breaker
+
+if TYPE_CHECKING:
+    import praw
+
+SUBREDDITS = ('jokes', 'ProgrammerHumor')
+ITERATION_LIMIT = 10
+MESSAGE_LIMIT = 2000
+
+
+def _message(subreddit: str, title: str, selftext: str, url: str) -> str:
+    """
+    Return the joke in a submission; the punchline of a
+    joke is hidden behind a spoiler, a meme is linked.
+    """
+    if subreddit == 'jokes':
+        return f'{title}\n||{selftext}||'
+    return f'{title}\n{url}'
+
 
 class RedditJoke:
 
-    def __init__(self, reddit_client: praw.Reddit):
+    def __init__(self, reddit_client: 'praw.Reddit'):
         self.reddit_client = reddit_client
+        self._upstream = breaker('https://www.reddit.com', 'Reddit')
+
+    def _random_submission(self, subreddit: str):
+        """
+        Return a random submission from the subreddit, through
+        the circuit breaker for reddit.
+        """
+        try:
+            return self._upstream.call(lambda: self.reddit_client.subreddit(subreddit).random())
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            raise self._upstream.unavailable() from e
 
     def get(self) -> str:
         """
@@ -13,32 +47,125 @@ class RedditJoke:
         joke is sub 2000 characters and randomize the choice between
         the two alternatives, r/jokes and r/programmerhumor
         """
-
-        iterations = 0
-        iteration_limit = 10
-
-        while True:
-            iterations += 1
-            joke_selection = randint(0, 1)
-
-            if joke_selection == 0:
-                submission = self.reddit_client.subreddit('jokes').random()
-                message = f'{submission.title}\n||{submission.selftext}||'
-            else:
-                submission = self.reddit_client.subreddit('ProgrammerHumor').random()
-                message =  f'{submission.title}\n{submission.url}'
-            
-            if len(message) < 2000:
-                break
-            elif iterations == iteration_limit:
-                message = f'Jag kommer inte på något... :cry:'
-                break
-        return message
+        for _ in range(ITERATION_LIMIT):
+            subreddit = SUBREDDITS[randint(0, 1)]
+            submission = self._random_submission(subreddit)
+            message = _message(subreddit, submission.title, submission.selftext, submission.url)
+            if len(message) < MESSAGE_LIMIT:
+                return message
+        return f'Jag kommer inte på något... :cry:'
 
     @property
-    def reddit_client(self) -> praw.Reddit:
+    def reddit_client(self) -> 'praw.Reddit':
         return self._reddit_client
 
     @reddit_client.setter
     def reddit_client(self, client):
         self._reddit_client = client
+
+
+class AsyncRedditJoke:
+    """
+    Fetch jokes from the reddit api with aiohttp, in the
+    event loop, instead of blocking a thread on praw. The
+    bot signs in with application only OAuth, and one
+    session, with its pool of connections, is kept for
+    every request.
+
+    :client_id:
+        str, the id of the reddit application
+    :client_secret:
+        str, the secret of the reddit application
+    :user_agent:
+        str, the user agent reddit asks api clients to set
+    :timeout:
+        float, seconds allowed for each request. Defaults to
+        the timeout of the circuit breaker for reddit.
+    """
+
+    TOKEN_URL = 'https://www.reddit.com/api/v1/access_token'
+    API_URL = 'https://oauth.reddit.com'
+    TOKEN_MARGIN = 60
+
+    def __init__(self, client_id: str, client_secret: str, user_agent: str, timeout = None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.user_agent = user_agent
+        self._upstream = breaker('https://www.reddit.com', 'Reddit')
+        self.timeout = timeout or self._upstream.timeout
+        self._session = None
+        self._token = None
+        self._token_expires_at = 0.0
+
+    def _get_session(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers = {'User-Agent': self.user_agent},
+                timeout = aiohttp.ClientTimeout(total = self.timeout))
+        return self._session
+
+    async def _authorize(self) -> str:
+        """
+        Return an access token for the application, signing
+        in again shortly before the previous one expires.
+        """
+        if self._token is not None and time.monotonic() < self._token_expires_at:
+            return self._token
+
+        import aiohttp
+
+        async with self._get_session().post(
+                AsyncRedditJoke.TOKEN_URL,
+                data = {'grant_type': 'client_credentials'},
+                auth = aiohttp.BasicAuth(self.client_id, self.client_secret)) as response:
+            response.raise_for_status()
+            token = await response.json()
+
+        self._token = token['access_token']
+        self._token_expires_at = time.monotonic() + token['expires_in'] - AsyncRedditJoke.TOKEN_MARGIN
+        return self._token
+
+    async def _fetch_random(self, subreddit: str) -> dict:
+        token = await self._authorize()
+        async with self._get_session().get(
+                f'{AsyncRedditJoke.API_URL}/r/{subreddit}/random',
+                headers = {'Authorization': f'bearer {token}'}) as response:
+            response.raise_for_status()
+            listing = await response.json()
+
+        if isinstance(listing, list):
+            listing = listing[0]
+        return listing['data']['children'][0]['data']
+
+    async def _random_submission(self, subreddit: str) -> dict:
+        """
+        Return a random submission from the subreddit, through
+        the circuit breaker for reddit.
+        """
+        try:
+            return await self._upstream.call_async(self._fetch_random, subreddit)
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            raise self._upstream.unavailable() from e
+
+    async def get(self) -> str:
+        """
+        Return a random url or random joke phrase, like
+        RedditJoke.get.
+        """
+        for _ in range(ITERATION_LIMIT):
+            subreddit = SUBREDDITS[randint(0, 1)]
+            submission = await self._random_submission(subreddit)
+            message = _message(
+                subreddit, submission.get('title', ''),
+                submission.get('selftext', ''), submission.get('url', ''))
+            if len(message) < MESSAGE_LIMIT:
+                return message
+        return f'Jag kommer inte på något... :cry:'
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
@@ -0,0 +1,253 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+from clock import SYSTEM_CLOCK
+from datetime import datetime, timedelta
+from event import Event
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Reminders for Event alarms
+
+Synposis:
+    Keep the pending alarms of Event objects in a min-heap
+    ordered by the time they fire, and sleep until the first
+    one is due. Events with weekdays recur every week on those
+    days and are pushed back on the heap when they fire, other
+    events fire once. Cancelled reminders are left in the heap
+    and skipped when popped, so adding, firing and cancelling
+    all stay O(log n). The reminders are persisted to a json
+    file so that they survive a restart.
+"""
+
+class Reminders:
+    """
+    Pending reminders, persisted to path.
+
+    :path:
+        str, the json file the reminders are persisted to
+    :missed_grace:
+        timedelta, reminders that should have fired while
+        the bot was down fire upon start if they are no
+        older than this, and are skipped otherwise
+    :clock:
+        the clock reminders are due by, the system
+        clock by default
+    """
+
+    SAVE_INTERVAL = 30
+
+    def __init__(self, path = 'reminders.json', missed_grace = timedelta(minutes = 15), clock = SYSTEM_CLOCK):
+        self.path = path
+        self.missed_grace = missed_grace
+        self.clock = clock
+        self._heap = []
+        self._reminders = {}
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._changed = None
+        self._dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._reminders)
+
+    def __contains__(self, reminder_id: int):
+        return reminder_id in self._reminders
+
+    @staticmethod
+    def next_fire_time(event: Event, after: datetime):
+        """
+        Return when the alarm of the event next fires, later
+        than after, or None if it never will. The alarm fires
+        the day before the event when it is set past midnight.
+
+        :param event:
+            Event
+        :param after:
+            datetime
+        :returns:
+            datetime or None
+        """
+        day_before = timedelta(days = 1) if event.alarm > event.time else timedelta()
+
+        if event.weekdays:
+            days = {i.value for i in event.weekdays}
+            for offset in range(9):
+                day = after.date() + timedelta(days = offset - 1)
+                fire_at = datetime.combine(day, event.alarm) - day_before
+                if day.isoweekday() in days and fire_at > after:
+                    return fire_at
+            return None
+
+        if event.date:
+            fire_at = datetime.combine(event.date, event.alarm) - day_before
+            return fire_at if fire_at > after else None
+
+        fire_at = datetime.combine(after.date(), event.alarm)
+        return fire_at if fire_at > after else fire_at + timedelta(days = 1)
+
+    def add(self, event: Event, channel = None, now = None) -> int:
+        """
+        Add a reminder for the alarm of the event.
+
+        :param event:
+            Event
+        :param channel:
+            the channel the reminder is sent to
+        :param now:
+            datetime, defaults to the time of the clock
+        :returns:
+            int, the id of the reminder, or None if the
+            alarm has already passed
+        """
+        fire_at = Reminders.next_fire_time(event, now or self.clock.now())
+        if fire_at is None:
+            return None
+
+        reminder_id = next(self._ids)
+        self._push(reminder_id, event, channel, fire_at)
+        return reminder_id
+
+    def cancel(self, reminder_id: int) -> bool:
+        """
+        Cancel a reminder. Its entry in the heap is dropped
+        when it reaches the top.
+
+        :returns:
+            bool, whether the reminder was pending
+        """
+        if self._reminders.pop(reminder_id, None) is None:
+            return False
+        self._changed_state()
+        return True
+
+    def next_due(self):
+        """
+        Return the time the first pending reminder fires,
+        or None if there are none.
+        """
+        self._drop_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now = None) -> list:
+        """
+        Remove and return the reminders due at now. Reminders
+        for events on weekdays are pushed back for their next
+        occurrence, other reminders fire once.
+
+        :param now:
+            datetime, defaults to the time of the clock
+        :returns:
+            list of tuples with reminder id, Event and channel
+        """
+        now = now or self.clock.now()
+        due = []
+
+        while self.next_due() is not None and self._heap[0][0] <= now:
+            fire_at, _, reminder_id = heapq.heappop(self._heap)
+            event, channel, _ = self._reminders.pop(reminder_id)
+            due.append((reminder_id, event, channel))
+
+            next_fire_at = Reminders.next_fire_time(event, fire_at) if event.weekdays else None
+            if next_fire_at is not None:
+                self._push(reminder_id, event, channel, next_fire_at)
+            else:
+                self._changed_state()
+        return due
+
+    async def run(self, send: callable) -> None:
+        """
+        Sleep until the next reminder is due and await send
+        with the event and channel of every due reminder.
+        Wakes up early when a reminder is added, and saves
+        the reminders when they have changed.
+
+        :param send:
+            coroutine function taking an Event and a channel
+        """
+        self._changed = asyncio.Event()
+
+        while True:
+            for _, event, channel in self.pop_due():
+                await send(event, channel)
+
+            if self._dirty:
+                self.save()
+
+            next_due = self.next_due()
+            timeout = Reminders.SAVE_INTERVAL
+            if next_due is not None:
+                timeout = min(timeout, max(0, (next_due - self.clock.now()).total_seconds()))
+
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout = timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def save(self) -> None:
+        """
+        Write the pending reminders to the json file, replacing
+        it at once so that a crash never leaves it half written.
+        """
+        reminders = [
+            {
+                'id': reminder_id,
+                'channel': channel,
+                'fire_at': fire_at.isoformat(),
+                'event': event.to_row()
+            }
+            for reminder_id, (event, channel, fire_at) in self._reminders.items()
+        ]
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding = 'utf-8') as f:
+            json.dump(reminders, f, ensure_ascii = False, separators = (',', ':'))
+        os.replace(temporary, self.path)
+        self._dirty = False
+
+    def load(self, now = None) -> None:
+        """
+        Read the reminders persisted in the json file, if any.
+        """
+        if not os.path.isfile(self.path):
+            return
+
+        now = now or self.clock.now()
+        with open(self.path, 'r', encoding = 'utf-8') as f:
+            reminders = json.load(f)
+
+        for reminder in reminders:
+            event = Event.from_row(reminder['event'])
+            fire_at = datetime.fromisoformat(reminder['fire_at'])
+            if fire_at < now - self.missed_grace:
+                fire_at = Reminders.next_fire_time(event, now)
+            if fire_at is not None:
+                self._push(reminder['id'], event, reminder['channel'], fire_at)
+
+        self._ids = itertools.count(max(self._reminders, default = 0) + 1)
+        self._dirty = False
+
+    def _push(self, reminder_id: int, event: Event, channel, fire_at: datetime) -> None:
+        self._reminders[reminder_id] = (event, channel, fire_at)
+        heapq.heappush(self._heap, (fire_at, next(self._sequence), reminder_id))
+        self._changed_state()
+
+    def _drop_cancelled(self) -> None:
+        while self._heap:
+            fire_at, _, reminder_id = self._heap[0]
+            reminder = self._reminders.get(reminder_id)
+            if reminder is not None and reminder[2] == fire_at:
+                return
+            heapq.heappop(self._heap)
+
+    def _changed_state(self) -> None:
+        self._dirty = True
+        if self._changed is not None:
+            self._changed.set()
+
@@ -0,0 +1,93 @@
+import threading
+import time
+from chunking import split_message
+from collections import OrderedDict
+from metrics import registry
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Cache of rendered responses
+
+Synposis:
+    Many questions are answered from upstream data and the
+    date alone, such as the lunch menu of today or the total
+    number of deaths. Keep the rendered response of such
+    callbacks, keyed on the data version of the feature's
+    interface, so that asking the same question again returns
+    the same string without calling the feature at all. The
+    interfaces bump their data version whenever they refresh
+    their data, which makes older entries unreachable; they
+    then age out of the cache.
+"""
+
+class Response(str):
+    """
+    A rendered response, already split into the parts it
+    is sent in.
+    """
+
+    def __new__(cls, text: str):
+        response = super().__new__(cls, text)
+        response.chunks = split_message(text)
+        return response
+
+
+class ResponseCache:
+    """
+    Least recently used cache of responses.
+
+    :max_entries:
+        int, the number of responses kept
+    :ttl:
+        float, seconds a response is kept at most. This
+        bounds how long a response outlives data that has
+        expired upstream, since the interface is not asked
+        for as long as the response is cached.
+    :clock:
+        callable returning seconds as a float, monotonic
+    """
+
+    def __init__(self, max_entries = 1024, ttl = 300.0, clock = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = registry.counter('cache_hits_total', cache = 'responses')
+        self._misses = registry.counter('cache_misses_total', cache = 'responses')
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the response cached for key, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            self._misses.inc()
+            return None
+        self._hits.inc()
+        return entry[1]
+
+    def put(self, key, text: str) -> Response:
+        """
+        Cache text for key and return it as a Response.
+        """
+        response = Response(text)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, response)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+        return response
@@ -0,0 +1,185 @@
+import CommandIntegrator as ci
+from clock import SYSTEM_CLOCK
+from custom_errs import UpstreamUnavailable
+from responsecache import ResponseCache
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Routing of messages to feature callbacks
+
+Synposis:
+    Resolve which feature and which of its callbacks a
+    message is meant for through an inverted index, built
+    once when the features are assigned to the processor.
+    Every token maps directly to the features that have it
+    as a keyword, and the callbacks of those features are
+    matched by their compiled triggers, so the cost of 
+    routing a message grows with the length of the message
+    and not with the number of features.
+
+    Responses of the callbacks a feature lists in the
+    cached_methods of its command parser are kept in a
+    ResponseCache, keyed on the data version of the feature's
+    interface and the date. The data version is read after the
+    callback has run, since the callback may itself refresh the
+    data.
+"""
+
+class RoutingIndex:
+    """
+    Inverted index from tokens to the features having them
+    as keywords. The callbacks of the features found are
+    matched by the TriggerMatcher of each feature.
+    """
+
+    def __init__(self, features: tuple):
+        self.keywords = {}
+        self.interactive_methods = {}
+        self.cached_methods = {}
+
+        for feature in features:
+            parser = feature.command_parser
+            self.interactive_methods[feature] = set(parser.interactive_methods)
+            self.cached_methods[feature] = set(getattr(parser, 'cached_methods', ()))
+            for keyword in parser.keywords:
+                self.keywords.setdefault(keyword, set()).add(feature)
+
+    def route(self, tokens: list):
+        """
+        Return the feature and callback a message is meant for.
+        Callbacks only count for features that have a keyword in 
+        the message. Compound triggers win over single words, then
+        the feature with the most keywords in the message. None is 
+        returned if no trigger matched or if two features are 
+        equally likely.
+
+        :param tokens:
+            list of lower case words in the message
+        :returns:
+            Route or None
+        """
+        seen = set()
+        keyword_hits = {}
+
+        for token in tokens:
+            if token in seen:
+                continue
+            seen.add(token)
+            for feature in self.keywords.get(token, ()):
+                keyword_hits[feature] = keyword_hits.get(feature, 0) + 1
+
+        best, best_score, ambiguous = None, None, False
+
+        for feature, hits in keyword_hits.items():
+            matches = feature.command_parser.matcher.match(seen)
+            if not matches:
+                continue
+
+            trigger, callback = max(matches, key = lambda i: i[0].specificity)
+            score = (trigger.specificity, hits)
+            if best is None or score > best_score:
+                best, best_score, ambiguous = (feature, callback), score, False
+            elif score == best_score:
+                ambiguous = True
+
+        if best is None or ambiguous:
+            return None
+        feature, callback = best
+        return Route(
+            callback, 
+            interactive = callback in self.interactive_methods[feature],
+            feature = feature, 
+            cached = callback in self.cached_methods[feature])
+
+
+class Route:
+    """
+    The outcome of processing a message routed through the
+    index. Call response() to run the callback, or to
+    return its cached response if cache and cache_key are
+    set. The key is completed with the data version of the
+    interface of the feature when the cache is read and when
+    the response is stored. If the callback needs an upstream
+    service that is unavailable, the response says so.
+    """
+
+    def __init__(self, callback, interactive: bool, message = None, feature = None, cached = False):
+        self.callback = callback
+        self.interactive = interactive
+        self.message = message
+        self.feature = feature
+        self.cached = cached
+        self.cache = None
+        self.cache_key = None
+
+    def versioned_cache_key(self) -> tuple:
+        interface = getattr(self.feature, 'interface', None)
+        return (*self.cache_key, getattr(interface, 'data_version', None))
+
+    def response(self):
+        if self.cache is not None:
+            response = self.cache.get(self.versioned_cache_key())
+            if response is not None:
+                return response
+
+        try:
+            if self.interactive:
+                response = self.callback(self.message)
+            else:
+                response = self.callback()
+        except UpstreamUnavailable as e:
+            return str(e)
+
+        if self.cache is not None and isinstance(response, str):
+            response = self.cache.put(self.versioned_cache_key(), response)
+        return response
+
+
+class RoutingCommandProcessor(ci.CommandProcessor):
+    """
+    CommandProcessor which routes messages through a
+    RoutingIndex. Messages that the index cannot resolve
+    are processed by CommandProcessor as before, which
+    also produces the default responses. The date in the
+    keys of cached responses is read from the clock given
+    as the clock keyword, the system clock by default.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.clock = kwargs.pop('clock', SYSTEM_CLOCK)
+        self._routing_index = RoutingIndex(())
+        self.response_cache = ResponseCache(clock = self.clock.monotonic)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def features(self) -> tuple:
+        return ci.CommandProcessor.features.fget(self)
+
+    @features.setter
+    def features(self, features: tuple) -> None:
+        ci.CommandProcessor.features.fset(self, features)
+        self._routing_index = RoutingIndex(features)
+
+    def process(self, message):
+        words = message.content.lower().split()
+        tokens = [i.strip(ci.FeatureCommandParserBase.IGNORED_CHARS) for i in words]
+        route = self._routing_index.route(tokens)
+
+        if route is None:
+            return super().process(message)
+
+        if route.cached:
+            route.cache = self.response_cache
+            route.cache_key = (
+                route.feature,
+                route.callback,
+                tuple(tokens) if route.interactive else (),
+                self.clock.today()
+            )
+
+        message.content = words
+        route.message = message
+        return route
@@ -1,8 +1,14 @@
+import time
 from datetime import datetime
-from bs4 import BeautifulSoup
 from urllib import request
-from custom_errs import ScrapingError
+from clock import SYSTEM_CLOCK
+from concurrency import single_flight
+from custom_errs import ScrapingError, UpstreamUnavailable
 from menu import Menu
+import parsing
+import sharedcache
+from metrics import registry
+from upstream import breaker
 """
 Details:
     2019-11-24
@@ -57,9 +63,17 @@ class Scraper:
 	when looking for the lunch menu.
 	"""
 
-	def __init__(self, url = None):
+	SHARED_MAX_AGE = 60 * 60
+
+	def __init__(self, url = None, clock = SYSTEM_CLOCK):
 		self.url = url
+		self.clock = clock
 		self._cache = None
+		self._data_version = 0
+		self._upstream = breaker(url or 'lunch', 'Lunchmenyn')
+		self._cache_hits = registry.counter('cache_hits_total', cache = 'scraper')
+		self._cache_misses = registry.counter('cache_misses_total', cache = 'scraper')
+		self._latency = registry.histogram('upstream_request_seconds', upstream = 'lunch')
 
 	def _cache_menu(self, menu_obj):
 		"""
@@ -70,35 +84,38 @@ class Scraper:
 		"""
 		if self._cache is None:
 			self._cache = menu_obj
+			self._data_version += 1
 
+	@single_flight
 	def _cache_web_content(self):
 		"""
 		Caches the content if this is the firs time
 		the instance scrapes the website. This is done
 		to shorten response time and to spare the server
-		from requests.
+		from requests. Concurrent callers share one download.
+		The website is parsed by parsing.parse_menu, in the
+		process pool if one is used. A website that another
+		bot process downloaded within SHARED_MAX_AGE seconds
+		is used instead, if the shared cache is used.
 		"""
-		startsat, endsat = None, None
+		if self._cache is not None:
+			return
+
+		html = sharedcache.fetch(f'lunch:{self.url}', Scraper.SHARED_MAX_AGE, lambda: self.response)
 		try:
-			html = self.soup.find_all('strong')
+			texts = parsing.run(parsing.parse_menu, html)
+		except ScrapingError:
+			raise
 		except Exception:
 			return ScrapingError('Invalid response')
-		
-		for index, tag in enumerate(html):
-			if 'måndag' in tag.text.lower():
-				startsat = index
-			elif 'kontakta' in tag.text.lower():
-				endsat = index
-
-		if startsat is None or endsat is None:
-			raise ScrapingError("No data found from the source")
-		self._cache_menu(Menu(html[startsat:endsat]))
+		self._cache_menu(Menu(texts, clock = self.clock))
 
 	def purge_cache(self):
 		"""
 		Purge the cached menu item upon call.
 		"""
 		self._cache = None
+		self._data_version += 1
 
 	def get_menu_for_weekday(self, weekday):
 		"""
@@ -106,29 +123,44 @@ class Scraper:
 		instance. Expects Weekday enum for getting list
 		of dishes for specific day of week. 
 		"""
-		if not self.cache:
-			try:
-				self._cache_web_content()
-				return self.cache[weekday]
-			except Exception as e:
-				return e
+		if self.cache:
+			self._cache_hits.inc()
+			return self.cache[weekday]
+
+		self._cache_misses.inc()
+		try:
+			self._cache_web_content()
+			return self.cache[weekday]
+		except Exception as e:
+			return e
 
 	def get_menu_for_week(self):
 		"""
 		Return the entire menu for the whole week, scraped
 		from the website.
 		"""
-		if not self.cache:
-			try:
-				self._cache_web_content()
-				return self._cache[0:5]
-			except Exception as e:
-				return e
+		if self.cache:
+			self._cache_hits.inc()
+			return self._cache[0:5]
+
+		self._cache_misses.inc()
+		try:
+			self._cache_web_content()
+			return self._cache[0:5]
+		except Exception as e:
+			return e
 
 	@property
 	def cache(self):
 		return self._cache
 
+	@property
+	def data_version(self) -> int:
+		"""
+		Increased every time the cached menu changes.
+		"""
+		return self._data_version
+
 	@property
 	def url(self):
 		return self._url
@@ -137,17 +169,37 @@ class Scraper:
 	def url(self, value):
 		self._url = value
 
+	def _download(self) -> bytes:
+		r = request.urlopen(self.url, timeout = self._upstream.timeout)
+		if r.status != 200:
+			raise ScrapingError(f'Got status {r.status}')
+		return r.read()
+
 	@property
 	def response(self):
+		"""
+		Download the website through the circuit breaker
+		for its host.
+
+		:raises:
+			UpstreamUnavailable if the website can not be
+			reached or has been failing lately
+		"""
+		started = time.perf_counter()
 		try:
-			r = request.urlopen(self.url)
+			return self._upstream.call(self._download)
+		except UpstreamUnavailable:
+			raise
 		except Exception as e:
-			return None
-		return r.read() if r.status == 200 else None	
+			raise self._upstream.unavailable() from e
+		finally:
+			self._latency.observe(time.perf_counter() - started)
 
 	@property
 	def soup(self):
-		if self.response is not None:
-			return BeautifulSoup(self.response, 'html.parser')
+		response = self.response
+		if response is not None:
+			from bs4 import BeautifulSoup
+			return BeautifulSoup(response, 'html.parser')
 		else:
 			return None
\ No newline at end of file
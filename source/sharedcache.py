@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from metrics import registry
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Upstream data shared by the bot processes on a host
+
+Synposis:
+    When the bot runs in several processes, each of them
+    would scrape the lunch menu, download the calendar and
+    call the corona api on its own. Keep the downloaded data
+    in a SQLite database in WAL mode instead, memory mapped
+    by every process reading it. The process that finds the
+    data missing or too old takes a lease on it and downloads
+    it once, while the others wait for it to be stored and
+    read it from there, so that the load on the upstream
+    services stays the same however many processes there
+    are. A lease expires by itself if its process dies. The
+    store is optional; without it, every download goes
+    straight to the upstream service.
+
+    <<< sharedcache.use_shared_cache('shared_cache.db') >>>
+"""
+
+class SharedCache:
+    """
+    Data downloaded from upstream services, by key, shared
+    between processes through the database at path.
+
+    :path:
+        path to the SQLite database file
+    :lease_seconds:
+        float, seconds a process may spend downloading
+        before another process takes over
+    :poll_interval:
+        float, seconds between looking for data downloaded
+        by another process
+    :clock:
+        callable returning seconds since the epoch as a float,
+        the same in every process
+    """
+
+    MMAP_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, path = 'shared_cache.db', lease_seconds = 30.0, poll_interval = 0.1, clock = time.time):
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._owner = f'{os.getpid()}-{uuid.uuid4().hex}'
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, isolation_level = None, check_same_thread = False)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        self._connection.execute(f'PRAGMA mmap_size = {SharedCache.MMAP_SIZE}')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, '
+            'value BLOB NOT NULL, fetched_at REAL NOT NULL)')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, '
+            'owner TEXT NOT NULL, expires_at REAL NOT NULL)')
+        self._hits = registry.counter('cache_hits_total', cache = 'shared')
+        self._misses = registry.counter('cache_misses_total', cache = 'shared')
+
+    def get(self, key: str) -> tuple:
+        """
+        Return the data stored for key and when it was
+        downloaded, or None.
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT value, fetched_at FROM entries WHERE key = ?', (key,)).fetchone()
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Store the data for key and release the lease on it.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.execute(
+                'INSERT INTO entries (key, value, fetched_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, fetched_at = excluded.fetched_at',
+                (key, value, self._clock()))
+            self._connection.execute(
+                'DELETE FROM leases WHERE key = ? AND owner = ?', (key, self._owner))
+
+    def acquire(self, key: str) -> bool:
+        """
+        Take the lease on key, unless another process holds
+        it and it has not expired.
+
+        :returns:
+            bool, whether the lease was taken
+        """
+        now = self._clock()
+        with self._lock:
+            cursor = self._connection.execute(
+                'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.owner = excluded.owner OR leases.expires_at <= ?',
+                (key, self._owner, now + self.lease_seconds, now))
+            return cursor.rowcount == 1
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM leases WHERE key = ? AND owner = ?', (key, self._owner))
+
+    def fetch(self, key: str, max_age: float, download: callable) -> bytes:
+        """
+        Return the data stored for key if it was downloaded
+        less than max_age seconds ago. Otherwise download it,
+        or wait for the process already downloading it.
+
+        :param download:
+            callable returning the data as bytes. Its
+            exceptions are raised again here.
+        """
+        while True:
+            entry = self.get(key)
+            if entry is not None and self._clock() - entry[1] < max_age:
+                self._hits.inc()
+                return entry[0]
+            if self.acquire(key):
+                break
+            time.sleep(self.poll_interval)
+
+        self._misses.inc()
+        try:
+            value = download()
+        except BaseException:
+            self.release(key)
+            raise
+        self.put(key, value)
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_cache = None
+
+
+def use_shared_cache(path = 'shared_cache.db', **kwargs) -> None:
+    """
+    Share the data downloaded by the interfaces with the
+    other processes using the database at path, from now on.
+    """
+    global _cache
+    if _cache is None:
+        _cache = SharedCache(path, **kwargs)
+
+
+def fetch(key: str, max_age: float, download: callable) -> bytes:
+    """
+    Return the data for key from the shared cache, if one
+    is used, or else from download.
+    """
+    if _cache is None:
+        return download()
+    return _cache.fetch(key, max_age, download)
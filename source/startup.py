@@ -0,0 +1,171 @@
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Concurrent, fault isolated startup of features
+
+Synposis:
+    Construct the features concurrently in a thread pool,
+    each within its own deadline, so that one slow or failing
+    feature neither delays nor prevents the others from coming
+    up. Features that miss their deadline are handed over when
+    they are ready, and the interfaces of the features are
+    warmed up in the background, retrying a few times with
+    increasing pauses. An upstream service that stays down
+    after that is left to its circuit breaker, which probes
+    it again when a request needs it.
+
+    Features are referred to by the path of their class, so that
+    a feature module and the third party packages it depends on 
+    are imported in the pool when the feature is constructed, and 
+    not when the bot is started.
+"""
+
+log = logging.getLogger(__name__)
+
+
+def lazy_factory(path: str, **kwargs) -> callable:
+    """
+    Return a callable which imports the feature class at path
+    and returns an instance of it, constructed with kwargs.
+
+    <<< lazy_factory('features.LunchMenuFeature:LunchMenuFeature', url = url) >>>
+
+    :param path:
+        str, module and class name separated by a colon
+    :returns:
+        callable
+    """
+    module_name, class_name = path.split(':')
+
+    def factory():
+        return getattr(importlib.import_module(module_name), class_name)(**kwargs)
+    return factory
+
+
+class FeatureLoader:
+    """
+    Construct features in a thread pool.
+
+    :max_workers:
+        int, the number of threads used for construction
+        and warm up
+    """
+
+    WARM_UP_RETRY_SECONDS = (5, 15, 30, 60, 300)
+
+    def __init__(self, max_workers = 8):
+        self._executor = ThreadPoolExecutor(
+            max_workers = max_workers, thread_name_prefix = 'feature-loader')
+        self._closed = threading.Event()
+
+    def load(self, factories: dict, on_late_ready: callable = None) -> dict:
+        """
+        Construct all features concurrently and return the ones
+        that were constructed within their deadline.
+
+        :param factories:
+            dict, feature names as keys and tuples with a callable
+            returning the feature and the deadline for it in
+            seconds as values
+        :param on_late_ready:
+            callable, called with the name and the feature for
+            features constructed after their deadline. It is
+            called from a worker thread.
+        :returns:
+            dict with feature names and features
+        """
+        started = time.monotonic()
+        futures = {
+            name: (self._executor.submit(factory), deadline)
+            for name, (factory, deadline) in factories.items()
+        }
+        features = {}
+
+        for name, (future, deadline) in futures.items():
+            try:
+                features[name] = future.result(
+                    timeout = max(0, started + deadline - time.monotonic()))
+            except TimeoutError:
+                log.warning(f'{name} missed its deadline of {deadline}s, loading in background')
+                future.add_done_callback(
+                    lambda f, name = name: self._late_ready(name, f, on_late_ready))
+            except Exception:
+                log.exception(f'{name} could not be constructed and is disabled')
+        return features
+
+    def start(self, factories: dict, on_ready: callable) -> threading.Thread:
+        """
+        Load the features like load, in a background thread,
+        and return at once. on_ready is called with the name
+        and the feature of every feature constructed; those
+        ready within their deadline are handed over together
+        when the last deadline has passed, the late ones each
+        as soon as they are ready.
+
+        :param factories:
+            dict, as for load
+        :param on_ready:
+            callable, called with the name and the feature from
+            a background thread
+        :returns:
+            threading.Thread, the thread waiting for the features
+        """
+        def run():
+            for name, feature in self.load(factories, on_late_ready = on_ready).items():
+                on_ready(name, feature)
+
+        thread = threading.Thread(target = run, name = 'feature-loader', daemon = True)
+        thread.start()
+        return thread
+
+    def _late_ready(self, name: str, future, on_late_ready: callable) -> None:
+        try:
+            feature = future.result()
+        except Exception:
+            log.exception(f'{name} could not be constructed and is disabled')
+            return
+        log.info(f'{name} is ready')
+        if on_late_ready:
+            on_late_ready(name, feature)
+
+    def warm_up(self, name: str, feature) -> None:
+        """
+        Call warm_up on the interface of the feature in the
+        background, if it has one. Failed attempts are retried
+        once after each pause in WARM_UP_RETRY_SECONDS, until one
+        succeeds or the loader is closed. Meanwhile the feature
+        answers in a degraded state.
+        """
+        interface = getattr(feature, 'interface', None)
+        if callable(getattr(interface, 'warm_up', None)):
+            self._executor.submit(self._warm_up, name, interface)
+
+    def _warm_up(self, name: str, interface) -> None:
+        for pause in (*FeatureLoader.WARM_UP_RETRY_SECONDS, None):
+            try:
+                interface.warm_up()
+                log.info(f'{name} is warmed up')
+                return
+            except Exception as e:
+                if pause is None:
+                    log.warning(f'{name} could not warm up: {e}. Giving up')
+                    return
+                log.warning(f'{name} could not warm up: {e}. Retrying in {pause}s')
+            if self._closed.wait(pause):
+                return
+
+    def close(self) -> None:
+        """
+        Stop retrying to warm up features and release the
+        threads of the pool once their work is done.
+        """
+        self._closed.set()
+        self._executor.shutdown(wait = False)
@@ -1,11 +1,18 @@
-import ics
 import json
+import logging
 import os
+import time as timer
 import CommandIntegrator as ci
 from enum import Enum, auto
 from urllib.request import urlopen
 from datetime import date, datetime, timedelta, time
+import parsing
+import sharedcache
+from clock import SYSTEM_CLOCK
+from concurrency import single_flight
 from custom_errs import *
+from metrics import registry
+from upstream import breaker
 from weekdays import Weekdays
 
 """
@@ -24,98 +31,146 @@ Synposis:
     with a chatbot. 
 """
 
+log = logging.getLogger(__name__)
+
+class Lesson:
+    """
+    A lesson in the curriculum, built from a row returned by
+    parsing.parse_calendar. The begin_time and end_time are
+    adjusted by 1 or 2 hours from UTC to the local time,
+    depending on daylight savings time (dst).
+    """
+    __slots__ = ('begin', 'end', 'name', 'location', 'begin_time', 'end_time')
+
+    def __init__(self, begin: datetime, end: datetime, name: str, location: str, hourdelta = 1):
+        self.begin = begin
+        self.end = end
+        self.name = name
+        self.location = location
+        self.begin_time = (begin + timedelta(hours = hourdelta)).time()
+        self.end_time = (end + timedelta(hours = hourdelta)).time()
+
+    def __repr__(self):
+        return f'<Lesson {self.name} {self.begin:%Y-%m-%d %H:%M}>'
+
+
 class Schedule:
     """
     Parse an .ics url and fetch the data for this calendar.
     The data will be used to return classroom for the day,
     the day after and similar requests in a simple format 
-    with properties.
+    with properties. The time of day and the date are read
+    from clock, the system clock by default.
     """
-    def __init__(self, url = str):
+    SHARED_MAX_AGE = 60 * 60
+
+    def __init__(self, url = str, clock = SYSTEM_CLOCK):
         self._url = url
+        self._clock = clock
+        self._cache_hits = registry.counter('cache_hits_total', cache = 'schedule')
+        self._cache_misses = registry.counter('cache_misses_total', cache = 'schedule')
+        self._latency = registry.histogram('upstream_request_seconds', upstream = 'timeedit')
         self._activities: list()
         self._curriculum_events: list()
         self._init_timestamp: datetime.datetime
-        self.purge()
+        self._lessons = None
+        self._data_version = 0
+        self._upstream = breaker(url, 'Schemat')
 
-    def purge(self):
-        self._curriculum_events = []
-        self._activities = []
-        self._init_timestamp = datetime.now()
-        self.set_calendar()
-        self.truncate_event_name()
-        self._adjust_event_hours()
+    def warm_up(self):
+        """
+        Download and parse the calendar, unless it already
+        has been. The calendar is otherwise downloaded upon
+        first use, which keeps instantiation instant.
+        """
+        self._refresh()
+
+    def _is_stale(self) -> bool:
+        return self._lessons is None or (self._clock.now() - self._init_timestamp).days > 0
 
-    def _adjust_event_hours(self):
+    @single_flight
+    def _refresh(self) -> None:
         """
-        Adjust the hour in a calendar event by 1 or 2 hours,
-        depending on daylight savings time (dst). This is evaluated
-        automatically through the system local time by the datetime
-        instance. This method adds a time() property for both the event 
-        begin and event end, with corrected hour stamps according to 
-        hourdelta parameter. The instance attribute will be accessible through
-        self.begin.time and self.end.time.
+        Download the calendar if it is missing or a day old.
+        Concurrent callers share one download. If TimeEdit
+        can not be reached, the calendar already downloaded
+        is kept and the download is tried again on next use.
+
+        :raises:
+            UpstreamUnavailable if there is no calendar to
+            fall back on
         """
-        hourdelta = 2 if ci.is_dst() else 1
+        if not self._is_stale():
+            return
+        try:
+            self.purge()
+        except Exception as e:
+            if self._lessons is None:
+                if isinstance(e, UpstreamUnavailable):
+                    raise
+                raise self._upstream.unavailable() from e
+            if not isinstance(e, UpstreamUnavailable):
+                log.warning(f'Keeping the calendar from {self._init_timestamp:%Y-%m-%d %H:%M}: {e}')
 
-        for event in self.curriculum:
-            try:
-                year = self.current_time.year
-                month = self.current_time.month
-                day = self.current_time.day
-                
-                begin_hour, begin_minute = event.begin.hour, event.begin.minute
-                end_hour, end_minute = event.end.hour, event.end.minute
-
-                begin_time = datetime(year, month, day, begin_hour, begin_minute)
-                end_time = datetime(year, month, day, end_hour, end_minute)
-                
-                begin_time += timedelta(hours = hourdelta)
-                end_time += timedelta(hours = hourdelta)
-
-                event.begin.adjusted_time = time(begin_time.hour, begin_time.minute)
-                event.end.adjusted_time = time(end_time.hour, end_time.minute)
-
-            except ValueError as e:
-                msg = f'Could not adjust {event} with {hourdelta} hrs: {e}'
-                raise TimezoneAdjustmentError(msg)
-        return True
+    def purge(self):
+        self.set_calendar()
+        self._curriculum_events = []
+        self._activities = []
 
     def set_calendar(self):
         """
         Get data from the timeedit servers containing the
         curriculum for class IoT19 2 weeks ahead. This callable
-        will refresh the .ics Calendar object.
+        will refresh the .ics Calendar object. The download goes
+        through the circuit breaker for the TimeEdit servers,
+        and the calendar is parsed by parsing.parse_calendar,
+        in the process pool if one is used. A calendar that
+        another bot process downloaded within SHARED_MAX_AGE
+        seconds is used instead, if the shared cache is used.
         """
+        text = sharedcache.fetch(
+            f'schedule:{self._url}', Schedule.SHARED_MAX_AGE, self._timed_download).decode()
+
         try:
-            calendar = ics.Calendar(urlopen(self._url).read().decode())
+            rows = parsing.run(parsing.parse_calendar, text)
         except ValueError:
             msg = 'Could not parse calendar url, verify server status and access.'
             raise InvalidCalendarUrl(msg)
-        self._calendar = calendar
+        hourdelta = 2 if ci.is_dst() else 1
+        self._init_timestamp = self._clock.now()
+        self._lessons = tuple(Lesson(*row, hourdelta = hourdelta) for row in rows)
+        self._data_version += 1
+
+    def _timed_download(self) -> bytes:
+        started = timer.perf_counter()
+        try:
+            return self._upstream.call(self._download)
+        finally:
+            self._latency.observe(timer.perf_counter() - started)
+
+    def _download(self) -> bytes:
+        return urlopen(self._url, timeout = self._upstream.timeout).read()
 
-    def truncate_event_name(self):
+    @property
+    def data_version(self) -> int:
         """
-        Truncate sensitive name data in events, containing the
-        name of the teacher holding the class. This will reduce
-        the privacy issue of storing names in log files.
+        Increased every time the calendar is downloaded.
         """
-
-        for event in self.curriculum:
-            event.name = f"{event.name.split(',')[0]},{event.name.split(',')[-1]}"
+        return self._data_version
 
     @property
     def curriculum(self):
-        if (datetime.now() - self._init_timestamp).days:
-            self.purge()
+        if self._is_stale():
+            self._cache_misses.inc()
+            self._refresh()
+        else:
+            self._cache_hits.inc()
 
-        _curriculum = list(self._calendar.events)
-        _curriculum.sort()
-        return _curriculum
+        return list(self._lessons)
 
     @property
     def today(self):
-        return datetime.now().date()
+        return self._clock.today()
 
     @property
     def weekday(self):
@@ -125,7 +180,7 @@ class Schedule:
 
     @property
     def current_time(self):
-        return datetime.now()
+        return self._clock.now()
 
 
     @property
@@ -143,8 +198,8 @@ class Schedule:
         if len(self.todays_events):
             for event in self.todays_events:
                 name = event.name.split(',')[-1].strip()
-                event_start = event.begin.adjusted_time.strftime('%H:%M')
-                event_end = event.end.adjusted_time.strftime('%H:%M')
+                event_start = event.begin_time.strftime('%H:%M')
+                event_end = event.end_time.strftime('%H:%M')
                 output.append(f'{name}, {event_start} - {event_end} i {event.location}')
             return output
         return None
@@ -163,7 +218,7 @@ class Schedule:
 
         if self.todays_events:
             for event in self.todays_events:
-                if self.current_time.hour < event.begin.adjusted_time.hour:
+                if self.current_time.hour < event.begin_time.hour:
                     lesson = event
                     break
         if not lesson:
@@ -183,7 +238,7 @@ class Schedule:
     
     @property
     def next_lesson_time(self):
-        return f'{self.next_lesson.begin.adjusted_time.strftime("%H:%M")}'
+        return f'{self.next_lesson.begin_time.strftime("%H:%M")}'
 
     @property
     def next_lesson_date(self):
@@ -0,0 +1,134 @@
+import ast
+import CommandIntegrator as ci
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Typed trigger patterns for feature callbacks
+
+Synposis:
+    Let features register callbacks for multi-word intents
+    as Trigger objects instead of stringified dictionaries.
+    The triggers of a feature are compiled once, when the
+    callbacks are assigned to the command parser, into a map
+    from every word to the triggers it takes part in. A
+    message is then matched against all triggers of the
+    feature in a single pass over its words.
+"""
+
+class Trigger:
+    """
+    A head word, and optionally words of which any one must
+    also be present in the message for the trigger to match.
+
+    <<< Trigger('rank', 'upp', 'up') >>>
+
+    matches 'rank upp @member' and 'rank up @member'.
+    """
+    __slots__ = ('head', 'followers')
+
+    def __init__(self, head: str, *followers: str):
+        self.head = head
+        self.followers = frozenset(followers)
+
+    @staticmethod
+    def parse(key: str):
+        """
+        Return a Trigger from a callback key in the legacy
+        format, either a single word or str({'head': ('word', ...)}).
+        """
+        if key.startswith('{'):
+            (head, followers), = ast.literal_eval(key).items()
+            return Trigger(head, *followers)
+        return Trigger(key)
+
+    @property
+    def specificity(self) -> int:
+        return 2 if self.followers else 1
+
+    def __eq__(self, other):
+        return isinstance(other, Trigger) and \
+            (self.head, self.followers) == (other.head, other.followers)
+
+    def __hash__(self):
+        return hash((self.head, self.followers))
+
+    def __str__(self):
+        if self.followers:
+            return str({self.head: tuple(sorted(self.followers))})
+        return self.head
+
+    def __repr__(self):
+        return f'Trigger({", ".join(repr(i) for i in (self.head, *sorted(self.followers)))})'
+
+
+class TriggerMatcher:
+    """
+    All triggers of one feature, compiled into a map from
+    each word to the triggers it is head or follower in.
+    """
+
+    def __init__(self, callbacks: dict):
+        self._callbacks = tuple(callbacks.items())
+        self._words = {}
+
+        for index, (trigger, _) in enumerate(self._callbacks):
+            self._words.setdefault(trigger.head, []).append((index, True))
+            for follower in trigger.followers:
+                self._words.setdefault(follower, []).append((index, False))
+
+    def match(self, words) -> list:
+        """
+        Return the triggers matched by the words, with their
+        callbacks, in the order they were registered.
+
+        :param words:
+            iterable of unique lower case words in the message
+        :returns:
+            list of tuples with Trigger and callback
+        """
+        heads = set()
+        followers = set()
+
+        for word in words:
+            for index, is_head in self._words.get(word, ()):
+                if is_head:
+                    heads.add(index)
+                else:
+                    followers.add(index)
+
+        return [self._callbacks[i] for i in sorted(heads)
+                if not self._callbacks[i][0].followers or i in followers]
+
+
+class TriggerCommandParser(ci.FeatureCommandParserBase):
+    """
+    Command parser accepting Trigger objects as callback keys.
+    Plain strings are accepted as single word triggers. The
+    triggers are compiled into a TriggerMatcher when assigned;
+    the callbacks property returns them in the legacy string
+    format understood by CommandProcessor.
+
+    Callbacks listed in cached_methods answer from upstream
+    data and the date alone, and their responses are cached
+    by RoutingCommandProcessor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.matcher = TriggerMatcher({})
+        self.cached_methods = ()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def callbacks(self) -> dict:
+        return self._callbacks
+
+    @callbacks.setter
+    def callbacks(self, callbacks: dict) -> None:
+        triggers = {}
+        for key, callback in callbacks.items():
+            triggers[key if isinstance(key, Trigger) else Trigger.parse(key)] = callback
+        self.matcher = TriggerMatcher(triggers)
+        self._callbacks = {str(trigger): callback for trigger, callback in triggers.items()}
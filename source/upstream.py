@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import threading
+import time
+from custom_errs import UpstreamUnavailable
+from functools import partial
+from metrics import registry
+from urllib.parse import urlparse
+
+"""
+Details:
+    2026-10-19
+
+Module details:
+    Health of the upstream services
+
+Synposis:
+    Keep a circuit breaker per upstream host, shared by every
+    interface talking to it. After a few failed calls in a row
+    the breaker opens, and calls fail at once with
+    UpstreamUnavailable instead of waiting on a service that
+    is down; the interfaces then answer from stale data or
+    with a message saying that the service is unavailable.
+    While open, the last failed call is retried in the
+    background, with increasing pauses, and the breaker
+    closes again as soon as it succeeds, so that no member
+    has to wait for the probe.
+"""
+
+log = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream service.
+
+    :name:
+        str, what the service is called in messages to members
+    :timeout:
+        float, seconds the interfaces should allow each request
+    :failure_threshold:
+        int, failed calls in a row before the breaker opens
+    :reset_timeout:
+        float, seconds until the first probe after opening,
+        doubled after every failed probe
+    :max_reset_timeout:
+        float, the longest pause between probes
+    """
+
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+    def __init__(self, name: str, timeout = 10.0, failure_threshold = 3,
+                 reset_timeout = 15.0, max_reset_timeout = 300.0):
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._pause = reset_timeout
+        self._opened_at = None
+        self._lock = threading.Lock()
+        self._state_gauge = registry.gauge('upstream_state', upstream = name)
+        self._rejected = registry.counter('upstream_rejected_total', upstream = name)
+        self._failed = registry.counter('upstream_failures_total', upstream = name)
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        return self._state == CircuitBreaker.CLOSED
+
+    def unavailable(self) -> UpstreamUnavailable:
+        return UpstreamUnavailable(f'{self.name} svarar inte just nu, försök igen om en stund')
+
+    def call(self, function: callable, *args, **kwargs):
+        """
+        Call function, unless the breaker is open. Exceptions
+        raised by function are counted and raised again.
+
+        :raises:
+            UpstreamUnavailable if the breaker is open
+        """
+        if self._state != CircuitBreaker.CLOSED:
+            self._rejected.inc()
+            raise self.unavailable()
+
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            self._failure(partial(function, *args, **kwargs))
+            raise
+
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+        return result
+
+    async def call_async(self, function: callable, *args, **kwargs):
+        """
+        Await the coroutine function, unless the breaker is
+        open. Exceptions raised by it are counted and raised
+        again. While the breaker is open, the probe runs the
+        coroutine function in the event loop it was awaited in.
+
+        :raises:
+            UpstreamUnavailable if the breaker is open
+        """
+        if self._state != CircuitBreaker.CLOSED:
+            self._rejected.inc()
+            raise self.unavailable()
+
+        loop = asyncio.get_event_loop()
+        try:
+            result = await function(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._failure(lambda: asyncio.run_coroutine_threadsafe(
+                function(*args, **kwargs), loop).result(self.timeout))
+            raise
+
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+        return result
+
+    def _failure(self, probe: callable) -> None:
+        self._failed.inc()
+        with self._lock:
+            self._failures += 1
+            if self._state != CircuitBreaker.CLOSED or self._failures < self.failure_threshold:
+                return
+            self._set_state(CircuitBreaker.OPEN)
+            self._opened_at = time.monotonic()
+        log.warning(f'{self.name} is unavailable, probing in {self._pause}s')
+        self._schedule_probe(probe)
+
+    def _schedule_probe(self, probe: callable) -> None:
+        timer = threading.Timer(self._pause, self._probe, (probe,))
+        timer.daemon = True
+        timer.start()
+
+    def _probe(self, probe: callable) -> None:
+        with self._lock:
+            self._set_state(CircuitBreaker.HALF_OPEN)
+        try:
+            probe()
+        except Exception as e:
+            with self._lock:
+                self._set_state(CircuitBreaker.OPEN)
+                self._pause = min(self._pause * 2, self.max_reset_timeout)
+            log.warning(f'{self.name} is still unavailable: {e}. Probing in {self._pause}s')
+            self._schedule_probe(probe)
+            return
+
+        with self._lock:
+            self._set_state(CircuitBreaker.CLOSED)
+            self._failures = 0
+            self._pause = self.reset_timeout
+        log.info(f'{self.name} is available again after {time.monotonic() - self._opened_at:.0f}s')
+
+    def _set_state(self, state: int) -> None:
+        self._state = state
+        self._state_gauge.set(state)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(url: str, name: str, **kwargs) -> CircuitBreaker:
+    """
+    Return the circuit breaker for the host in url, created
+    with name and kwargs the first time the host is asked for.
+    Interfaces talking to the same host share its breaker.
+    """
+    host = urlparse(url).hostname or url
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(name, **kwargs)
+        return _breakers[host]
+
+
+def health() -> dict:
+    """
+    Return whether each upstream service is available,
+    by the name of the service.
+    """
+    with _breakers_lock:
+        return {i.name: i.available for i in _breakers.values()}
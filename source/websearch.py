@@ -1,6 +1,7 @@
 from apiclient.discovery import build
 from custom_errs import AccessViolation
 from random import choice
+from upstream import breaker
 """
 Details:
     2019-11-24
@@ -56,11 +57,14 @@ class Websearch:
 
 		self._service = build('customsearch', 'v1', 
 			developerKey = self._developerKey).cse()
+		self._upstream = breaker('https://www.googleapis.com', 'Webbsökningen')
 
 	def search(self, query):
 		"""
 		Return only the URL from a websearch, based upon query.
 		If the search resulted in 0 matches, return None.
+		Raises UpstreamUnavailable while the search api has
+		been failing.
 		"""
 		prefixes = (
 			'Jag hittade detta!',
@@ -70,11 +74,12 @@ class Websearch:
 			'Det finns många svar på det men.. jag tror det där passar.',
 		)
 
-		result = self._service.list(
-					q = query, 
-					safe = 'active',
-					cx = self.customsearch_id, 
-					num = 1).execute()
+		result = self._upstream.call(
+					self._service.list(
+						q = query, 
+						safe = 'active',
+						cx = self.customsearch_id, 
+						num = 1).execute)
 		
 		if int(result['queries']['request'][0]['totalResults']) > 0:
 			link = result['items'][0]['link']
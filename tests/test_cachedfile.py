@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from source.cachedfile import CachedFile
+
+
+class test_cachedfile(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'greeting.dat')
+		with open(self.path, 'w', encoding = 'utf-8') as f:
+			f.write('Välkommen!')
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_reloads_when_modified(self):
+		cached = CachedFile(self.path, check_interval = 0)
+		self.assertEqual(cached.read(), 'Välkommen!')
+
+		with open(self.path, 'w', encoding = 'utf-8') as f:
+			f.write('Hej och välkommen!')
+		stat = os.stat(self.path)
+		os.utime(self.path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+		self.assertEqual(cached.read(), 'Hej och välkommen!')
+
+	def test_unchanged_file_is_not_read_again(self):
+		cached = CachedFile(self.path, check_interval = 60)
+		self.assertEqual(cached.read(), 'Välkommen!')
+
+		with open(self.path, 'w', encoding = 'utf-8') as f:
+			f.write('Hej och välkommen!')
+		self.assertEqual(cached.read(), 'Välkommen!')
@@ -0,0 +1,23 @@
+import unittest
+from source.chunking import split_message
+
+
+class test_chunking(unittest.TestCase):
+
+	def test_short_message_untouched(self):
+		self.assertEqual(split_message('hej'), ['hej'])
+
+	def test_splits_between_sections(self):
+		sections = ['\n'.join(['rad'] * 10)] * 3
+		parts = split_message('\n\n'.join(sections), limit = 50)
+		self.assertEqual(parts, sections)
+
+	def test_splits_between_lines(self):
+		text = '\n'.join(f'{i}. medlem' for i in range(500))
+		parts = split_message(text)
+		self.assertTrue(all(len(i) <= 2000 for i in parts))
+		self.assertEqual('\n'.join(parts), text)
+
+	def test_splits_long_word(self):
+		parts = split_message('x' * 4500)
+		self.assertEqual([len(i) for i in parts], [2000, 2000, 500])
@@ -0,0 +1,25 @@
+import unittest
+from datetime import datetime, timedelta
+from source.clock import VirtualClock, is_quiet
+from source.menu import Menu
+
+
+class test_clock(unittest.TestCase):
+
+	def test_virtual_clock_advances(self):
+		clock = VirtualClock(datetime(2026, 10, 18, 23, 30))
+		self.assertTrue(is_quiet(clock.now()))
+
+		clock.advance(timedelta(hours = 9))
+		self.assertEqual(clock.today(), datetime(2026, 10, 19).date())
+		self.assertEqual(clock.monotonic(), 9 * 60 * 60)
+		self.assertFalse(is_quiet(clock.now()))
+
+		with self.assertRaises(ValueError):
+			clock.set(datetime(2026, 10, 18))
+
+	def test_menu_is_dated_by_clock(self):
+		clock = VirtualClock(datetime(2026, 10, 19, 8))
+		menu = Menu(('Måndag', 'Pannkakor', 'Tisdag', 'Fisk'), clock = clock)
+		self.assertEqual(menu.creation_date, datetime(2026, 10, 19).date())
+		self.assertEqual(menu[0], ['pannkakor'])
@@ -0,0 +1,55 @@
+import threading
+import time
+import unittest
+from source.concurrency import single_flight
+
+
+class Upstream:
+
+	def __init__(self):
+		self.requests = 0
+		self.cache = None
+
+	@single_flight
+	def refresh(self):
+		if self.cache is not None:
+			return self.cache
+		time.sleep(0.1)
+		self.requests += 1
+		self.cache = 'meny'
+		return self.cache
+
+	@single_flight
+	def fail(self):
+		time.sleep(0.05)
+		raise ValueError('nere')
+
+
+class test_concurrency(unittest.TestCase):
+
+	def run_concurrently(self, function, count = 20):
+		results = []
+
+		def call():
+			try:
+				results.append(function())
+			except Exception as e:
+				results.append(e)
+
+		threads = [threading.Thread(target = call) for _ in range(count)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		return results
+
+	def test_one_upstream_request(self):
+		upstream = Upstream()
+		results = self.run_concurrently(upstream.refresh)
+		self.assertEqual(upstream.requests, 1)
+		self.assertEqual(results, ['meny'] * 20)
+
+	def test_error_shared(self):
+		upstream = Upstream()
+		results = self.run_concurrently(upstream.fail, count = 5)
+		self.assertTrue(all(isinstance(i, ValueError) for i in results))
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+from source.coronafeatureclient import Client, CoronaWatch
+
+
+TRANSLATION = {
+	'swe_to_eng': {'sverige': 'sweden', 'norge': 'norway'},
+	'eng_to_swe': {'sweden': 'sverige', 'norway': 'norge'}
+}
+
+
+def response(cases: str, deaths: str, recovered = '100') -> dict:
+	return {
+		'countries_stat': [
+			{'country_name': 'Sweden', 'cases': cases, 'deaths': deaths, 'total_recovered': recovered},
+			{'country_name': 'Norway', 'cases': '500', 'deaths': '5', 'total_recovered': '50'}
+		]
+	}
+
+
+class ApiHandle:
+
+	def __init__(self):
+		self.response = None
+		self.data_version = 0
+
+	def fetch(self) -> dict:
+		return self.response
+
+
+class test_coronawatch(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		path = os.path.join(self.directory.name, 'translations.json')
+		with open(path, 'w', encoding = 'utf-8') as f:
+			json.dump(TRANSLATION, f)
+		self.api_handle = ApiHandle()
+		self.watch = CoronaWatch(Client(self.api_handle, path), {'sverige': ('cases', 'deaths')})
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def poll(self, response: dict) -> str:
+		self.api_handle.response = response
+		return self.watch.poll()
+
+	def test_first_poll_is_silent(self):
+		self.assertIsNone(self.poll(response('1,000', '10')))
+
+	def test_change_is_reported(self):
+		self.poll(response('1,000', '10'))
+		self.assertEqual(
+			self.poll(response('1,250', '10')),
+			'Corona i Sverige: smittade 1,250 (+250)')
+		self.assertEqual(
+			self.poll(response('1,200', '12')),
+			'Corona i Sverige: smittade 1,200 (-50), döda 12 (+2)')
+
+	def test_same_response_is_skipped(self):
+		first = response('1,000', '10')
+		self.poll(first)
+		first['countries_stat'][0]['cases'] = '2,000'
+		self.assertIsNone(self.poll(first))
+
+	def test_unchanged_values_are_silent(self):
+		self.poll(response('1,000', '10'))
+		self.assertIsNone(self.poll(response('1,000', '10')))
+
+	def test_unwatched_metric_is_silent(self):
+		self.poll(response('1,000', '10', recovered = '100'))
+		self.assertIsNone(self.poll(response('1,000', '10', recovered = '200')))
+
+	def test_unknown_country(self):
+		with self.assertRaises(KeyError):
+			CoronaWatch(self.watch.client, {'atlantis': ('cases',)})
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import unittest
+from source.coronafeatureclient import CountryIndex
+
+
+TRANSLATION = {
+	'swe_to_eng': {
+		'sverige': 'sweden',
+		'nya zeeland': 'new zealand',
+		'bosnien och hercegovina': 'bosnia and herzegovina',
+		'frankrike': 'france',
+		'schweiz': 'switzerland',
+		'demokratiska republiken kongo kinshasa': 'drc'
+	},
+	'eng_to_swe': {
+		'sweden': 'sverige',
+		'new zealand': 'nya zeeland',
+		'bosnia and herzegovina': 'bosnien och hercegovina',
+		'france': 'frankrike',
+		'switzerland': 'schweiz'
+	}
+}
+
+
+class test_countryindex(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		path = os.path.join(self.directory.name, 'translations.json')
+		with open(path, 'w', encoding = 'utf-8') as f:
+			json.dump(TRANSLATION, f)
+		self.index = CountryIndex(path)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def resolve(self, message: str) -> tuple:
+		return self.index.resolve(message.split())
+
+	def test_single_word(self):
+		self.assertEqual(self.resolve('hur många har smittats i sverige?'), ('sweden', 'sverige'))
+		self.assertEqual(self.resolve('hur många har dött i France'), ('france', 'frankrike'))
+
+	def test_multiple_words(self):
+		self.assertEqual(self.resolve('hur många är sjuka i nya zeeland'), ('new zealand', 'nya zeeland'))
+		self.assertEqual(self.resolve('hur många har dött i new zealand?'), ('new zealand', 'nya zeeland'))
+		self.assertEqual(
+			self.resolve('hur många har dött i bosnien och hercegovina'),
+			('bosnia and herzegovina', 'bosnien och hercegovina'))
+
+	def test_longer_than_max_words(self):
+		self.assertIsNone(self.resolve('hur många har dött i demokratiska republiken kongo kinshasa'))
+		self.assertEqual(self.resolve('demokratiskarepublikenkongokinshasa'), ('drc', 'demokratiska republiken kongo kinshasa'))
+
+	def test_genitive(self):
+		self.assertEqual(self.resolve('hur går det för sveriges sjukhus'), ('sweden', 'sverige'))
+		self.assertEqual(self.resolve('nya zeelands siffror'), ('new zealand', 'nya zeeland'))
+		self.assertEqual(self.resolve('hur många har dött i schweiz'), ('switzerland', 'schweiz'))
+
+	def test_written_as_one_word(self):
+		self.assertEqual(self.resolve('hur många är sjuka i nyazeeland'), ('new zealand', 'nya zeeland'))
+		self.assertEqual(self.resolve('newzealand'), ('new zealand', 'nya zeeland'))
+
+	def test_last_mention_wins(self):
+		self.assertEqual(self.resolve('inte sverige utan frankrike'), ('france', 'frankrike'))
+		self.assertEqual(self.resolve('frankrike eller nya zeeland'), ('new zealand', 'nya zeeland'))
+
+	def test_no_country(self):
+		self.assertIsNone(self.resolve('vad blir det för lunch idag'))
+		self.assertIsNone(self.resolve('zeeland'))
+		self.assertIsNone(self.index.resolve([]))
@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+from source.dispatcher import Dispatcher, REPLY, BROADCAST
+
+
+class Channel:
+
+	def __init__(self, name: str, sent: list):
+		self.name = name
+		self.sent = sent
+
+	async def send(self, content: str):
+		self.sent.append((self.name, content))
+
+
+class test_dispatcher(unittest.TestCase):
+
+	def dispatch(self, dispatcher: Dispatcher):
+		async def run():
+			task = asyncio.ensure_future(dispatcher.run())
+			await asyncio.sleep(0.05)
+			task.cancel()
+		asyncio.run(run())
+
+	def test_coalesces_consecutive_messages(self):
+		sent = []
+		channel = Channel('allmänt', sent)
+		dispatcher = Dispatcher()
+		dispatcher.send(channel, 'ett')
+		dispatcher.send(channel, 'två')
+		dispatcher.send(channel, 'x' * 1999)
+		self.assertEqual(len(dispatcher), 2)
+
+		self.dispatch(dispatcher)
+		self.assertEqual(sent, [('allmänt', 'ett\ntvå'), ('allmänt', 'x' * 1999)])
+
+	def test_replies_before_broadcasts(self):
+		sent = []
+		dispatcher = Dispatcher(global_rate = 1, global_burst = 1)
+		dispatcher.send(Channel('schema', sent), 'schemat', lane = BROADCAST)
+		dispatcher.send(Channel('allmänt', sent), 'svar', lane = REPLY)
+
+		self.dispatch(dispatcher)
+		self.assertEqual(sent, [('allmänt', 'svar')])
+		self.assertEqual(len(dispatcher), 1)
+
+	def test_sends_other_responses_as_str(self):
+		sent = []
+		dispatcher = Dispatcher()
+		dispatcher.send(Channel('allmänt', sent), AttributeError('x'))
+		dispatcher.send(Channel('schema', sent), None)
+
+		self.dispatch(dispatcher)
+		self.assertEqual(sent, [('allmänt', 'x')])
@@ -0,0 +1,52 @@
+import json
+import unittest
+from datetime import date, time, timedelta
+from source.event import Event, dumps, loads
+from source.weekdays import Weekdays
+
+
+class test_event(unittest.TestCase):
+
+	def test_alarm(self):
+		event = Event(time = time(9, 0), alarm = timedelta(minutes = 30))
+		self.assertEqual(event.alarm, time(8, 30))
+
+	def test_validated_on_construction(self):
+		with self.assertRaises(AttributeError):
+			Event(time = '09:00')
+		with self.assertRaises(AttributeError):
+			Event(weekdays = Weekdays.MONDAY)
+
+	def test_alarm_set_after_construction(self):
+		event = Event(time = time(9, 0), alarm = timedelta(minutes = 30))
+		event.alarm = timedelta(hours = 1)
+		self.assertEqual(event.alarm, time(8, 0))
+		self.assertEqual(event.to_row()[-1], 3600)
+		self.assertEqual(loads(dumps([event]))[0].alarm, time(8, 0))
+
+		event.time = time(10, 0)
+		self.assertEqual(event.alarm, time(9, 0))
+		self.assertEqual(event.to_row()[-2:], [36000, 3600])
+
+		with self.assertRaises(AttributeError):
+			event.alarm = time(8, 0)
+		with self.assertRaises(AttributeError):
+			event.time = '10:00'
+
+	def test_slots(self):
+		with self.assertRaises(AttributeError):
+			Event().colour = 'röd'
+
+	def test_to_json(self):
+		event = Event(body = 'Python', date = date(2026, 10, 19), time = time(9, 0))
+		self.assertEqual(json.loads(event.to_json())['date'], '2026-10-19')
+
+	def test_dumps_loads(self):
+		events = [
+			Event(body = 'Python', location = 'Sal 301', date = date(2026, 10, 19),
+				  curriculum_event = True, time = time(9, 0), alarm = timedelta(minutes = 30)),
+			Event(body = 'Lunch', weekdays = [Weekdays.MONDAY, Weekdays.FRIDAY], 
+				  time = time(0, 10), alarm = timedelta(minutes = 20))
+		]
+		reloaded = loads(dumps(events))
+		self.assertEqual([i.to_dict() for i in reloaded], [i.to_dict() for i in events])
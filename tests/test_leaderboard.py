@@ -0,0 +1,32 @@
+import random
+import unittest
+from source.leaderboard import Leaderboard
+
+
+class test_leaderboard(unittest.TestCase):
+
+	def test_order_matches_sorted_ranks(self):
+		ranks = {f'<@{i}>': random.randint(-50, 50) for i in range(500)}
+		leaderboard = Leaderboard(ranks)
+
+		for _ in range(2000):
+			member = f'<@{random.randrange(600)}>'
+			if random.random() < 0.1:
+				ranks.pop(member, None)
+				leaderboard.remove(member)
+			else:
+				ranks[member] = ranks.get(member, 0) + random.choice((-1, 1))
+				leaderboard.update(member, ranks[member])
+
+		expected = sorted(ranks.items(), key = lambda i: (-i[1], i[0]))
+		self.assertEqual(len(leaderboard), len(expected))
+		self.assertEqual(leaderboard.top(len(expected)), expected)
+		self.assertEqual(leaderboard.top(10, start = 40), expected[40:50])
+
+		for place, (member, _) in enumerate(expected, 1):
+			self.assertEqual(leaderboard.position(member), place)
+
+	def test_unranked_member(self):
+		leaderboard = Leaderboard({'<@1>': 1})
+		self.assertIsNone(leaderboard.position('<@2>'))
+		self.assertEqual(leaderboard.top(5, start = 1), [])
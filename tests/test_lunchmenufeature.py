@@ -0,0 +1,17 @@
+import unittest
+from source.features.LunchMenuFeature import LunchMenuFeature
+from source.menu import Menu
+
+
+class test_lunchmenufeature(unittest.TestCase):
+
+	def setUp(self):
+		self.feature = LunchMenuFeature(url = 'http://127.0.0.1/lunch')
+		self.feature.interface._cache = Menu(('Måndag', 'Fisk', 'Tisdag', 'Soppa'))
+
+	def test_menu_for_week_leaves_cache_intact(self):
+		first = self.feature.menu_for_week()
+		second = self.feature.menu_for_week()
+		self.assertEqual(first, second)
+		self.assertEqual(second.count('**Måndag**'), 1)
+		self.assertEqual(self.feature.interface.cache[0], ['fisk'])
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from source.metrics import Histogram, Registry, registry, timed
+
+
+class test_metrics(unittest.TestCase):
+
+	def test_histogram_buckets(self):
+		histogram = Histogram(bounds = (0.1, 1.0, 10.0))
+		for value in (0.05, 0.1, 0.5, 1.0, 5.0, 100.0):
+			histogram.observe(value)
+
+		self.assertEqual(histogram.counts, [2, 2, 1, 1])
+		self.assertEqual(histogram.count, 6)
+		self.assertAlmostEqual(histogram.sum, 106.65)
+
+	def test_histogram_samples_are_cumulative(self):
+		histogram = Histogram(bounds = (0.1, 1.0))
+		for value in (0.05, 0.5, 0.5, 2.0):
+			histogram.observe(value)
+
+		self.assertEqual(histogram.samples('latency', 'feature="Lunch"'), [
+			'latency_bucket{feature="Lunch",le="0.1"} 1',
+			'latency_bucket{feature="Lunch",le="1.0"} 3',
+			'latency_bucket{feature="Lunch",le="+Inf"} 4',
+			'latency_sum{feature="Lunch"} 3.05',
+			'latency_count{feature="Lunch"} 4'
+		])
+
+	def test_render(self):
+		metrics = Registry()
+		metrics.counter('cache_hits_total', cache = 'lunch').inc(3)
+		metrics.counter('cache_hits_total', cache = 'corona').inc()
+		metrics.gauge('event_loop_lag_seconds').set(0.25)
+		histogram = metrics.histogram('upstream_seconds')
+		histogram.bounds = (1.0,)
+		histogram.counts = [0, 0]
+		histogram.observe(0.5)
+
+		self.assertIs(metrics.counter('cache_hits_total', cache = 'lunch'), metrics.counter('cache_hits_total', cache = 'lunch'))
+		self.assertEqual(metrics.render(), '\n'.join([
+			'# TYPE cache_hits_total counter',
+			'cache_hits_total{cache="corona"} 1',
+			'cache_hits_total{cache="lunch"} 3',
+			'# TYPE event_loop_lag_seconds gauge',
+			'event_loop_lag_seconds{} 0.25',
+			'# TYPE upstream_seconds histogram',
+			'upstream_seconds_bucket{le="1.0"} 1',
+			'upstream_seconds_bucket{le="+Inf"} 1',
+			'upstream_seconds_sum{} 0.5',
+			'upstream_seconds_count{} 1'
+		]) + '\n')
+
+	def test_timed(self):
+		class Feature:
+
+			@timed
+			def answer(self, fail = False):
+				if fail:
+					raise ValueError
+				return 'svar'
+
+			@timed
+			async def answer_async(self):
+				return 'svar'
+
+		feature = Feature()
+		self.assertEqual(feature.answer(), 'svar')
+		with self.assertRaises(ValueError):
+			feature.answer(fail = True)
+		self.assertEqual(asyncio.run(feature.answer_async()), 'svar')
+
+		qualname = Feature.answer.__qualname__.rpartition('.')[0]
+		latency = registry.histogram('feature_callback_seconds', feature = qualname, callback = 'answer')
+		errors = registry.counter('feature_callback_errors_total', feature = qualname, callback = 'answer')
+		self.assertEqual(latency.count, 2)
+		self.assertEqual(errors.value, 1)
+		self.assertEqual(registry.histogram(
+			'feature_callback_seconds', feature = qualname, callback = 'answer_async').count, 1)
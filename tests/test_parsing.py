@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime
+from pathlib import Path
+from source import parsing
+from source.parsing import ScrapingError, parse_calendar, parse_menu
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+class test_parsing(unittest.TestCase):
+
+	def setUp(self):
+		self.html = (FIXTURES / 'lunch_menu.html').read_bytes()
+		self.calendar = (FIXTURES / 'timeedit.ics').read_text(encoding = 'utf-8')
+
+	def tearDown(self):
+		if parsing._pool is not None:
+			parsing._pool.shutdown()
+			parsing._pool = None
+
+	def test_parse_menu(self):
+		menu = parse_menu(self.html)
+		self.assertEqual(menu[:3], ('Måndag', 'Köttbullar med potatismos och lingon', 'Tisdag'))
+		self.assertEqual(menu[-1], 'Pasta carbonara')
+		self.assertEqual(len(menu), 10)
+
+	def test_parse_menu_without_menu(self):
+		with self.assertRaises(ScrapingError):
+			parse_menu(b'<html><body><strong>Semester</strong></body></html>')
+
+	def test_parse_calendar(self):
+		self.assertEqual(parse_calendar(self.calendar), (
+			(datetime(2026, 10, 19, 6), datetime(2026, 10, 19, 9), 'IoT19, Python', 'Sal 301'),
+			(datetime(2026, 10, 19, 11), datetime(2026, 10, 19, 14), 'IoT19, Elektronik', 'Sal 204')
+		))
+
+	def test_pool_gives_same_results(self):
+		menu = parsing.run(parse_menu, self.html)
+		calendar = parsing.run(parse_calendar, self.calendar)
+		self.assertIsNone(parsing._pool)
+
+		parsing.use_process_pool(max_workers = 1)
+		self.assertIsNotNone(parsing._pool)
+		self.assertEqual(parsing.run(parse_menu, self.html), menu)
+		self.assertEqual(parsing.run(parse_calendar, self.calendar), calendar)
+
+	def test_pool_raises_parser_errors(self):
+		parsing.use_process_pool(max_workers = 1)
+		with self.assertRaises(ScrapingError):
+			parsing.run(parse_menu, b'<html></html>')
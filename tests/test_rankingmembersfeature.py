@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from source.features.RankingMembersFeature import RankingMembersFeature
+from source.ratelimit import RateLimiter
+
+
+class Member:
+
+	def __init__(self, id: int):
+		self.id = id
+		self.mention = f'<@{id}>'
+
+
+class Guild:
+
+	def __init__(self, id: int):
+		self.id = id
+		self.name = 'skolan'
+
+
+class Message:
+
+	def __init__(self, author: Member, *mentions: Member):
+		self.guild = Guild(1)
+		self.author = author
+		self.mentions = list(mentions)
+
+
+class test_rankingmembersfeature(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.feature = RankingMembersFeature(database_path = os.path.join(self.directory.name, 'ranks.db'))
+		self.feature.rate_limiter = RateLimiter(rate = 0.001, capacity = 1)
+		self.author, self.member, self.opted_out = Member(10), Member(20), Member(30)
+		self.feature.opt_out(Message(self.opted_out))
+
+	def tearDown(self):
+		self.feature.store.close()
+		self.directory.cleanup()
+
+	def test_rank_change_consumes_token(self):
+		self.assertEqual(
+			self.feature.rank_up(Message(self.author, self.member)),
+			':small_red_triangle: <@20> ökade till 1')
+		self.assertEqual(
+			self.feature.rank_down(Message(self.author, self.member)),
+			'<@10>, vänta en stund innan du rankar igen')
+
+	def test_commands_without_change_are_free(self):
+		self.assertIsNone(self.feature.rank_up(Message(self.author)))
+		self.assertIsNone(self.feature.rank_up(Message(self.author, self.author)))
+		self.assertEqual(
+			self.feature.rank_down(Message(self.author, self.opted_out)),
+			'Denna medlem har valt att gå ur ranking funktionen')
+
+		self.assertEqual(
+			self.feature.rank_down(Message(self.author, self.member)),
+			':small_red_triangle_down: <@20> minskade till -1')
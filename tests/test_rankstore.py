@@ -0,0 +1,68 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from source.rankstore import RankStore
+
+
+class test_rankstore(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'ranking_data.db')
+		self.legacy_path = os.path.join(self.directory.name, 'ranking_data.json')
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_ranks_survive_reopen(self):
+		store = RankStore(self.path, self.legacy_path)
+		store.set_rank('<@1>', 1)
+		store.set_rank('<@1>', 2)
+		store.set_rank('<@2>', -1)
+		store.close()
+
+		store = RankStore(self.path, self.legacy_path)
+		self.assertEqual(store.load()['userid_rank'], {'<@1>': 2, '<@2>': -1})
+		store.close()
+
+	def test_opt_out_removes_rank(self):
+		store = RankStore(self.path, self.legacy_path)
+		store.set_rank('<@1>', 5)
+		store.opt_out('<@1>')
+		self.assertEqual(store.load(), {'userid_rank': {}, 'opted_out_members': {'<@1>'}})
+		store.opt_in('<@1>')
+		self.assertEqual(store.load()['opted_out_members'], set())
+		store.close()
+
+	def test_legacy_file_is_imported(self):
+		with open(self.legacy_path, 'w') as f:
+			json.dump({'userid_rank': {'<@1>': 3}, 'opted_out_members': ['<@2>']}, f)
+
+		store = RankStore(self.path, self.legacy_path)
+		self.assertEqual(store.load(), {'userid_rank': {'<@1>': 3}, 'opted_out_members': {'<@2>'}})
+		store.close()
+
+	def test_ranks_are_kept_per_guild(self):
+		store = RankStore(self.path, self.legacy_path)
+		store.set_rank('<@1>', 2, guild = '10')
+		store.set_rank('<@1>', -1, guild = '20')
+		store.opt_out('<@2>', guild = '20')
+		self.assertEqual(store.load('10'), {'userid_rank': {'<@1>': 2}, 'opted_out_members': set()})
+		self.assertEqual(store.load('20'), {'userid_rank': {'<@1>': -1}, 'opted_out_members': {'<@2>'}})
+		store.close()
+
+	def test_ranks_without_guild_are_claimed(self):
+		connection = sqlite3.connect(self.path)
+		connection.execute('CREATE TABLE ranks (member TEXT PRIMARY KEY, rank INTEGER NOT NULL)')
+		connection.execute('CREATE TABLE opted_out_members (member TEXT PRIMARY KEY)')
+		connection.execute("INSERT INTO ranks VALUES ('<@1>', 3)")
+		connection.commit()
+		connection.close()
+
+		store = RankStore(self.path, self.legacy_path)
+		store.claim('10')
+		self.assertEqual(store.load('10')['userid_rank'], {'<@1>': 3})
+		self.assertEqual(store.load()['userid_rank'], {})
+		store.close()
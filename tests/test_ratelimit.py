@@ -0,0 +1,33 @@
+import unittest
+from datetime import datetime
+from source.clock import VirtualClock
+from source.ratelimit import RateLimiter, TokenBucket
+
+
+class test_ratelimit(unittest.TestCase):
+
+	def test_bucket_refills(self):
+		clock = VirtualClock(datetime(2026, 10, 19))
+		bucket = TokenBucket(rate = 1, capacity = 2, clock = clock.monotonic)
+		self.assertTrue(bucket.consume())
+		self.assertTrue(bucket.consume())
+		self.assertFalse(bucket.consume())
+		self.assertAlmostEqual(bucket.delay(), 1.0)
+		clock.advance(1)
+		self.assertTrue(bucket.consume())
+
+	def test_limiter_is_per_key(self):
+		clock = VirtualClock(datetime(2026, 10, 19))
+		limiter = RateLimiter(rate = 0.1, capacity = 1, clock = clock.monotonic)
+		self.assertTrue(limiter.consume('a'))
+		self.assertFalse(limiter.consume('a'))
+		self.assertTrue(limiter.consume('b'))
+
+	def test_full_buckets_are_pruned(self):
+		clock = VirtualClock(datetime(2026, 10, 19))
+		limiter = RateLimiter(rate = 1, capacity = 1, clock = clock.monotonic, max_keys = 2)
+		limiter.consume('a')
+		limiter.consume('b')
+		clock.advance(5)
+		limiter.consume('c')
+		self.assertEqual(len(limiter), 1)
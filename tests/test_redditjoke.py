@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from unittest import mock
+from source.redditjoke import AsyncRedditJoke
+from source.upstream import CircuitBreaker, UpstreamUnavailable
+
+
+def listing(title: str, selftext: str, url: str) -> list:
+	submission = {'title': title, 'selftext': selftext, 'url': url}
+	return [{'data': {'children': [{'data': submission}]}}, {'data': {'children': []}}]
+
+
+class Response:
+
+	def __init__(self, payload, status = 200):
+		self.payload = payload
+		self.status = status
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *args):
+		pass
+
+	def raise_for_status(self):
+		if self.status >= 400:
+			raise ConnectionError(f'{self.status}')
+
+	async def json(self):
+		return self.payload
+
+
+class Session:
+
+	def __init__(self, expires_in = 3600, status = 200, payload = None):
+		self.expires_in = expires_in
+		self.status = status
+		self.payload = payload or listing('Varför?', 'Därför.', 'https://redd.it/1')
+		self.closed = False
+		self.tokens = 0
+		self.requests = []
+
+	def post(self, url: str, data: dict, auth):
+		self.tokens += 1
+		return Response({'access_token': f'token-{self.tokens}', 'expires_in': self.expires_in})
+
+	def get(self, url: str, headers: dict):
+		self.requests.append((url, headers['Authorization']))
+		return Response(self.payload, self.status)
+
+	async def close(self):
+		self.closed = True
+
+
+class test_redditjoke(unittest.TestCase):
+
+	def setUp(self):
+		self.joke = AsyncRedditJoke('id', 'secret', 'robbot/1.0')
+		self.joke._upstream = CircuitBreaker('Reddit', failure_threshold = 2, reset_timeout = 60)
+
+	def get(self, session: Session, subreddit = 0) -> str:
+		self.joke._session = session
+		with mock.patch('source.redditjoke.randint', return_value = subreddit):
+			return asyncio.run(self.joke.get())
+
+	def test_token_is_cached(self):
+		session = Session()
+		self.get(session)
+		self.get(session)
+		self.assertEqual(session.tokens, 1)
+		self.assertEqual([i[1] for i in session.requests], ['bearer token-1', 'bearer token-1'])
+
+	def test_token_is_refreshed_when_expired(self):
+		session = Session(expires_in = AsyncRedditJoke.TOKEN_MARGIN)
+		self.get(session)
+		self.get(session)
+		self.assertEqual(session.tokens, 2)
+		self.assertEqual([i[1] for i in session.requests], ['bearer token-1', 'bearer token-2'])
+
+	def test_parses_random_submission(self):
+		session = Session()
+		self.assertEqual(self.get(session, subreddit = 0), 'Varför?\n||Därför.||')
+		self.assertEqual(self.get(session, subreddit = 1), 'Varför?\nhttps://redd.it/1')
+		self.assertEqual([i[0] for i in session.requests], [
+			'https://oauth.reddit.com/r/jokes/random',
+			'https://oauth.reddit.com/r/ProgrammerHumor/random'
+		])
+
+		session.payload = session.payload[0]
+		self.assertEqual(self.get(session), 'Varför?\n||Därför.||')
+
+	def test_failures_go_through_breaker(self):
+		session = Session(status = 503)
+		for _ in range(2):
+			with self.assertRaises(UpstreamUnavailable):
+				self.get(session)
+		self.assertFalse(self.joke._upstream.available)
+
+		with self.assertRaises(UpstreamUnavailable):
+			self.get(session)
+		self.assertEqual(len(session.requests), 2)
+
+	def test_close(self):
+		session = Session()
+		self.get(session)
+		asyncio.run(self.joke.close())
+		self.assertTrue(session.closed)
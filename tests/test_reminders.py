@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta
+from source.clock import VirtualClock
+from source.event import Event
+from source.reminders import Reminders
+from source.weekdays import Weekdays
+
+
+class test_reminders(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'reminders.json')
+		self.now = datetime(2026, 10, 19, 12, 0)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_fires_once_in_order(self):
+		reminders = Reminders(self.path)
+		late = Event(body = 'sen', date = date(2026, 10, 19), time = time(15, 0), alarm = timedelta(minutes = 30))
+		early = Event(body = 'tidig', date = date(2026, 10, 19), time = time(13, 0), alarm = timedelta(minutes = 30))
+		reminders.add(late, now = self.now)
+		reminders.add(early, now = self.now)
+
+		self.assertEqual(reminders.next_due(), datetime(2026, 10, 19, 12, 30))
+		due = reminders.pop_due(now = datetime(2026, 10, 19, 15, 0))
+		self.assertEqual([event.body for _, event, _ in due], ['tidig', 'sen'])
+		self.assertEqual(len(reminders), 0)
+
+	def test_event_without_date_fires_once(self):
+		reminders = Reminders(self.path)
+		meeting = Event(body = 'möte', time = time(10, 0), alarm = timedelta(minutes = 30))
+		reminders.add(meeting, now = datetime(2026, 10, 19, 9, 0))
+
+		self.assertEqual(reminders.next_due(), datetime(2026, 10, 19, 9, 30))
+		due = reminders.pop_due(now = datetime(2026, 10, 19, 9, 30))
+		self.assertEqual([event.body for _, event, _ in due], ['möte'])
+		self.assertEqual(len(reminders), 0)
+		self.assertIsNone(reminders.next_due())
+
+	def test_weekly_recurrence(self):
+		reminders = Reminders(self.path)
+		lesson = Event(body = 'lektion', weekdays = [Weekdays.MONDAY], time = time(9, 0), alarm = timedelta(minutes = 30))
+		reminders.add(lesson, now = self.now)
+
+		self.assertEqual(reminders.next_due(), datetime(2026, 10, 26, 8, 30))
+		reminders.pop_due(now = datetime(2026, 10, 26, 8, 30))
+		self.assertEqual(reminders.next_due(), datetime(2026, 11, 2, 8, 30))
+
+	def test_cancel(self):
+		reminders = Reminders(self.path)
+		event = Event(body = 'möte', date = date(2026, 10, 20), time = time(10, 0))
+		reminder_id = reminders.add(event, now = self.now)
+
+		self.assertTrue(reminders.cancel(reminder_id))
+		self.assertFalse(reminders.cancel(reminder_id))
+		self.assertIsNone(reminders.next_due())
+		self.assertEqual(reminders.pop_due(now = datetime(2026, 10, 21)), [])
+
+	def test_persisted(self):
+		reminders = Reminders(self.path)
+		event = Event(body = 'möte', location = 'Sal 301', date = date(2099, 10, 20), time = time(10, 0), alarm = timedelta(minutes = 30))
+		reminder_id = reminders.add(event, channel = 10, now = self.now)
+		reminders.save()
+
+		reloaded = Reminders(self.path)
+		self.assertIn(reminder_id, reloaded)
+		self.assertEqual(reloaded.next_due(), datetime(2099, 10, 20, 9, 30))
+		(_, event, channel), = reloaded.pop_due(now = datetime(2099, 10, 20, 9, 30))
+		self.assertEqual((event.body, event.location, channel), ('möte', 'Sal 301', 10))
+
+	def test_due_by_clock(self):
+		clock = VirtualClock(self.now)
+		reminders = Reminders(self.path, clock = clock)
+		event = Event(body = 'möte', date = date(2026, 10, 19), time = time(13, 0), alarm = timedelta(minutes = 30))
+		reminders.add(event)
+
+		self.assertEqual(reminders.pop_due(), [])
+		clock.set(datetime(2026, 10, 19, 12, 30))
+		self.assertEqual([event.body for _, event, _ in reminders.pop_due()], ['möte'])
+
+	def test_missed_reminders_skipped_by_clock(self):
+		reminders = Reminders(self.path)
+		event = Event(body = 'möte', date = date(2026, 10, 19), time = time(13, 0), alarm = timedelta(minutes = 30))
+		reminders.add(event, now = self.now)
+		reminders.save()
+
+		reloaded = Reminders(self.path, clock = VirtualClock(datetime(2026, 10, 19, 14, 0)))
+		self.assertEqual(len(reloaded), 0)
@@ -0,0 +1,30 @@
+import unittest
+from datetime import datetime
+from source.clock import VirtualClock
+from source.responsecache import ResponseCache
+
+
+class test_responsecache(unittest.TestCase):
+
+	def test_hit_has_chunks(self):
+		cache = ResponseCache()
+		cache.put('meny', 'rad\n' * 600)
+		response = cache.get('meny')
+		self.assertEqual(response, 'rad\n' * 600)
+		self.assertEqual(len(response.chunks), 2)
+
+	def test_expires(self):
+		clock = VirtualClock(datetime(2026, 10, 19))
+		cache = ResponseCache(ttl = 10, clock = clock.monotonic)
+		cache.put('meny', 'fisk')
+		clock.advance(11)
+		self.assertIsNone(cache.get('meny'))
+
+	def test_least_recently_used_evicted(self):
+		cache = ResponseCache(max_entries = 2)
+		cache.put('a', 'a')
+		cache.put('b', 'b')
+		cache.get('a')
+		cache.put('c', 'c')
+		self.assertIsNone(cache.get('b'))
+		self.assertEqual(cache.get('a'), 'a')
@@ -0,0 +1,134 @@
+import unittest
+from source.responsecache import ResponseCache
+from source.routing import Route, RoutingIndex
+from source.triggers import Trigger, TriggerMatcher
+
+
+class CommandParser:
+
+	def __init__(self, keywords: tuple, callbacks: dict, interactive_methods = (), cached_methods = ()):
+		self.keywords = keywords
+		self.matcher = TriggerMatcher(callbacks)
+		self.interactive_methods = interactive_methods
+		self.cached_methods = cached_methods
+
+
+class Feature:
+
+	def __init__(self, command_parser: CommandParser, interface = None):
+		self.command_parser = command_parser
+		self.interface = interface
+
+
+class Interface:
+
+	def __init__(self):
+		self.data_version = 0
+
+
+def tokens(message: str) -> list:
+	return message.lower().split()
+
+
+class test_routing(unittest.TestCase):
+
+	def setUp(self):
+		def total_deaths(): pass
+		def deaths_by_country(message): pass
+		def todays_lunch(): pass
+
+		self.total_deaths = total_deaths
+		self.deaths_by_country = deaths_by_country
+		self.todays_lunch = todays_lunch
+		self.corona = Feature(CommandParser(
+			keywords = ('land', 'totalt', 'många', 'corona'),
+			callbacks = {
+				Trigger('totalt', 'dött', 'omkommit', 'döda'): total_deaths,
+				Trigger('hur', 'dött', 'omkommit', 'döda'): deaths_by_country,
+				Trigger('har', 'dött', 'omkommit', 'döda'): deaths_by_country,
+				Trigger('dött'): deaths_by_country
+			},
+			interactive_methods = (deaths_by_country,),
+			cached_methods = (total_deaths,)))
+		self.lunch = Feature(CommandParser(
+			keywords = ('lunch', 'mat', 'idag'),
+			callbacks = {Trigger('lunch'): todays_lunch, Trigger('mat'): todays_lunch}))
+
+	def test_tie_within_feature_goes_to_first_registered(self):
+		route = RoutingIndex((self.corona, self.lunch)).route(tokens('hur många har dött totalt'))
+		self.assertIs(route.callback, self.total_deaths)
+		self.assertIs(route.feature, self.corona)
+		self.assertFalse(route.interactive)
+		self.assertTrue(route.cached)
+
+	def test_compound_trigger_wins_over_single_word(self):
+		def deaths_by_query(message): pass
+		def lunch_deaths(): pass
+
+		corona = Feature(CommandParser(
+			keywords = ('många',),
+			callbacks = {Trigger('har', 'dött'): deaths_by_query},
+			interactive_methods = (deaths_by_query,)))
+		lunch = Feature(CommandParser(
+			keywords = ('många', 'lunch'),
+			callbacks = {Trigger('dött'): lunch_deaths}))
+
+		route = RoutingIndex((lunch, corona)).route(tokens('hur många har dött av lunch'))
+		self.assertIs(route.callback, deaths_by_query)
+		self.assertTrue(route.interactive)
+
+	def test_more_keyword_hits_wins(self):
+		def corona_today(): pass
+
+		corona = Feature(CommandParser(
+			keywords = ('corona',),
+			callbacks = {Trigger('idag'): corona_today}))
+
+		route = RoutingIndex((corona, self.lunch)).route(tokens('vad blir det för mat idag'))
+		self.assertIs(route.callback, self.todays_lunch)
+		self.assertIs(route.feature, self.lunch)
+
+		route = RoutingIndex((corona, self.lunch)).route(tokens('corona idag'))
+		self.assertIs(route.callback, corona_today)
+
+	def test_tie_between_features_is_not_routed(self):
+		def corona_lunch(): pass
+
+		corona = Feature(CommandParser(
+			keywords = ('corona',),
+			callbacks = {Trigger('lunch'): corona_lunch}))
+
+		self.assertIsNone(RoutingIndex((corona, self.lunch)).route(tokens('corona lunch')))
+
+	def test_no_match(self):
+		index = RoutingIndex((self.corona, self.lunch))
+		self.assertIsNone(index.route(tokens('hej på dig')))
+		self.assertIsNone(index.route(tokens('hur många är ni')))
+		self.assertIsNone(RoutingIndex(()).route(tokens('vad blir det för lunch')))
+
+	def test_response_cached_under_version_after_refresh(self):
+		interface = Interface()
+		feature = Feature(self.lunch.command_parser, interface)
+		cache = ResponseCache()
+		calls = []
+
+		def todays_lunch():
+			if not calls:
+				interface.data_version += 1
+			calls.append(1)
+			return f'meny {interface.data_version}'
+
+		def route() -> Route:
+			route = Route(todays_lunch, interactive = False, feature = feature, cached = True)
+			route.cache = cache
+			route.cache_key = (feature, todays_lunch, (), '2026-10-19')
+			return route
+
+		self.assertEqual(route().response(), 'meny 1')
+		self.assertEqual(route().response(), 'meny 1')
+		self.assertEqual(len(calls), 1)
+
+		interface.data_version += 1
+		self.assertEqual(route().response(), 'meny 2')
+		self.assertEqual(len(calls), 2)
+
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from source.clock import VirtualClock
+from source.sharedcache import SharedCache
+
+
+class test_sharedcache(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'shared_cache.db')
+		self.clock = VirtualClock(datetime(2026, 10, 19))
+		self.first = SharedCache(self.path, lease_seconds = 30, clock = self.clock.monotonic)
+		self.second = SharedCache(self.path, lease_seconds = 30, clock = self.clock.monotonic)
+
+	def tearDown(self):
+		self.first.close()
+		self.second.close()
+		self.directory.cleanup()
+
+	def test_data_is_downloaded_once(self):
+		downloads = []
+
+		def download():
+			downloads.append(1)
+			return b'meny'
+
+		self.assertEqual(self.first.fetch('lunch', 60, download), b'meny')
+		self.assertEqual(self.second.fetch('lunch', 60, download), b'meny')
+		self.assertEqual(len(downloads), 1)
+
+		self.clock.advance(61)
+		self.second.fetch('lunch', 60, download)
+		self.assertEqual(len(downloads), 2)
+
+	def test_lease_is_exclusive_until_expired(self):
+		self.assertTrue(self.first.acquire('lunch'))
+		self.assertTrue(self.first.acquire('lunch'))
+		self.assertFalse(self.second.acquire('lunch'))
+
+		self.clock.advance(31)
+		self.assertTrue(self.second.acquire('lunch'))
+
+	def test_failed_download_releases_lease(self):
+		def download():
+			raise OSError('timeout')
+
+		with self.assertRaises(OSError):
+			self.first.fetch('lunch', 60, download)
+		self.assertTrue(self.second.acquire('lunch'))
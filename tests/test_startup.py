@@ -0,0 +1,126 @@
+import threading
+import unittest
+from unittest import mock
+from source.startup import FeatureLoader
+
+
+class Interface:
+
+	def __init__(self, failures: int):
+		self.failures = failures
+		self.attempts = 0
+		self.warmed_up = threading.Event()
+
+	def warm_up(self):
+		self.attempts += 1
+		if self.attempts <= self.failures:
+			raise OSError('timeout')
+		self.warmed_up.set()
+
+
+class Feature:
+
+	def __init__(self, interface = None):
+		self.interface = interface
+
+
+def fail():
+	raise OSError('timeout')
+
+
+class test_startup(unittest.TestCase):
+
+	def setUp(self):
+		self.loader = FeatureLoader(max_workers = 4)
+
+	def tearDown(self):
+		self.loader.close()
+
+	def test_ready_within_deadline(self):
+		lunch, schedule = Feature(), Feature()
+		features = self.loader.load({
+			'lunchmenu': (lambda: lunch, 1),
+			'schedule': (lambda: schedule, 1)
+		})
+		self.assertEqual(features, {'lunchmenu': lunch, 'schedule': schedule})
+
+	def test_late_feature_handed_over(self):
+		release = threading.Event()
+		delivered = threading.Event()
+		late = []
+		schedule = Feature()
+
+		def slow():
+			release.wait(5)
+			return schedule
+
+		def on_late_ready(name, feature):
+			late.append((name, feature))
+			delivered.set()
+
+		features = self.loader.load({'schedule': (slow, 0.01)}, on_late_ready = on_late_ready)
+		self.assertEqual(features, {})
+
+		release.set()
+		self.assertTrue(delivered.wait(5))
+		self.assertEqual(late, [('schedule', schedule)])
+
+	def test_failing_factory_is_left_out(self):
+		lunch = Feature()
+		features = self.loader.load({
+			'schedule': (fail, 1),
+			'lunchmenu': (lambda: lunch, 1)
+		})
+		self.assertEqual(features, {'lunchmenu': lunch})
+
+	def test_start_does_not_block(self):
+		release = threading.Event()
+		ready = []
+		done = threading.Semaphore(0)
+		lunch, schedule = Feature(), Feature()
+
+		def slow():
+			release.wait(5)
+			return schedule
+
+		def on_ready(name, feature):
+			ready.append(name)
+			done.release()
+
+		self.loader.start({
+			'lunchmenu': (lambda: lunch, 1),
+			'schedule': (slow, 0.01),
+			'corona': (fail, 1)
+		}, on_ready = on_ready)
+		self.assertTrue(done.acquire(timeout = 5))
+		self.assertEqual(ready, ['lunchmenu'])
+
+		release.set()
+		self.assertTrue(done.acquire(timeout = 5))
+		self.assertEqual(ready, ['lunchmenu', 'schedule'])
+
+	@mock.patch.object(FeatureLoader, 'WARM_UP_RETRY_SECONDS', (0, 0))
+	def test_warm_up_retries(self):
+		interface = Interface(failures = 2)
+		self.loader.warm_up('schedule', Feature(interface))
+		self.assertTrue(interface.warmed_up.wait(5))
+		self.assertEqual(interface.attempts, 3)
+
+	@mock.patch.object(FeatureLoader, 'WARM_UP_RETRY_SECONDS', (0, 0))
+	def test_warm_up_gives_up(self):
+		interface = Interface(failures = 10)
+		lunch = Interface(failures = 0)
+		self.loader.warm_up('schedule', Feature(interface))
+		self.loader.warm_up('lunchmenu', Feature(lunch))
+		self.loader._executor.shutdown(wait = True)
+
+		self.assertEqual(interface.attempts, 3)
+		self.assertTrue(lunch.warmed_up.is_set())
+
+	@mock.patch.object(FeatureLoader, 'WARM_UP_RETRY_SECONDS', (60,))
+	def test_close_stops_retries(self):
+		interface = Interface(failures = 10)
+		self.loader.warm_up('schedule', Feature(interface))
+		self.loader.close()
+		self.loader._executor.shutdown(wait = True)
+		self.assertEqual(interface.attempts, 1)
@@ -0,0 +1,36 @@
+import unittest
+from source.triggers import Trigger, TriggerMatcher
+
+
+class test_triggers(unittest.TestCase):
+
+	def test_parse_legacy_keys(self):
+		self.assertEqual(Trigger.parse('dött'), Trigger('dött'))
+		self.assertEqual(Trigger.parse(str({'rank': ('upp', 'up')})), Trigger('rank', 'upp', 'up'))
+		self.assertEqual(Trigger.parse(str(Trigger('totalt', 'dött', 'döda'))), Trigger('totalt', 'dött', 'döda'))
+
+	def test_specificity(self):
+		self.assertEqual(Trigger('dött').specificity, 1)
+		self.assertEqual(Trigger('totalt', 'dött').specificity, 2)
+
+	def test_follower_is_required(self):
+		matcher = TriggerMatcher({Trigger('rank', 'upp', 'up'): 'rank_up'})
+		self.assertEqual(matcher.match({'rank', 'up'}), [(Trigger('rank', 'upp', 'up'), 'rank_up')])
+		self.assertEqual(matcher.match({'rank', 'ner'}), [])
+		self.assertEqual(matcher.match({'up'}), [])
+
+	def test_matches_in_registration_order(self):
+		matcher = TriggerMatcher({
+			Trigger('totalt', 'dött', 'döda'): 'total_deaths',
+			Trigger('hur', 'dött', 'döda'): 'deaths_by_query_1',
+			Trigger('har', 'dött', 'döda'): 'deaths_by_query_2',
+			Trigger('dött'): 'deaths_by_country'
+		})
+		matches = matcher.match(set('hur många har dött totalt'.split()))
+		self.assertEqual(
+			[callback for _, callback in matches],
+			['total_deaths', 'deaths_by_query_1', 'deaths_by_query_2', 'deaths_by_country'])
+
+	def test_no_match(self):
+		matcher = TriggerMatcher({Trigger('totalt', 'dött'): 'total_deaths'})
+		self.assertEqual(matcher.match({'vad', 'blir', 'det', 'för', 'lunch'}), [])
@@ -0,0 +1,64 @@
+import asyncio
+import time
+import unittest
+from source.upstream import CircuitBreaker, UpstreamUnavailable
+
+
+class Service:
+
+	def __init__(self):
+		self.up = False
+		self.calls = 0
+
+	def get(self):
+		self.calls += 1
+		if not self.up:
+			raise ConnectionError('nere')
+		return 'svar'
+
+	async def get_async(self):
+		await asyncio.sleep(0)
+		return self.get()
+
+
+class test_upstream(unittest.TestCase):
+
+	def test_opens_after_failures(self):
+		service = Service()
+		breaker = CircuitBreaker('Tjänsten', failure_threshold = 2, reset_timeout = 60)
+		for _ in range(2):
+			with self.assertRaises(ConnectionError):
+				breaker.call(service.get)
+
+		with self.assertRaises(UpstreamUnavailable):
+			breaker.call(service.get)
+		self.assertEqual(service.calls, 2)
+		self.assertFalse(breaker.available)
+
+	def test_probe_closes(self):
+		service = Service()
+		breaker = CircuitBreaker('Tjänsten', failure_threshold = 1, reset_timeout = 0.05)
+		with self.assertRaises(ConnectionError):
+			breaker.call(service.get)
+
+		service.up = True
+		time.sleep(0.2)
+		self.assertTrue(breaker.available)
+		self.assertEqual(breaker.call(service.get), 'svar')
+
+	def test_probe_closes_async(self):
+		service = Service()
+		breaker = CircuitBreaker('Tjänsten', failure_threshold = 1, reset_timeout = 0.05)
+
+		async def run():
+			with self.assertRaises(ConnectionError):
+				await breaker.call_async(service.get_async)
+			with self.assertRaises(UpstreamUnavailable):
+				await breaker.call_async(service.get_async)
+
+			service.up = True
+			await asyncio.sleep(0.2)
+			self.assertTrue(breaker.available)
+			return await breaker.call_async(service.get_async)
+
+		self.assertEqual(asyncio.new_event_loop().run_until_complete(run()), 'svar')